@@ -1,6 +1,13 @@
 # Copyright Sierra
 
+import bisect
+import contextlib
+import copy
+import inspect
+import json
+import os
 import random
+import sys
 from hashlib import sha256
 from tau_bench.envs.tool import Tool
 from typing import Any, Callable, Dict, List, Type, Optional, Set, Union, Tuple
@@ -41,7 +48,643 @@ def consistent_hash(
     return sha256(str(value).encode("utf-8")).hexdigest()
 
 
+_MUTABLE_TYPES = (dict, list, set)
+_DIGEST_MODULUS = 1 << 256
+
+
+def _tuple_text(parts: List[str]) -> str:
+    # Same text str() gives for a tuple whose items have these reprs.
+    if not parts:
+        return "()"
+    if len(parts) == 1:
+        return "(" + parts[0] + ",)"
+    return "(" + ", ".join(parts) + ")"
+
+
+def _text_digest(text: str) -> int:
+    return int.from_bytes(sha256(text.encode("utf-8")).digest(), "big")
+
+
+def _untracked_total(table: Any) -> int:
+    # The merkle sum of a table hashed from scratch; matches what tracking maintains.
+    if isinstance(table, dict):
+        return sum(_text_digest(repr((key, to_hashable(value)))) for key, value in table.items()) % _DIGEST_MODULUS
+    return _text_digest(repr(to_hashable(table)))
+
+
+class _TrackedRecord(dict):
+    """A record of a TrackedData table that marks itself dirty when it may have changed.
+
+    Reading a mutable value (a nested dict, list or set) counts as a possible
+    change, since the caller can modify it in place.
+    """
+
+    __slots__ = ("_table", "_key")
+
+    def _touch(self) -> None:
+        self._table._mark(self._key)
+
+    def __getitem__(self, key: Any) -> Any:
+        value = dict.__getitem__(self, key)
+        if isinstance(value, _MUTABLE_TYPES):
+            self._touch()
+        return value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        value = dict.get(self, key, default)
+        if isinstance(value, _MUTABLE_TYPES):
+            self._touch()
+        return value
+
+    def values(self) -> Any:
+        self._touch()
+        return dict.values(self)
+
+    def items(self) -> Any:
+        self._touch()
+        return dict.items(self)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._touch()
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key: Any) -> None:
+        self._touch()
+        dict.__delitem__(self, key)
+
+    def __ior__(self, other: Any) -> "_TrackedRecord":
+        self._touch()
+        dict.update(self, other)
+        return self
+
+    def pop(self, *args: Any) -> Any:
+        self._touch()
+        return dict.pop(self, *args)
+
+    def popitem(self) -> Any:
+        self._touch()
+        return dict.popitem(self)
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        self._touch()
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        self._touch()
+        dict.update(self, *args, **kwargs)
+
+    def clear(self) -> None:
+        self._touch()
+        dict.clear(self)
+
+    # Copies are plain dicts, so they never drag the owning table along.
+    def __copy__(self) -> Dict[Any, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[Any, Any]:
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self) -> Any:
+        return (dict, (dict(self),))
+
+
+class _TrackedTable(dict):
+    """A table of a TrackedData that records which keys were written."""
+
+    __slots__ = ("_root", "_name")
+
+    def _mark(self, key: Any) -> None:
+        self._root._mark(self._name, key)
+
+    def _adopt(self, key: Any, value: Any) -> None:
+        # Values we did not wrap ourselves can change behind our back: rehash them every time.
+        if isinstance(value, _MUTABLE_TYPES) and not (
+            type(value) is _TrackedRecord and value._table is self and value._key == key
+        ):
+            self._root._volatile.setdefault(self._name, set()).add(key)
+        else:
+            volatile = self._root._volatile.get(self._name)
+            if volatile is not None:
+                volatile.discard(key)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._mark(key)
+        self._adopt(key, value)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key: Any) -> None:
+        self._mark(key)
+        dict.__delitem__(self, key)
+
+    def __ior__(self, other: Any) -> "_TrackedTable":
+        self.update(other)
+        return self
+
+    def pop(self, key: Any, *args: Any) -> Any:
+        self._mark(key)
+        return dict.pop(self, key, *args)
+
+    def popitem(self) -> Any:
+        key, value = dict.popitem(self)
+        self._mark(key)
+        return key, value
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self) -> None:
+        self._root._mark(self._name, None)
+        dict.clear(self)
+
+    def __copy__(self) -> Dict[Any, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[Any, Any]:
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self) -> Any:
+        return (dict, (dict(self),))
+
+
+class _TableHash(object):
+    """Cached hashing state for one tracked table."""
+
+    __slots__ = ("fragments", "keys", "text", "digests", "total")
+
+    def __init__(self, fragments: Dict[Any, str]) -> None:
+        self.fragments = fragments
+        self.keys: List[Any] = sorted(fragments)
+        self.text: Optional[str] = None
+        # Per-record digests and their sum, kept once the merkle mode is first used.
+        self.digests: Optional[Dict[Any, int]] = None
+        self.total = 0
+
+    def clone(self) -> "_TableHash":
+        state = _TableHash.__new__(_TableHash)
+        state.fragments = dict(self.fragments)
+        state.keys = list(self.keys)
+        state.text = self.text
+        state.digests = dict(self.digests) if self.digests is not None else None
+        state.total = self.total
+        return state
+
+
+# Placeholder for a table of a pristine view that has not been copied yet.
+_UNLOADED = object()
+
+
+class TrackedData(dict):
+    """Environment data that hashes incrementally.
+
+    Tables (dicts of records) and their records are wrapped in dict
+    subclasses that record which keys were written since the last hash,
+    so each hash only re-renders the records that changed. Two modes:
+
+      * "compat": the same digest as consistent_hash(to_hashable(data)),
+        assembled from cached per-record text;
+      * "merkle": per-record sha256 digests summed per table, then hashed
+        per dataset, so the cost follows the number of changed records.
+
+    A view of a PristineData starts with no tables of its own: each table is
+    copied from the shared base the first time it is accessed, and hashes
+    of tables never accessed come straight from the base.
+    """
+
+    def __init__(self, data: Optional[Dict[Any, Any]] = None, pristine: Optional["PristineData"] = None) -> None:
+        super().__init__()
+        self._dirty: Dict[Any, Optional[Set[Any]]] = {}
+        self._volatile: Dict[Any, Set[Any]] = {}
+        self._hashes: Dict[Any, _TableHash] = {}
+        self._pristine = pristine
+        if pristine is not None:
+            for name in pristine.data:
+                dict.__setitem__(self, name, _UNLOADED)
+            self._hashes.update(pristine.hashes)
+        for name, table in (data or {}).items():
+            dict.__setitem__(self, name, self._wrap(name, table))
+            self._dirty[name] = None
+
+    def _wrap(self, name: Any, table: Any, copy_values: bool = False) -> Any:
+        if type(table) is not dict:
+            return copy.deepcopy(table) if copy_values else table
+        tracked = _TrackedTable()
+        tracked._root, tracked._name = self, name
+        for key, value in table.items():
+            if type(value) is dict:
+                if copy_values:
+                    value = {
+                        field: copy.deepcopy(item) if isinstance(item, _MUTABLE_TYPES) else item
+                        for field, item in value.items()
+                    }
+                record = _TrackedRecord(value)
+                record._table, record._key = tracked, key
+                value = record
+            elif isinstance(value, _MUTABLE_TYPES):
+                self._volatile.setdefault(name, set()).add(key)
+            dict.__setitem__(tracked, key, value)
+        return tracked
+
+    def _load(self, name: Any, table: Any) -> Any:
+        # Copy a pristine table into this view on first access.
+        if table is _UNLOADED:
+            table = self._wrap(name, self._pristine.data[name], copy_values=True)
+            dict.__setitem__(self, name, table)
+            state = self._hashes.get(name)
+            if state is not None:
+                self._hashes[name] = state.clone()
+        return table
+
+    def _load_all(self) -> None:
+        if self._pristine is not None:
+            for name, table in dict.items(self):
+                if table is _UNLOADED:
+                    self._load(name, table)
+
+    def __getitem__(self, name: Any) -> Any:
+        return self._load(name, dict.__getitem__(self, name))
+
+    def get(self, name: Any, default: Any = None) -> Any:
+        return self[name] if name in self else default
+
+    # Overriding __iter__ also makes dict(view) and {**view} go through __getitem__.
+    def __iter__(self) -> Any:
+        return dict.__iter__(self)
+
+    def values(self) -> Any:
+        self._load_all()
+        return dict.values(self)
+
+    def items(self) -> Any:
+        self._load_all()
+        return dict.items(self)
+
+    def copy(self) -> Dict[Any, Any]:
+        return dict(self.items())
+
+    def __eq__(self, other: Any) -> bool:
+        self._load_all()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other: Any) -> bool:
+        self._load_all()
+        return dict.__ne__(self, other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        self._load_all()
+        return dict.__repr__(self)
+
+    def _mark(self, name: Any, key: Any) -> None:
+        # key None marks the whole table.
+        if key is None:
+            self._dirty[name] = None
+            return
+        keys = self._dirty.get(name, set())
+        if keys is not None:
+            keys.add(key)
+            self._dirty[name] = keys
+
+    def __setitem__(self, name: Any, table: Any) -> None:
+        self._dirty[name] = None
+        dict.__setitem__(self, name, table)
+
+    def __delitem__(self, name: Any) -> None:
+        self._dirty[name] = None
+        dict.__delitem__(self, name)
+
+    def __ior__(self, other: Any) -> "TrackedData":
+        self.update(other)
+        return self
+
+    def pop(self, name: Any, *args: Any) -> Any:
+        if name in self:
+            self._load(name, dict.__getitem__(self, name))
+        self._dirty[name] = None
+        return dict.pop(self, name, *args)
+
+    def popitem(self) -> Any:
+        if not self:
+            raise KeyError("popitem(): dictionary is empty")
+        name = next(reversed(dict.keys(self)))
+        return name, self.pop(name)
+
+    def setdefault(self, name: Any, default: Any = None) -> Any:
+        if name not in self:
+            self[name] = default
+        return self[name]
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for name, table in dict(*args, **kwargs).items():
+            self[name] = table
+
+    def clear(self) -> None:
+        for name in self:
+            self._dirty[name] = None
+        dict.clear(self)
+
+    def __copy__(self) -> Dict[Any, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[Any, Any]:
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self) -> Any:
+        return (dict, (dict(self),))
+
+    def _tracked(self, name: Any) -> Optional[_TrackedTable]:
+        table = dict.get(self, name)
+        if type(table) is _TrackedTable and table._root is self and table._name == name:
+            return table
+        return None
+
+    def _refresh(self, merkle: bool) -> None:
+        """Bring every table's cached hashing state up to date."""
+        names = set(self._dirty)
+        names.update(self._volatile)
+        for name in names:
+            table = self._tracked(name)
+            if table is None:
+                self._hashes.pop(name, None)
+                continue
+            keys = self._dirty.get(name, set())
+            state = self._hashes.get(name)
+            if keys is None or state is None:
+                self._hashes[name] = _TableHash({
+                    key: repr((key, to_hashable(value))) for key, value in dict.items(table)
+                })
+                continue
+            for key in keys.union(self._volatile.get(name, ())):
+                self._refresh_record(state, table, key)
+        # Rendering records reads them, which marks them again.
+        self._dirty.clear()
+        if merkle:
+            for state in self._hashes.values():
+                if state.digests is None:
+                    state.digests = {key: _text_digest(fragment) for key, fragment in state.fragments.items()}
+                    state.total = sum(state.digests.values()) % _DIGEST_MODULUS
+
+    @staticmethod
+    def _refresh_record(state: _TableHash, table: _TrackedTable, key: Any) -> None:
+        old_fragment = state.fragments.get(key)
+        fragment = None
+        if key in table:
+            fragment = repr((key, to_hashable(dict.__getitem__(table, key))))
+            if fragment == old_fragment:
+                return
+            state.fragments[key] = fragment
+            if old_fragment is None:
+                bisect.insort(state.keys, key)
+        elif old_fragment is None:
+            return
+        else:
+            del state.fragments[key]
+            del state.keys[bisect.bisect_left(state.keys, key)]
+        state.text = None
+        if state.digests is not None:
+            if key in state.digests:
+                state.total -= state.digests.pop(key)
+            if fragment is not None:
+                state.digests[key] = digest = _text_digest(fragment)
+                state.total += digest
+            state.total %= _DIGEST_MODULUS
+
+    def state_hash(self, mode: str = "compat") -> str:
+        """Get the digest of the data in the given mode ("compat" or "merkle")."""
+        if mode not in ("compat", "merkle"):
+            raise ValueError(f"Unknown hash mode '{mode}'")
+        merkle = mode == "merkle"
+        self._refresh(merkle)
+        names = sorted(self)
+        if merkle:
+            digest = sha256()
+            for name in names:
+                state = self._hashes.get(name)
+                if state is not None:
+                    total = state.total
+                else:
+                    total = _untracked_total(self[name])
+                digest.update(f"{name!r}:{total:064x}\n".encode("utf-8"))
+            return digest.hexdigest()
+        parts = []
+        for name in names:
+            state = self._hashes.get(name)
+            if state is None:
+                parts.append(repr((name, to_hashable(self[name]))))
+                continue
+            if state.text is None:
+                fragments = state.fragments
+                state.text = "(" + repr(name) + ", " + _tuple_text([fragments[key] for key in state.keys]) + ")"
+            parts.append(state.text)
+        return sha256(_tuple_text(parts).encode("utf-8")).hexdigest()
+
+
+def _table_fragments(data: TrackedData, name: Any) -> Optional[Dict[Any, str]]:
+    state = data._hashes.get(name)
+    if state is not None:
+        return state.fragments
+    table = data[name]
+    if isinstance(table, dict):
+        return {key: repr((key, to_hashable(value))) for key, value in table.items()}
+    return None
+
+
+def _record_diff(actual: Any, expected: Any) -> Dict[str, Any]:
+    if not (isinstance(actual, dict) and isinstance(expected, dict)):
+        return {"expected": expected, "actual": actual}
+    diff: Dict[str, Any] = {"added": {}, "removed": {}, "changed": {}}
+    for field, value in actual.items():
+        if field not in expected:
+            diff["added"][field] = value
+        elif to_hashable(value) != to_hashable(expected[field]):
+            diff["changed"][field] = {"expected": expected[field], "actual": value}
+    for field, value in expected.items():
+        if field not in actual:
+            diff["removed"][field] = value
+    return {kind: fields for kind, fields in diff.items() if fields}
+
+
+def diff_states(actual: Dict[str, Any], expected: Dict[str, Any], limit: Optional[int] = 50) -> Dict[str, Any]:
+    """Describe how actual differs from expected, table by table and record by record.
+
+    Tables whose merkle sums match are skipped, and within the others only
+    records whose hash fragments differ are compared field by field.
+    "added" and "removed" are relative to expected; each table reports at
+    most limit records per kind, with the full counts alongside.
+    """
+    actual = actual if isinstance(actual, TrackedData) else TrackedData(actual)
+    expected = expected if isinstance(expected, TrackedData) else TrackedData(expected)
+    actual._refresh(merkle=True)
+    expected._refresh(merkle=True)
+
+    result: Dict[str, Any] = {
+        "added_tables": sorted(name for name in actual if name not in expected),
+        "removed_tables": sorted(name for name in expected if name not in actual),
+        "tables": {},
+    }
+    for name in sorted(name for name in actual if name in expected):
+        state_a, state_e = actual._hashes.get(name), expected._hashes.get(name)
+        if state_a is not None and state_e is not None and state_a.total == state_e.total:
+            continue
+        fragments_a, fragments_e = _table_fragments(actual, name), _table_fragments(expected, name)
+        if fragments_a is None or fragments_e is None:
+            if to_hashable(actual[name]) != to_hashable(expected[name]):
+                result["tables"][name] = {"expected": expected[name], "actual": actual[name]}
+            continue
+        if fragments_a == fragments_e:
+            continue
+        table_a, table_e = actual[name], expected[name]
+        kinds: Dict[str, Dict[Any, Any]] = {"added": {}, "removed": {}, "changed": {}}
+        counts = {"added": 0, "removed": 0, "changed": 0}
+        for key, fragment in fragments_a.items():
+            other = fragments_e.get(key)
+            if other == fragment:
+                continue
+            kind = "added" if other is None else "changed"
+            counts[kind] += 1
+            if limit is None or len(kinds[kind]) < limit:
+                kinds[kind][key] = dict.__getitem__(table_a, key) if other is None else _record_diff(
+                    dict.__getitem__(table_a, key), dict.__getitem__(table_e, key))
+        for key in fragments_e:
+            if key not in fragments_a:
+                counts["removed"] += 1
+                if limit is None or len(kinds["removed"]) < limit:
+                    kinds["removed"][key] = dict.__getitem__(table_e, key)
+        table_diff: Dict[str, Any] = {kind: records for kind, records in kinds.items() if records}
+        table_diff["counts"] = counts
+        result["tables"][name] = table_diff
+    # Detach the reported values from the live data.
+    return copy.deepcopy(result)
+
+
+class RewardActionDiffInfo(RewardActionInfo):
+    # Set when the data hash does not match: how the final data differs from the ground truth.
+    data_diff: Optional[Dict[str, Any]] = None
+
+
+class PristineData(object):
+    """A dataset loaded once, with the hashing state of each table, shared by every episode.
+
+    Nothing may mutate it; episodes get copy-on-access views from view().
+    """
+
+    def __init__(self, data: Dict[Any, Any]) -> None:
+        self.data = data
+        self.hashes: Dict[Any, _TableHash] = {
+            name: _TableHash({key: repr((key, to_hashable(value))) for key, value in table.items()})
+            for name, table in data.items()
+            if type(table) is dict
+        }
+
+    def view(self) -> TrackedData:
+        return TrackedData(pristine=self)
+
+
+_PRISTINE_DATA: Dict[Callable[[], Dict[str, Any]], PristineData] = {}
+
+
+def get_pristine_data(data_load_func: Callable[[], Dict[str, Any]]) -> PristineData:
+    pristine = _PRISTINE_DATA.get(data_load_func)
+    if pristine is None:
+        pristine = _PRISTINE_DATA[data_load_func] = PristineData(data_load_func())
+    return pristine
+
+
+def clear_pristine_data() -> None:
+    _PRISTINE_DATA.clear()
+
+
+# "compat" reproduces consistent_hash(to_hashable(data)); "merkle" is cheaper to update.
+HASH_MODES = ("compat", "merkle")
+
+GT_HASH_CACHE_ENV = "TAU_GT_HASH_CACHE"
+
+
+class GtHashCache(object):
+    """Ground-truth data hashes keyed by (task index, actions, dataset, tool code) digests.
+
+    With a path, entries are read from and merged into a JSON file so they
+    are reused across runs; without one they live for the process.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self.entries: Optional[Dict[str, str]] = None
+
+    @staticmethod
+    def key(parts: Tuple[Any, ...]) -> str:
+        return ":".join(str(part) for part in parts)
+
+    def _read(self) -> Dict[str, str]:
+        if self.path is None or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def get(self, key: str) -> Optional[str]:
+        if self.entries is None:
+            self.entries = self._read()
+        return self.entries.get(key)
+
+    def update(self, entries: Dict[str, str]) -> None:
+        if self.entries is None:
+            self.entries = self._read()
+        self.entries.update(entries)
+        if self.path is None:
+            return
+        # Merge with whatever other runs wrote since we loaded, then swap the file in.
+        merged = self._read()
+        merged.update(self.entries)
+        self.entries = merged
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(merged, f, indent=0, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+_PROCESS_GT_HASH_CACHES: Dict[Optional[str], GtHashCache] = {}
+
+
+def get_gt_hash_cache(path: Optional[str] = None) -> GtHashCache:
+    if path is None:
+        path = os.environ.get(GT_HASH_CACHE_ENV) or None
+    cache = _PROCESS_GT_HASH_CACHES.get(path)
+    if cache is None:
+        cache = _PROCESS_GT_HASH_CACHES[path] = GtHashCache(path)
+    return cache
+
+
+def _module_source(module: Any) -> Optional[bytes]:
+    path = getattr(module, "__file__", None)
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
 class Env(object):
+    # Attach a diff against the ground-truth data to the reward info when the hashes differ.
+    explain_mismatch = True
+    # Modules the tools call into; their source is part of tools_digest, so
+    # editing them invalidates cached ground-truth hashes too.
+    tool_helper_modules = ("data_manager", "wiki_indexes")
+    # Modules whose DataManager holds tables the tools read and write outside
+    # self.data; their tables are part of the ground-truth key and are put
+    # back after a ground-truth replay.
+    table_store_modules = ("data_manager",)
+
     def __init__(
         self,
         data_load_func: Callable[[], Dict[str, Any]],
@@ -53,10 +696,15 @@ class Env(object):
         user_model: str,
         user_provider: Optional[str] = None,
         task_index: Optional[int] = None,
+        gt_hash_cache: Optional[Union[str, GtHashCache]] = None,
+        hash_mode: str = "compat",
     ) -> None:
         super().__init__()
+        if hash_mode not in HASH_MODES:
+            raise ValueError(f"Unknown hash mode '{hash_mode}'")
+        self.hash_mode = hash_mode
         self.data_load_func = data_load_func
-        self.data = data_load_func()
+        self.data = self.load_fresh_data()
         self.tools_map: Dict[str, Type[Tool]] = {
             tool.get_info()["function"]["name"]: tool for tool in tools
         }
@@ -74,12 +722,31 @@ class Env(object):
             user_strategy=user_strategy, model=user_model, provider=user_provider
         )
         self.actions: List[Action] = []
+        if isinstance(gt_hash_cache, GtHashCache):
+            self.gt_hash_cache = gt_hash_cache
+        else:
+            self.gt_hash_cache = get_gt_hash_cache(gt_hash_cache)
+        self._dataset_digest: Optional[str] = None
+        self._tools_digest: Optional[str] = None
+        self._last_gt_data: Optional[Tuple[int, TrackedData]] = None
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        return self._data
+
+    @data.setter
+    def data(self, data: Dict[str, Any]) -> None:
+        self._data = data if isinstance(data, TrackedData) else TrackedData(data)
+
+    def load_fresh_data(self) -> TrackedData:
+        # The dataset is read once per process; each call gets its own copy-on-access view.
+        return get_pristine_data(self.data_load_func).view()
 
     def reset(self, task_index: Optional[int] = None) -> EnvResetResponse:
         if task_index is None:
             task_index = random.randint(0, len(self.tasks))
         self.task_index = task_index
-        self.data = self.data_load_func()
+        self.data = self.load_fresh_data()
         self.task = self.tasks[task_index]
         self.actions = []
         initial_observation = self.user.reset(instruction=self.task.instruction)
@@ -119,7 +786,118 @@ class Env(object):
         return EnvResponse(observation=observation, reward=reward, done=done, info=info)
 
     def get_data_hash(self) -> str:
-        return consistent_hash(to_hashable(self.data))
+        return self.data.state_hash(self.hash_mode)
+
+    def dataset_digest(self) -> str:
+        if self._dataset_digest is None:
+            self._dataset_digest = self.load_fresh_data().state_hash("compat")
+        return self._dataset_digest
+
+    def tools_digest(self) -> str:
+        if self._tools_digest is None:
+            digest = sha256()
+            for name in sorted(self.tools_map):
+                tool = self.tools_map[name]
+                source = _module_source(sys.modules.get(tool.__module__)) or inspect.getsource(tool).encode("utf-8")
+                digest.update(name.encode("utf-8") + b"\0" + source + b"\0")
+            helpers = {__name__: sys.modules[__name__]}
+            for module_name, module in list(sys.modules.items()):
+                if module is not None and module_name.rpartition(".")[2] in self.tool_helper_modules:
+                    helpers[module_name] = module
+            for module_name in sorted(helpers):
+                source = _module_source(helpers[module_name])
+                if source is not None:
+                    digest.update(module_name.encode("utf-8") + b"\0" + source + b"\0")
+            self._tools_digest = digest.hexdigest()
+        return self._tools_digest
+
+    def table_stores(self) -> List[Any]:
+        stores: List[Any] = []
+        for module_name, module in sorted(list(sys.modules.items()), key=lambda item: item[0]):
+            if module is None or module_name.rpartition(".")[2] not in self.table_store_modules:
+                continue
+            store = getattr(module, "DataManager", None)
+            if store is not None and store not in stores:
+                stores.append(store)
+        return stores
+
+    def tables_digest(self) -> str:
+        digest = sha256()
+        for store in self.table_stores():
+            digest.update(store.__module__.encode("utf-8") + b"\0" + store.tables_digest().encode("utf-8") + b"\0")
+        return digest.hexdigest()
+
+    def gt_hash_key(self, task_index: int) -> str:
+        actions = [
+            {"name": action.name, "kwargs": action.kwargs}
+            for action in self.tasks[task_index].actions
+        ]
+        return GtHashCache.key(
+            (
+                task_index,
+                self.hash_mode,
+                consistent_hash(to_hashable(actions)),
+                self.dataset_digest(),
+                self.tables_digest(),
+                self.tools_digest(),
+            )
+        )
+
+    def replay_gt_data(self, task_index: int) -> TrackedData:
+        # Replay the ground-truth actions on a fresh copy of the data, leaving
+        # the episode's own data, action history and DataManager tables as they were.
+        data, actions, task = self.data, self.actions, self.task
+        with contextlib.ExitStack() as stack:
+            for store in self.table_stores():
+                stack.enter_context(store.preserved_tables())
+            try:
+                self.data = self.load_fresh_data()
+                self.actions = []
+                self.task = self.tasks[task_index]
+                for action in self.task.actions:
+                    # Replies to the user never change the data.
+                    if action.name not in self.terminate_tools and action.name != RESPOND_ACTION_NAME:
+                        self.step(action)
+                return self.data
+            finally:
+                self.data, self.actions, self.task = data, actions, task
+
+    def compute_gt_data_hash(self, task_index: int) -> str:
+        gt_data = self.replay_gt_data(task_index)
+        self._last_gt_data = (task_index, gt_data)
+        return gt_data.state_hash(self.hash_mode)
+
+    def explain_data_mismatch(self, task_index: Optional[int] = None) -> Dict[str, Any]:
+        if task_index is None:
+            task_index = self.task_index
+        last = self._last_gt_data
+        gt_data = last[1] if last is not None and last[0] == task_index else self.replay_gt_data(task_index)
+        return diff_states(self.data, gt_data)
+
+    def get_gt_data_hash(self, task_index: Optional[int] = None) -> str:
+        if task_index is None:
+            task_index = self.task_index
+        key = self.gt_hash_key(task_index)
+        gt_data_hash = self.gt_hash_cache.get(key)
+        if gt_data_hash is None:
+            gt_data_hash = self.compute_gt_data_hash(task_index)
+            self.gt_hash_cache.update({key: gt_data_hash})
+        return gt_data_hash
+
+    def precompute_gt_hashes(self, task_indices: Optional[List[int]] = None) -> Dict[int, str]:
+        if task_indices is None:
+            task_indices = list(range(len(self.tasks)))
+        hashes: Dict[int, str] = {}
+        missing: Dict[str, str] = {}
+        for task_index in task_indices:
+            key = self.gt_hash_key(task_index)
+            gt_data_hash = self.gt_hash_cache.get(key)
+            if gt_data_hash is None:
+                gt_data_hash = missing[key] = self.compute_gt_data_hash(task_index)
+            hashes[task_index] = gt_data_hash
+        if missing:
+            self.gt_hash_cache.update(missing)
+        return hashes
 
     def calculate_reward(self) -> RewardResult:
         data_hash = self.get_data_hash()
@@ -129,25 +907,29 @@ class Env(object):
         ]
 
         # Check if the database changes are correct. If they are not correct, then we set the reward to 0.
-        # TODO: cache gt_data_hash in tasks.py (low priority)
-        self.data = self.data_load_func()
-        for action in self.task.actions:
-            if action.name not in self.terminate_tools:
-                self.step(action)
-        gt_data_hash = self.get_data_hash()
-        info = RewardActionInfo(
+        self._last_gt_data = None
+        gt_data_hash = self.get_gt_data_hash()
+        info = RewardActionDiffInfo(
             r_actions=data_hash == gt_data_hash, gt_data_hash=gt_data_hash
         )
         if not info.r_actions:
             reward = 0.0
+            if self.explain_mismatch:
+                info.data_diff = self.explain_data_mismatch()
+        self._last_gt_data = None
 
         if len(self.task.outputs) > 0:
             # check outputs
             r_outputs = 1.0
             outputs = {}
+            # Replies in the ground-truth actions count too, as they did when
+            # the ground truth was replayed through step() on this episode.
+            responses = self.actions + [
+                action for action in self.task.actions if action.name not in self.terminate_tools
+            ]
             for output in self.task.outputs:
                 found = False
-                for action in self.actions:
+                for action in responses:
                     if (
                         action.name == RESPOND_ACTION_NAME
                         and output.lower()
@@ -1,154 +1,2546 @@
 """
 Data Manager for handling JSON file operations for the Wiki Confluence system.
 This module provides utilities for reading and writing data to JSON files.
+
+Tables listed in ``DataManager.LOG_TABLES`` are written through an
+append-only mutation log (``<table>.log.jsonl``) next to the JSON snapshot
+instead of rewriting the whole file on every change. The log is replayed
+over the snapshot on load and folded back into it by compaction.
+
+Fields declared in ``INDEX_SPEC`` get hash indexes that the finder methods
+use instead of scanning the table; they are built lazily and kept up to
+date by create_record, update_record and delete_record.
+
+Structures computed from whole tables, such as the page search index in
+``wiki_indexes``, subclass ``DerivedIndex`` and are obtained through
+``DataManager.get_derived``, which feeds them the same record mutations.
+
+Tables in ``DataManager.LAZY_TABLES`` also get a compact record file
+(``<table>.records``) and a byte-offset index (``<table>.offsets``) next to
+the snapshot, so get_record can decode a single record from an mmap instead
+of parsing the whole table. The pair is built on the first point read after
+the snapshot changes, not on every write.
+
+Tables in ``DELTA_SPEC`` (page_versions) store their content field on disk
+as delta chains with a full copy every few records; they are rebuilt on
+load, so callers always see full records.
+
+Text fields in ``BLOB_FIELDS`` (page and template content) are kept in a
+sha256 content-addressed blob store under ``DATA_DIR/blobs``; records hold
+``<field>_hash`` instead, so copying a page copies only the hash. The
+record readers (get_record, find_*, filter_records, query, get_all_records)
+fill the text back in, so callers still see ``<field>``. Reference
+counts are derived from the tables and ``gc_blobs`` (or ``python
+data_manager.py gc-blobs``) removes unreferenced blobs.
+
+Setting ``DataManager.BACKEND`` (see ``use_backend``) swaps the JSON files
+for another ``StorageBackend``, such as the bundled ``SQLiteBackend``. Run
+``python data_manager.py sqlite-import|sqlite-export <db>`` to move data
+between the JSON layout and a SQLite database.
+
+``load_data`` returns records as stored, with the hashes. The exports
+(``export_tables``, ``SQLiteBackend.export_json_dir`` and the ``export`` and
+``sqlite-export`` commands) write the text inline, so an exported directory
+is usable without ``blobs/``.
+
+``copy_dataset`` mirrors one dataset directory into another and
+``preserved_tables`` undoes whatever a block writes, sequences included;
+``tables_digest`` fingerprints the dataset for caches keyed on it.
+
+Snapshots are encoded with a pluggable codec (``DataManager.JSON_CODEC`` or
+the dataset's ``.codec`` file): pretty-printed by default, or compact, using
+orjson when it is installed. ``python data_manager.py set-codec <codec>``
+re-encodes a dataset and ``export <dir>`` writes a pretty-printed copy.
 """
 
+import base64
+import bisect
+import difflib
+import hashlib
 import json
+import mmap
 import os
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional: faster parsing and compact encoding
+    orjson = None
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: ID allocation is then only locked in-process
+    fcntl = None
+
+
+LOG_FORMAT_VERSION = 1
+
+# Codecs for mutation log entries: name -> (encode, decode). The writer picks
+# one when the log is created and records it in the log header.
+_LOG_CODECS: Dict[str, Tuple[Callable[[Dict[str, Any]], str], Callable[[str], Dict[str, Any]]]] = {
+    "json": (
+        lambda entry: json.dumps(entry, ensure_ascii=False, separators=(",", ":")),
+        json.loads,
+    ),
+}
+
+
+def register_log_codec(name: str, encode: Callable[[Dict[str, Any]], str], decode: Callable[[str], Dict[str, Any]]) -> None:
+    """Register a codec for mutation log entries. Encoded entries must not contain newlines."""
+    _LOG_CODECS[name] = (encode, decode)
+
+
+def _json_loads(raw: Any) -> Any:
+    """Parse JSON text or bytes, with orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass  # e.g. integers wider than 64 bits; let the stdlib parser decide
+    return json.loads(raw)
+
+
+# Codecs for table snapshots: name -> (encode to UTF-8 bytes, decode). Every
+# built-in codec writes plain JSON, so a dataset can switch codecs without
+# converting its files first.
+_TABLE_CODECS: Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    "pretty": (
+        lambda data: json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8"),
+        _json_loads,
+    ),
+    "compact": (
+        lambda data: json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        _json_loads,
+    ),
+}
+
+if orjson is not None:
+    _TABLE_CODECS["orjson"] = (orjson.dumps, _json_loads)
+    _LOG_CODECS["orjson"] = (lambda entry: orjson.dumps(entry).decode("utf-8"), _json_loads)
+
+
+def register_table_codec(name: str, encode: Callable[[Any], bytes], decode: Callable[[bytes], Any]) -> None:
+    """Register a codec for table snapshots."""
+    _TABLE_CODECS[name] = (encode, decode)
+
+
+def resolve_table_codec(name: str) -> str:
+    """Map a codec name to a registered one; "fast" is orjson when installed, else compact."""
+    if name == "fast":
+        name = "orjson" if "orjson" in _TABLE_CODECS else "compact"
+    if name not in _TABLE_CODECS:
+        raise ValueError(f"Unknown table codec '{name}' (available: {', '.join(sorted(_TABLE_CODECS))}, fast)")
+    return name
+
+
+# Secondary indexes maintained by DataManager, as "table.field" -> kind.
+# "unique" indexes also reject a second record with the same non-null value;
+# "range" indexes keep a timestamp column sorted for time-window queries.
+INDEX_SPEC: Dict[str, str] = {
+    "users.email": "unique",
+    "groups.group_name": "unique",
+    "spaces.space_key": "unique",
+    "pages.title": "non_unique",
+    "pages.space_id": "non_unique",
+    "pages.parent_page_id": "non_unique",
+    "page_versions.page_id": "non_unique",
+    "page_labels.page_id": "non_unique",
+    "user_groups.user_id": "non_unique",
+    "user_groups.group_id": "non_unique",
+    "space_memberships.user_id": "non_unique",
+    "space_memberships.space_id": "non_unique",
+    "permissions.space_id": "non_unique",
+    "permissions.page_id": "non_unique",
+    "permissions.user_id": "non_unique",
+    "permissions.group_id": "non_unique",
+    "watchers.user_id": "non_unique",
+    "watchers.group_id": "non_unique",
+    "watchers.space_id": "non_unique",
+    "watchers.page_id": "non_unique",
+    "approval_steps.approval_request_id": "non_unique",
+    "notifications.recipient_user_id": "non_unique",
+    "audit_logs.actor_user_id": "non_unique",
+    "audit_logs.occurred_at": "range",
+    "notifications.created_at": "range",
+    "notifications.sent_at": "range",
+    "page_versions.edited_at": "range",
+    "space_config_history.changed_at": "range",
+}
+
+INDEX_KINDS = ("unique", "non_unique", "range")
+
+
+def _parse_index_spec(spec: Dict[str, str]) -> Dict[str, Dict[str, str]]:
+    """Turn an index spec into {table: {field: kind}}."""
+    parsed: Dict[str, Dict[str, str]] = {}
+    for key, kind in spec.items():
+        table_name, field = key.split(".", 1)
+        if kind not in INDEX_KINDS:
+            raise ValueError(f"Unknown index kind '{kind}' for {key}")
+        parsed.setdefault(table_name, {})[field] = kind
+    return parsed
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_epoch(value: Any) -> Optional[int]:
+    """Convert an ISO-8601 timestamp (or date) to epoch microseconds; None if it is not one.
+
+    Naive timestamps are taken as UTC, which is how get_timestamp writes them.
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return (parsed - _EPOCH) // timedelta(microseconds=1)
+
+
+def _is_hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _numeric_id(record_id: str) -> Optional[int]:
+    """Get the numeric part of a record ID (the last run of digits for non-numeric keys)."""
+    try:
+        return int(record_id)
+    except ValueError:
+        numbers = re.findall(r'\d+', record_id)
+        return int(numbers[-1]) if numbers else None
+
+
+# Tables whose snapshots store a text field as per-group delta chains: each
+# group's records (ordered by "order") keep the full "field" every
+# "keyframe_interval" records and a delta against the previous record in
+# between, under "<field>_delta". Records are always full in memory.
+DELTA_SPEC: Dict[str, Dict[str, Any]] = {
+    "page_versions": {
+        "group": "page_id",
+        "order": "version_number",
+        "field": "content_snapshot",
+        "keyframe_interval": 10,
+    },
+}
+
+
+# Longest single-line text diffed character by character; longer ones are
+# diffed by line, since character diffs grow quadratically.
+_CHAR_DELTA_LIMIT = 4096
+
+
+def _text_delta(base: str, text: str) -> Dict[str, Any]:
+    """Diff two texts by line (or by character for short single-line texts).
+
+    ops is a list of: a positive int (copy that many units from the base),
+    a negative int (skip that many base units) or a string (insert it).
+    """
+    single_line = "\n" not in base and "\n" not in text
+    unit = "char" if single_line and max(len(base), len(text)) <= _CHAR_DELTA_LIMIT else "line"
+    a = base.splitlines(keepends=True) if unit == "line" else base
+    b = text.splitlines(keepends=True) if unit == "line" else text
+    ops: List[Any] = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append("".join(b[j1:j2]))
+    return {"unit": unit, "ops": ops}
+
+
+def _apply_text_delta(base: str, delta: Dict[str, Any]) -> str:
+    """Rebuild a text from its base and a _text_delta result."""
+    units = base.splitlines(keepends=True) if delta["unit"] == "line" else base
+    pos = 0
+    out = []
+    for op in delta["ops"]:
+        if isinstance(op, str):
+            out.append(op)
+        elif op >= 0:
+            out.append("".join(units[pos:pos + op]))
+            pos += op
+        else:
+            pos -= op
+    return "".join(out)
+
+
+def decode_delta_table(table_name: str, stored: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a snapshot as stored on disk into full records (in place), resolving delta chains."""
+    spec = DELTA_SPEC.get(table_name)
+    if spec is None:
+        return stored
+    delta_field = spec["field"] + "_delta"
+    pending = [record_id for record_id, record in stored.items() if delta_field in record]
+    for record_id in pending:
+        chain = []
+        while delta_field in stored[record_id]:
+            chain.append(record_id)
+            record_id = stored[record_id][delta_field]["base"]
+            if record_id not in stored:
+                raise ValueError(f"Delta base {record_id} missing from {table_name}")
+        text = stored[record_id][spec["field"]]
+        for link in reversed(chain):
+            text = _apply_text_delta(text, stored[link][delta_field])
+            stored[link] = _swap_field(stored[link], delta_field, spec["field"], text)
+    return stored
+
+
+def _copy_value(value: Any) -> Any:
+    """Copy a JSON value, including the lists and dicts nested in it."""
+    if isinstance(value, dict):
+        return {key: _copy_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_value(item) for item in value]
+    return value
+
+
+def _swap_field(record: Dict[str, Any], old_key: str, new_key: str, value: Any) -> Dict[str, Any]:
+    """Copy record with old_key replaced by new_key = value at the same position."""
+    return {(new_key if key == old_key else key): (value if key == old_key else item)
+            for key, item in record.items()}
+
+
+# Files that make up a dataset directory next to blobs/ (see copy_dataset).
+DATASET_FILES: Tuple[str, ...] = ("*.json", "*.log.jsonl", "*.records", "*.offsets", ".codec", ".id_sequences")
+
+
+# Record fields whose text lives in the content-addressed blob store. Writes
+# through DataManager replace "<field>" with "<field>_hash" (the sha256 of
+# the text); the record readers put the text back through resolve_blobs.
+BLOB_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "pages": ("content",),
+    "templates": ("content",),
+}
+
+
+def _compare(op: Callable[[Any, Any], bool]) -> Callable[[Any, Any], bool]:
+    """Wrap an ordering operator so that nulls and mismatched types never match."""
+    def check(value: Any, operand: Any) -> bool:
+        if value is None or operand is None:
+            return False
+        try:
+            return op(value, operand)
+        except TypeError:
+            return False
+    return check
+
+
+# Operators accepted in DataManager.query where clauses, e.g.
+# {"occurred_at": {"gte": "2023-07-01", "lt": "2023-08-01"}, "status": {"in": [...]}}.
+QUERY_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": lambda value, operand: value == operand,
+    "ne": lambda value, operand: value != operand,
+    "lt": _compare(lambda value, operand: value < operand),
+    "lte": _compare(lambda value, operand: value <= operand),
+    "gt": _compare(lambda value, operand: value > operand),
+    "gte": _compare(lambda value, operand: value >= operand),
+    "in": lambda value, operand: value in operand,
+    "not_in": lambda value, operand: value not in operand,
+}
+
+
+def _compile_where(where: Optional[Dict[str, Any]]) -> List[Tuple[str, str, Any]]:
+    """Turn a where clause into (field, operator, operand) conditions.
+
+    A plain value means equality; a dict whose keys are all operator names
+    holds one or more comparisons on that field.
+    """
+    conditions = []
+    for field, condition in (where or {}).items():
+        if isinstance(condition, dict) and condition and all(op in QUERY_OPERATORS for op in condition):
+            for op, operand in condition.items():
+                if op in ("in", "not_in") and not isinstance(operand, (list, tuple, set)):
+                    raise ValueError(f"Operator '{op}' on {field} needs a list")
+                conditions.append((field, op, operand))
+        elif isinstance(condition, dict) and any(key in QUERY_OPERATORS for key in condition):
+            unknown = [key for key in condition if key not in QUERY_OPERATORS]
+            raise ValueError(f"Unknown query operator(s) {', '.join(unknown)} on {field}")
+        else:
+            conditions.append((field, "eq", condition))
+    return conditions
+
+
+def _order_value(value: Any) -> Tuple[int, Any]:
+    """Sort key that orders nulls first, then numbers, strings and everything else."""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (bool, int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, json.dumps(value, sort_keys=True, default=str))
+
+
+def _id_order(record_id: str) -> Tuple[int, str]:
+    """Sort key for record IDs: numeric part first, then the raw key."""
+    numeric = _numeric_id(record_id)
+    return (numeric if numeric is not None else -1, record_id)
+
+
+def _encode_cursor(order: List[Tuple[str, bool]], values: List[Any], record_id: str) -> str:
+    payload = {"order": [[field, desc] for field, desc in order], "values": values, "id": record_id}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str, order: List[Tuple[str, bool]]) -> Tuple[List[Any], str]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        values, record_id = payload["values"], payload["id"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if [tuple(item) for item in payload.get("order", [])] != [(f, d) for f, d in order]:
+        raise ValueError("Cursor does not match the query ordering")
+    return values, record_id
+
+
+class HashIndex:
+    """Hash index over one field of a table: value -> ids of the records holding it.
+
+    Records whose field value is unhashable (lists, dicts) are left out;
+    they can never equal a hashable lookup value anyway.
+    """
+
+    def __init__(self, field: str, unique: bool = False):
+        self.field = field
+        self.unique = unique
+        self.buckets: Dict[Any, Dict[str, None]] = {}
+
+    def build(self, data: Dict[str, Any]) -> None:
+        self.buckets = {}
+        for record_id, record in data.items():
+            self.add(record_id, record)
+
+    def add(self, record_id: str, record: Dict[str, Any]) -> None:
+        value = record.get(self.field)
+        if _is_hashable(value):
+            self.buckets.setdefault(value, {})[record_id] = None
+
+    def remove(self, record_id: str, record: Dict[str, Any]) -> None:
+        value = record.get(self.field)
+        if not _is_hashable(value):
+            return
+        bucket = self.buckets.get(value)
+        if bucket is not None:
+            bucket.pop(record_id, None)
+            if not bucket:
+                del self.buckets[value]
+
+    def lookup(self, value: Any) -> List[str]:
+        bucket = self.buckets.get(value)
+        return list(bucket) if bucket else []
+
+
+class SortedIndex:
+    """Ordered index over a timestamp field: parallel sorted lists of epoch
+    microseconds and record ids, searched with bisect.
+
+    Records whose field is missing or not a parseable timestamp are left out.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.keys: List[int] = []
+        self.ids: List[str] = []
+
+    def build(self, data: Dict[str, Any]) -> None:
+        entries = sorted(
+            (key, record_id) for record_id, record in data.items()
+            if (key := to_epoch(record.get(self.field))) is not None
+        )
+        self.keys = [key for key, _ in entries]
+        self.ids = [record_id for _, record_id in entries]
+
+    def add(self, record_id: str, record: Dict[str, Any]) -> None:
+        key = to_epoch(record.get(self.field))
+        if key is None:
+            return
+        pos = bisect.bisect_right(self.keys, key)
+        self.keys.insert(pos, key)
+        self.ids.insert(pos, record_id)
+
+    def remove(self, record_id: str, record: Dict[str, Any]) -> None:
+        key = to_epoch(record.get(self.field))
+        if key is None:
+            return
+        pos = bisect.bisect_left(self.keys, key)
+        while pos < len(self.keys) and self.keys[pos] == key:
+            if self.ids[pos] == record_id:
+                del self.keys[pos]
+                del self.ids[pos]
+                return
+            pos += 1
+
+    def range(self, low: Optional[int] = None, high: Optional[int] = None,
+              low_inclusive: bool = True, high_inclusive: bool = True) -> List[str]:
+        """Get the ids with low <(=) key <(=) high, in key order; None leaves a side open."""
+        start = 0
+        if low is not None:
+            start = (bisect.bisect_left if low_inclusive else bisect.bisect_right)(self.keys, low)
+        end = len(self.keys)
+        if high is not None:
+            end = (bisect.bisect_right if high_inclusive else bisect.bisect_left)(self.keys, high)
+        return self.ids[start:end]
+
+
+class DerivedIndex(ABC):
+    """In-memory structure computed from one or more tables (e.g. a search
+    index or a page tree), obtained through ``DataManager.get_derived``.
+
+    DataManager builds it from the source tables on first use and then feeds
+    it every create/update/delete on those tables, so it is only rebuilt when
+    a source table is replaced wholesale or reloaded from disk.
+    """
+
+    # Source tables; mutations on any of them are passed to apply().
+    tables: Tuple[str, ...] = ()
+
+    @abstractmethod
+    def build(self, tables: Dict[str, Dict[str, Any]]) -> None:
+        """Populate the structure from the full source tables."""
+
+    @abstractmethod
+    def apply(self, table_name: str, record_id: str, old: Optional[Dict[str, Any]],
+              new: Optional[Dict[str, Any]], tables: Dict[str, Dict[str, Any]]) -> None:
+        """Account for one record change: old is None for creates, new is None for deletes.
+
+        tables holds the source tables with the change (and possibly later
+        changes from the same transaction) already applied.
+        """
+
+
+class RecordFile:
+    """Read-only view of a compact record file (one JSON record per line),
+    located through a record id -> (offset, length) map and decoded on
+    demand from an mmap, so a point read costs the same at any table size.
+    """
+
+    def __init__(self, path: Path, offsets: Dict[str, List[int]]):
+        self.offsets = offsets
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    @staticmethod
+    def write(path: Path, data: Dict[str, Any]) -> Dict[str, List[int]]:
+        """Write data as a record file and return its offset map."""
+        encode = _TABLE_CODECS[resolve_table_codec("fast")][0]
+        offsets: Dict[str, List[int]] = {}
+        position = 0
+        with open(path, 'wb') as f:
+            for record_id, record in data.items():
+                line = encode(record)
+                f.write(line + b"\n")
+                offsets[record_id] = [position, len(line)]
+                position += len(line) + 1
+        return offsets
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self.offsets
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        span = self.offsets.get(record_id)
+        if span is None or self._map is None:
+            return None
+        start, length = span
+        return _json_loads(self._map[start:start + length])
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+
+class BlobRefCounts(DerivedIndex):
+    """Reference count of every blob hash held by a BLOB_FIELDS record."""
+
+    tables = tuple(BLOB_FIELDS)
+
+    def __init__(self) -> None:
+        self.counts: Dict[str, int] = {}
+
+    def _hashes(self, table_name: str, record: Optional[Dict[str, Any]]) -> List[str]:
+        if record is None:
+            return []
+        values = (record.get(field + "_hash") for field in BLOB_FIELDS[table_name])
+        return [value for value in values if isinstance(value, str)]
+
+    def build(self, tables: Dict[str, Dict[str, Any]]) -> None:
+        for table_name, data in tables.items():
+            for record in data.values():
+                for digest in self._hashes(table_name, record):
+                    self.counts[digest] = self.counts.get(digest, 0) + 1
+
+    def apply(self, table_name: str, record_id: str, old: Optional[Dict[str, Any]],
+              new: Optional[Dict[str, Any]], tables: Dict[str, Dict[str, Any]]) -> None:
+        for digest in self._hashes(table_name, old):
+            remaining = self.counts.get(digest, 0) - 1
+            if remaining > 0:
+                self.counts[digest] = remaining
+            else:
+                self.counts.pop(digest, None)
+        for digest in self._hashes(table_name, new):
+            self.counts[digest] = self.counts.get(digest, 0) + 1
+
+
+class StorageBackend(ABC):
+    """Storage that DataManager delegates to when ``DataManager.BACKEND`` is set.
+
+    Records are plain dicts keyed by string IDs, and the methods mirror the
+    DataManager classmethods of the same name.
+    """
+
+    @abstractmethod
+    def table_names(self) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def load_table(self, table_name: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_table(self, table_name: str, data: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_record(self, table_name: str, record_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def match_field(self, table_name: str, field: str, value: Any,
+                    limit: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Get (id, record) pairs with record.get(field) == value, in insertion order."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def filter_records(self, table_name: str, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_record(self, table_name: str, record_id: str, record_data: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_record(self, table_name: str, record_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def replace_record(self, table_name: str, record_id: str, record: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_record(self, table_name: str, record_id: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def reserve_ids(self, table_name: str, count: int) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def reset_sequences(self, table_name: Optional[str] = None) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def transaction(self) -> Any:
+        """Return a context manager that commits on exit and rolls back on error."""
+        raise NotImplementedError
+
+
+class SQLiteBackend(StorageBackend):
+    """SQLite storage: one SQL table per data table, one row per record.
+
+    Each row holds the record ID and the record as JSON. Fields declared in
+    INDEX_SPEC become generated columns over the JSON with a (unique) SQL
+    index, so field lookups do not scan. The database runs in WAL mode and
+    uses one connection per thread.
+    """
+
+    def __init__(self, db_path: Any):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+        self._known_tables: Set[str] = set()
+        self._schema_lock = threading.Lock()
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS _sequences (table_name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    @staticmethod
+    def _quote(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    @classmethod
+    def _sql_table(cls, table_name: str) -> str:
+        return cls._quote("t_" + table_name)
+
+    @staticmethod
+    def _json_path(field: str) -> str:
+        return '$."' + field.replace('"', '\\"') + '"'
+
+    @staticmethod
+    def _column(field: str) -> str:
+        return "f_" + re.sub(r"\W", "_", field)
+
+    def table_names(self) -> List[str]:
+        rows = self._conn().execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 't\\_%' ESCAPE '\\' ORDER BY name")
+        return [name[2:] for (name,) in rows]
+
+    def _has_table(self, table_name: str) -> bool:
+        if table_name in self._known_tables:
+            return True
+        row = self._conn().execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", ("t_" + table_name,)).fetchone()
+        if row:
+            self._known_tables.add(table_name)
+        return row is not None
+
+    def _ensure_table(self, table_name: str) -> None:
+        if self._has_table(table_name):
+            return
+        with self._schema_lock:
+            conn = self._conn()
+            table = self._sql_table(table_name)
+            columns = ["id TEXT PRIMARY KEY", "data TEXT NOT NULL"]
+            fields = DataManager._indexed_fields(table_name)
+            for field in fields:
+                columns.append(
+                    f"{self._column(field)} GENERATED ALWAYS AS (json_extract(data, '{self._json_path(field)}')) VIRTUAL")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(columns)})")
+            for field, kind in fields.items():
+                index = self._quote(f"ix_{table_name}_{self._column(field)}")
+                statement = "UNIQUE INDEX" if kind == "unique" else "INDEX"
+                conn.execute(f"CREATE {statement} IF NOT EXISTS {index} ON {table} ({self._column(field)})")
+            self._known_tables.add(table_name)
+
+    def _field_expr(self, table_name: str, field: str) -> str:
+        if field in DataManager._indexed_fields(table_name):
+            return self._column(field)
+        return f"json_extract(data, '{self._json_path(field)}')"
+
+    def _write(self, sql: str, params: Tuple[Any, ...]) -> sqlite3.Cursor:
+        try:
+            return self._conn().execute(sql, params)
+        except sqlite3.IntegrityError as e:
+            raise ValueError(str(e)) from e
+
+    def load_table(self, table_name: str) -> Dict[str, Any]:
+        if not self._has_table(table_name):
+            return {}
+        rows = self._conn().execute(f"SELECT id, data FROM {self._sql_table(table_name)} ORDER BY rowid")
+        return {record_id: json.loads(data) for record_id, data in rows}
+
+    def save_table(self, table_name: str, data: Dict[str, Any]) -> None:
+        self._ensure_table(table_name)
+        with self.transaction():
+            conn = self._conn()
+            conn.execute(f"DELETE FROM {self._sql_table(table_name)}")
+            for record_id, record in data.items():
+                self._write(f"INSERT INTO {self._sql_table(table_name)} (id, data) VALUES (?, ?)",
+                            (record_id, json.dumps(record, ensure_ascii=False)))
+            conn.execute("DELETE FROM _sequences WHERE table_name = ?", (table_name,))
+
+    def get_record(self, table_name: str, record_id: str) -> Optional[Dict[str, Any]]:
+        if not self._has_table(table_name):
+            return None
+        row = self._conn().execute(
+            f"SELECT data FROM {self._sql_table(table_name)} WHERE id = ?", (record_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def match_field(self, table_name: str, field: str, value: Any,
+                    limit: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        if not self._has_table(table_name):
+            return []
+        if isinstance(value, (list, dict)):
+            # json_extract returns JSON text for containers; compare in Python.
+            matches = [(rid, rec) for rid, rec in self.load_table(table_name).items() if rec.get(field) == value]
+            return matches[:limit] if limit is not None else matches
+        sql = f"SELECT id, data FROM {self._sql_table(table_name)} WHERE {self._field_expr(table_name, field)} IS ?"
+        if isinstance(value, str):
+            sql += f" AND json_type(data, '{self._json_path(field)}') = 'text'"
+        sql += " ORDER BY rowid"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        rows = self._conn().execute(sql, (value,))
+        return [(record_id, json.loads(data)) for record_id, data in rows]
+
+    def filter_records(self, table_name: str, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if not self._has_table(table_name):
+            return []
+        clauses = []
+        params: List[Any] = []
+        for field, value in filters.items():
+            if isinstance(value, (list, dict)):
+                continue
+            clauses.append(f"{self._field_expr(table_name, field)} IS ?")
+            params.append(value)
+            clauses.append(f"json_type(data, '{self._json_path(field)}') IS NOT NULL")
+        sql = f"SELECT data FROM {self._sql_table(table_name)}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY rowid"
+        results = []
+        for (data,) in self._conn().execute(sql, params):
+            record = json.loads(data)
+            if all(field in record and record[field] == value for field, value in filters.items()):
+                results.append(record)
+        return results
+
+    def create_record(self, table_name: str, record_id: str, record_data: Dict[str, Any]) -> None:
+        self._ensure_table(table_name)
+        if self.get_record(table_name, record_id) is not None:
+            raise ValueError(f"Record with ID {record_id} already exists in {table_name}")
+        self._write(f"INSERT INTO {self._sql_table(table_name)} (id, data) VALUES (?, ?)",
+                    (record_id, json.dumps(record_data, ensure_ascii=False)))
+        numeric = _numeric_id(record_id)
+        if numeric is not None:
+            self._conn().execute(
+                "UPDATE _sequences SET value = ? WHERE table_name = ? AND value < ?", (numeric, table_name, numeric))
+
+    def update_record(self, table_name: str, record_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
+        with self.transaction():
+            record = self.get_record(table_name, record_id)
+            if record is None:
+                raise ValueError(f"Record with ID {record_id} not found in {table_name}")
+            record.update(updates)
+            self._write(f"UPDATE {self._sql_table(table_name)} SET data = ? WHERE id = ?",
+                        (json.dumps(record, ensure_ascii=False), record_id))
+        return record
+
+    def replace_record(self, table_name: str, record_id: str, record: Dict[str, Any]) -> None:
+        if self.get_record(table_name, record_id) is None:
+            raise ValueError(f"Record with ID {record_id} not found in {table_name}")
+        self._write(f"UPDATE {self._sql_table(table_name)} SET data = ? WHERE id = ?",
+                    (json.dumps(record, ensure_ascii=False), record_id))
+
+    def delete_record(self, table_name: str, record_id: str) -> None:
+        cursor = None
+        if self._has_table(table_name):
+            cursor = self._conn().execute(f"DELETE FROM {self._sql_table(table_name)} WHERE id = ?", (record_id,))
+        if cursor is None or cursor.rowcount == 0:
+            raise ValueError(f"Record with ID {record_id} not found in {table_name}")
+
+    def reserve_ids(self, table_name: str, count: int) -> List[str]:
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        with self.transaction():
+            conn = self._conn()
+            row = conn.execute("SELECT value FROM _sequences WHERE table_name = ?", (table_name,)).fetchone()
+            if row is None:
+                current = 0
+                if self._has_table(table_name):
+                    rows = conn.execute(f"SELECT id FROM {self._sql_table(table_name)}")
+                    current = max((n for n in (_numeric_id(rid) for (rid,) in rows) if n is not None), default=0)
+            else:
+                current = row[0]
+            conn.execute("INSERT OR REPLACE INTO _sequences (table_name, value) VALUES (?, ?)",
+                         (table_name, current + count))
+        return [str(i) for i in range(current + 1, current + count + 1)]
+
+    def reset_sequences(self, table_name: Optional[str] = None) -> None:
+        if table_name is None:
+            self._conn().execute("DELETE FROM _sequences")
+        else:
+            self._conn().execute("DELETE FROM _sequences WHERE table_name = ?", (table_name,))
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        conn = self._conn()
+        if self._local.depth > 0:
+            self._local.depth += 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = 1
+        try:
+            yield
+        except BaseException:
+            self._local.depth = 0
+            conn.execute("ROLLBACK")
+            raise
+        self._local.depth = 0
+        conn.execute("COMMIT")
+
+    def import_json_dir(self, source_dir: Any) -> List[str]:
+        """Load every <table>.json file in source_dir, replacing existing tables."""
+        imported = []
+        for file_path in sorted(Path(source_dir).glob("*.json")):
+            with open(file_path, 'rb') as f:
+                data = _json_loads(f.read())
+            if not isinstance(data, dict):
+                continue
+            decode_delta_table(file_path.stem, data)
+            self.save_table(file_path.stem, data)
+            imported.append(file_path.stem)
+        return imported
+
+    def export_json_dir(self, target_dir: Any, codec: str = "pretty") -> List[str]:
+        """Write every table to <table>.json in target_dir, in the generated_data layout.
+
+        BLOB_FIELDS hashes are swapped back for their text from DataManager's
+        blob store (under DataManager.DATA_DIR), so the files stand on their own.
+        """
+        encode = _TABLE_CODECS[resolve_table_codec(codec)][0]
+        target = Path(target_dir)
+        target.mkdir(parents=True, exist_ok=True)
+        exported = []
+        for table_name in self.table_names():
+            data = self.load_table(table_name)
+            if table_name in BLOB_FIELDS:
+                data = {record_id: DataManager._restore_blob_fields(table_name, record)
+                        for record_id, record in data.items()}
+            with open(target / f"{table_name}.json", 'wb') as f:
+                f.write(encode(data))
+            exported.append(table_name)
+        return exported
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
 
 class DataManager:
     """Manages data persistence for the Wiki Confluence system using JSON files."""
 
     DATA_DIR = Path(__file__).parent / "generated_data"
 
+    # Page size used by getter tools when the caller does not pass one.
+    DEFAULT_PAGE_SIZE = 100
+
+    # Alternative storage for every table (e.g. SQLiteBackend). When None,
+    # tables are the JSON files in DATA_DIR.
+    BACKEND: Optional[StorageBackend] = None
+
+    # Tables persisted through the append-only mutation log, the codec new
+    # logs are written with, and the number of log entries after which a
+    # background compaction folds the log into the snapshot.
+    LOG_TABLES: Set[str] = set()
+    LOG_CODEC = "json"
+    LOG_COMPACT_THRESHOLD = 1000
+
+    # Tables whose point reads (get_record) go through an mmap'd record file
+    # and on-disk offset index while the table is not otherwise loaded.
+    LAZY_TABLES: Set[str] = {"page_versions"}
+
+    # Codec table snapshots are written with: "pretty", "compact", "orjson"
+    # (when installed) or "fast" for the quickest compact one available. None
+    # uses the dataset's own choice, recorded in DATA_DIR/.codec by set_codec,
+    # and falls back to "pretty".
+    JSON_CODEC: Optional[str] = None
+    _dataset_codec: Tuple[Optional[Path], Optional[str]] = (None, None)
+
+    # Process-level table cache: table name -> (file signature, parsed table).
+    # Entries are revalidated against os.stat on every read, so external
+    # writers are picked up without re-parsing files that did not change.
+    _cache: Dict[str, Tuple[Any, Dict[str, Any]]] = {}
+    _cache_hits = 0
+    _cache_misses = 0
+    # Guards the caches and file writes. create/update/delete_record also
+    # hold it while changing a cached table in place, so compaction never
+    # serializes a table halfway through a write.
+    _lock = threading.RLock()
+
+    # Entries currently in each table's mutation log and the tables with a
+    # compaction already scheduled.
+    _log_entries: Dict[str, int] = {}
+    _compacting: Set[str] = set()
+
+    # Per-thread unit of work opened by transaction(); None outside one.
+    _tx_state = threading.local()
+
+    # Secondary indexes for the shared cached tables: table name -> holder
+    # with the table object they were built from, record positions (to
+    # return matches in table order) and one HashIndex per indexed field.
+    _indexes: Dict[str, Dict[str, Any]] = {}
+    _parsed_spec: Tuple[Optional[Dict[str, str]], Dict[str, Dict[str, str]]] = (None, {})
+
+    # Per-table ID sequences (last allocated numeric ID), persisted in a
+    # sidecar file in DATA_DIR. The sidecar is re-read when its signature
+    # changes, and a table's sequence is raised to the table's max key
+    # whenever the table's files changed since it was last checked.
+    _sequences: Dict[str, int] = {}
+    _sequences_path: Optional[Path] = None
+    _sequences_signature: Optional[Tuple[int, int, int]] = None
+    # table name -> table signature its sequence was last checked against.
+    _sequence_checked: Dict[str, Any] = {}
+
+    # Derived indexes over the shared cached tables: DerivedIndex subclass ->
+    # holder with the instance and the source tables it reflects.
+    _derived: Dict[type, Dict[str, Any]] = {}
+
+    # Open record files for LAZY_TABLES: table name -> (snapshot signature, RecordFile).
+    _record_files: Dict[str, Tuple[Tuple[int, int], RecordFile]] = {}
+
+    # Delta encoding (see DELTA_SPEC): the deltas computed at the last write
+    # of each table, reused while a record and its base are unchanged, and an
+    # LRU of texts rebuilt for lazy point reads: (table, id) -> (RecordFile, text).
+    DELTA_CACHE_SIZE = 1024
+    _delta_memo: Dict[str, Dict[str, Tuple[Any, Any, Any, Any]]] = {}
+    _delta_cache: "OrderedDict[Tuple[str, str], Tuple[RecordFile, str]]" = OrderedDict()
+
+    # Blob store (see BLOB_FIELDS): an LRU of blob texts by hash, and how old
+    # an unreferenced blob must be (seconds) before gc_blobs removes it, so
+    # blobs written by an in-flight transaction are not collected.
+    BLOB_CACHE_SIZE = 256
+    BLOB_GC_GRACE = 3600
+    _blob_cache: "OrderedDict[str, str]" = OrderedDict()
+
+    # tables_digest memo: (DATA_DIR and the stat signatures of its dataset files, digest).
+    _tables_digest: Optional[Tuple[Any, str]] = None
+
     @classmethod
     def _get_file_path(cls, table_name: str) -> Path:
         """Get the file path for a given table name."""
         return cls.DATA_DIR / f"{table_name}.json"
 
     @classmethod
-    def load_data(cls, table_name: str) -> Dict[str, Any]:
-        """Load data from a JSON file."""
-        file_path = cls._get_file_path(table_name)
-        if not file_path.exists():
-            return {}
+    def _get_sequences_path(cls) -> Path:
+        """Get the path of the ID sequence sidecar (not a .json file, so it is never loaded as a table)."""
+        return cls.DATA_DIR / ".id_sequences"
+
+    @classmethod
+    def _get_log_path(cls, table_name: str) -> Path:
+        """Get the mutation log path for a given table name."""
+        return cls.DATA_DIR / f"{table_name}.log.jsonl"
+
+    @classmethod
+    def _get_codec_path(cls) -> Path:
+        """Get the path of the dataset's codec setting (not a .json file, so it is never loaded as a table)."""
+        return cls.DATA_DIR / ".codec"
+
+    @classmethod
+    def _get_blob_path(cls, digest: str) -> Path:
+        """Get the blob store path for a sha256 hex digest."""
+        return cls.DATA_DIR / "blobs" / digest[:2] / digest
+
+    @classmethod
+    def _get_records_path(cls, table_name: str) -> Path:
+        """Get the compact record file path for a lazily read table."""
+        return cls.DATA_DIR / f"{table_name}.records"
 
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    @classmethod
+    def _get_offsets_path(cls, table_name: str) -> Path:
+        """Get the offset index path for a lazily read table."""
+        return cls.DATA_DIR / f"{table_name}.offsets"
+
+    @staticmethod
+    def _stat_signature(file_path: Path) -> Optional[Tuple[int, int]]:
+        """Return the (mtime_ns, size) signature of a file, or None if missing."""
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    @classmethod
+    def _table_signature(cls, table_name: str) -> Optional[Tuple[Any, Any]]:
+        """Return the combined snapshot/log signature of a table, or None if it has no files."""
+        snapshot = cls._stat_signature(cls._get_file_path(table_name))
+        log = cls._stat_signature(cls._get_log_path(table_name))
+        if snapshot is None and log is None:
+            return None
+        return (snapshot, log)
+
+    @classmethod
+    def _current_transaction(cls) -> Optional[Dict[str, Any]]:
+        """Get the transaction open on this thread, if any."""
+        return getattr(cls._tx_state, "tx", None)
+
+    @classmethod
+    def _load_table(cls, table_name: str) -> Dict[str, Any]:
+        """Return the working table for reads and in-place mutation.
+
+        Inside a transaction this is the transaction's private copy of the
+        table; otherwise it is the shared cached table. Either way, callers
+        that mutate it must hand it back through save_data or _commit_mutation.
+        """
+        tx = cls._current_transaction()
+        if tx is not None:
+            if table_name not in tx["tables"]:
+                base = cls._load_cached_table(table_name)
+                tx["bases"][table_name] = base
+                tx["tables"][table_name] = {
+                    record_id: dict(record) for record_id, record in base.items()
+                }
+            return tx["tables"][table_name]
+        return cls._load_cached_table(table_name)
+
+    @classmethod
+    def _load_cached_table(cls, table_name: str) -> Dict[str, Any]:
+        """Return the shared cached table, parsing the files only when they changed."""
+        with cls._lock:
+            signature = cls._table_signature(table_name)
+            if signature is None:
+                cls._cache.pop(table_name, None)
+                cls._log_entries.pop(table_name, None)
+                return {}
+
+            cached = cls._cache.get(table_name)
+            if cached is not None and cached[0] == signature:
+                cls._cache_hits += 1
+                return cached[1]
+
+            cls._cache_misses += 1
+            data: Dict[str, Any] = {}
+            if signature[0] is not None:
+                data = decode_delta_table(table_name, cls._read_snapshot(table_name))
+            cls._log_entries[table_name] = 0
+            if signature[1] is not None:
+                cls._log_entries[table_name] = cls._replay_log(table_name, data)
+            cls._cache[table_name] = (signature, data)
+            return data
+
+    @classmethod
+    def _read_snapshot(cls, table_name: str) -> Dict[str, Any]:
+        """Parse a table's JSON snapshot with the dataset's codec, as stored (deltas not resolved)."""
+        decode = _TABLE_CODECS[cls.table_codec()][1]
+        with open(cls._get_file_path(table_name), 'rb') as f:
+            return decode(f.read())
+
+    @classmethod
+    def table_codec(cls) -> str:
+        """Get the resolved name of the codec this dataset's snapshots are written with."""
+        name = cls.JSON_CODEC
+        if name is None:
+            with cls._lock:
+                codec_path = cls._get_codec_path()
+                if cls._dataset_codec[0] != codec_path:
+                    try:
+                        chosen = codec_path.read_text(encoding='utf-8').strip() or None
+                    except FileNotFoundError:
+                        chosen = None
+                    cls._dataset_codec = (codec_path, chosen)
+                name = cls._dataset_codec[1] or "pretty"
+        return resolve_table_codec(name)
+
+    @classmethod
+    def set_codec(cls, codec: str) -> List[str]:
+        """Record codec as this dataset's choice and rewrite its tables with it.
+
+        Returns the rewritten table names. A JSON_CODEC set on the class still
+        takes precedence over the recorded choice.
+        """
+        resolve_table_codec(codec)
+        with cls._lock:
+            codec_path = cls._get_codec_path()
+            codec_path.parent.mkdir(parents=True, exist_ok=True)
+            codec_path.write_text(codec + "\n", encoding='utf-8')
+            cls._dataset_codec = (codec_path, codec)
+            tables = cls.table_names()
+            for table_name in tables:
+                cls._write_table(table_name, cls._load_cached_table(table_name))
+            return tables
+
+    @classmethod
+    def table_names(cls) -> List[str]:
+        """List the tables in the dataset."""
+        if cls.BACKEND is not None:
+            return cls.BACKEND.table_names()
+        names = {path.name[:-len(".json")] for path in cls.DATA_DIR.glob("*.json")}
+        names.update(path.name[:-len(".log.jsonl")] for path in cls.DATA_DIR.glob("*.log.jsonl"))
+        return sorted(names)
+
+    @classmethod
+    def export_tables(cls, target_dir: Any, codec: str = "pretty") -> List[str]:
+        """Write every table, with pending log entries applied, to <table>.json in target_dir.
+
+        BLOB_FIELDS text is written inline in place of its hash, so the copy
+        does not need the blob store.
+        """
+        encode = _TABLE_CODECS[resolve_table_codec(codec)][0]
+        target = Path(target_dir)
+        target.mkdir(parents=True, exist_ok=True)
+        tables = cls.table_names()
+        for table_name in tables:
+            data = cls.load_data(table_name)
+            if table_name in BLOB_FIELDS:
+                data = {record_id: cls._restore_blob_fields(table_name, record) for record_id, record in data.items()}
+            with open(target / f"{table_name}.json", 'wb') as f:
+                f.write(encode(data))
+        return tables
+
+    @classmethod
+    def copy_dataset(cls, source_dir: Any, target_dir: Any) -> None:
+        """Make target_dir hold the same tables as source_dir, file for file.
+
+        Snapshots, logs, record files, the codec and the ID sequence sidecar
+        (DATASET_FILES) are copied, and those source_dir lacks are removed
+        from target_dir. Blobs are content-addressed, so missing ones are
+        copied and none are removed. Copying into DATA_DIR also drops the
+        process state built from the old files (see reset_process_state).
+        """
+        source, target = Path(source_dir), Path(target_dir)
+        target.mkdir(parents=True, exist_ok=True)
+        with cls._lock:
+            for pattern in DATASET_FILES:
+                for path in target.glob(pattern):
+                    if not (source / path.name).exists():
+                        path.unlink()
+            for pattern in DATASET_FILES:
+                for path in source.glob(pattern):
+                    tmp_path = target / (path.name + ".tmp")
+                    shutil.copyfile(path, tmp_path)
+                    os.replace(tmp_path, target / path.name)
+            for blob_path in source.glob("blobs/*/*"):
+                copy_path = target / "blobs" / blob_path.parent.name / blob_path.name
+                if not blob_path.name.endswith(".tmp") and not copy_path.exists():
+                    copy_path.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(blob_path, copy_path)
+            if target.resolve() == Path(cls.DATA_DIR).resolve():
+                cls.reset_process_state()
+
+    @classmethod
+    def tables_digest(cls) -> str:
+        """Get a sha256 over the dataset, to key results computed from its tables.
+
+        Covers the DATASET_FILES in DATA_DIR (or, with a backend, every
+        table's records). Files are only re-read when one's stat signature
+        changes.
+        """
+        if cls.BACKEND is not None:
+            digest = hashlib.sha256()
+            for table_name in cls.BACKEND.table_names():
+                body = json.dumps(cls.BACKEND.load_table(table_name), sort_keys=True).encode("utf-8")
+                digest.update(table_name.encode("utf-8") + b"\0" + body + b"\0")
+            return digest.hexdigest()
+        data_dir = Path(cls.DATA_DIR)
+        with cls._lock:
+            paths = sorted({path for pattern in DATASET_FILES for path in data_dir.glob(pattern)})
+            signature = (data_dir, tuple((path.name, cls._stat_signature(path)) for path in paths))
+            if cls._tables_digest is None or cls._tables_digest[0] != signature:
+                digest = hashlib.sha256()
+                for path in paths:
+                    with open(path, 'rb') as f:
+                        digest.update(path.name.encode("utf-8") + b"\0" + f.read() + b"\0")
+                cls._tables_digest = (signature, digest.hexdigest())
+            return cls._tables_digest[1]
+
+    @classmethod
+    def _replay_log(cls, table_name: str, data: Dict[str, Any]) -> int:
+        """Apply a table's mutation log to data in place and return the entry count.
+
+        Entries are idempotent (put, patch, tombstone), so replaying a log over
+        a snapshot that already contains some of them is harmless. Torn lines
+        left by an interrupted append are skipped.
+        """
+        with open(cls._get_log_path(table_name), 'r', encoding='utf-8') as f:
+            lines = f.read().split("\n")
+
+        if not lines or not lines[0]:
+            return 0
+        header = json.loads(lines[0])
+        codec_name = header.get("codec", "json")
+        if codec_name not in _LOG_CODECS:
+            raise ValueError(f"Unknown log codec '{codec_name}' for {table_name}")
+        decode = _LOG_CODECS[codec_name][1]
+
+        count = 0
+        for line in lines[1:]:
+            if not line:
+                continue
+            try:
+                entry = decode(line)
+            except ValueError:
+                continue
+            cls._apply_log_entry(data, entry)
+            count += 1
+        return count
+
+    @staticmethod
+    def _apply_log_entry(data: Dict[str, Any], entry: Dict[str, Any]) -> None:
+        """Apply a single put/patch/del log entry to a table."""
+        op = entry.get("op")
+        record_id = entry.get("id")
+        if op == "put":
+            data[record_id] = entry["record"]
+        elif op == "patch":
+            if record_id in data:
+                data[record_id].update(entry["fields"])
+        elif op == "del":
+            data.pop(record_id, None)
+        else:
+            raise ValueError(f"Unknown log operation '{op}'")
+
+    @staticmethod
+    def _log_entry(op: str, record_id: str, value: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build a mutation log entry."""
+        if op == "put":
+            return {"op": "put", "id": record_id, "record": value}
+        if op == "patch":
+            return {"op": "patch", "id": record_id, "fields": value}
+        return {"op": "del", "id": record_id}
+
+    @classmethod
+    def use_backend(cls, backend: Optional[StorageBackend]) -> None:
+        """Route every DataManager call to backend, or back to the JSON files when None."""
+        with cls._lock:
+            cls.BACKEND = backend
+            cls._cache.clear()
+            cls._indexes.clear()
+            cls._derived.clear()
+
+    @classmethod
+    def load_data(cls, table_name: str) -> Dict[str, Any]:
+        """Load data from a JSON file, as stored (BLOB_FIELDS as hashes; see get_all_records)."""
+        if cls.BACKEND is not None:
+            return cls.BACKEND.load_table(table_name)
+        data = cls._load_table(table_name)
+        return {record_id: _copy_value(record) for record_id, record in data.items()}
 
     @classmethod
     def save_data(cls, table_name: str, data: Dict[str, Any]) -> None:
-        """Save data to a JSON file."""
+        """Save data to a JSON file, or buffer it until the open transaction commits."""
+        if cls.BACKEND is not None:
+            cls.BACKEND.save_table(table_name, data)
+            with cls._lock:
+                cls._drop_derived(cls._derived, table_name)
+            return
+        tx = cls._current_transaction()
+        if tx is not None:
+            tx["tables"][table_name] = data
+            tx["dirty"].add(table_name)
+            tx["rewrite"].add(table_name)
+            tx["indexes"].pop(table_name, None)
+            cls._drop_derived(tx["derived"], table_name)
+            with cls._lock:
+                cls._drop_sequence(table_name)
+            return
+        with cls._lock:
+            cls._indexes.pop(table_name, None)
+            cls._drop_derived(cls._derived, table_name)
+            cls._drop_sequence(table_name)
+        cls._write_table(table_name, data)
+
+    @classmethod
+    def _commit_mutation(cls, table_name: str, data: Dict[str, Any], op: str, record_id: str,
+                         value: Optional[Dict[str, Any]] = None) -> None:
+        """Persist a single put/patch/del already applied to data."""
+        tx = cls._current_transaction()
+        if tx is not None:
+            tx["tables"][table_name] = data
+            tx["dirty"].add(table_name)
+            tx["ops"].setdefault(table_name, []).append(cls._log_entry(op, record_id, value))
+            return
+        if table_name in cls.LOG_TABLES:
+            cls._append_log(table_name, data, [cls._log_entry(op, record_id, value)])
+        else:
+            cls._write_table(table_name, data)
+
+    @classmethod
+    def _write_table(cls, table_name: str, data: Dict[str, Any]) -> None:
+        """Write a table snapshot, drop its mutation log and refresh the cache entry."""
         file_path = cls._get_file_path(table_name)
         file_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = file_path.with_name(file_path.name + ".tmp")
+
+        with cls._lock:
+            try:
+                encode = _TABLE_CODECS[cls.table_codec()][0]
+                stored = cls._encode_deltas(table_name, data)
+                with open(tmp_path, 'wb') as f:
+                    f.write(encode(stored))
+                os.replace(tmp_path, file_path)
+                log_path = cls._get_log_path(table_name)
+                if log_path.exists():
+                    log_path.unlink()
+            except Exception:
+                cls._cache.pop(table_name, None)
+                raise
+            cls._log_entries[table_name] = 0
+            signature = cls._table_signature(table_name)
+            cls._follow_own_write(table_name, signature)
+            cls._cache[table_name] = (signature, data)
+            if table_name in cls.LAZY_TABLES:
+                # The record file now describes an older snapshot; the next
+                # point read that needs it rebuilds it (see _record_file).
+                opened = cls._record_files.pop(table_name, None)
+                if opened is not None:
+                    opened[1].close()
+
+    @classmethod
+    def _encode_deltas(cls, table_name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the on-disk form of a table: data with DELTA_SPEC fields replaced by deltas where that is smaller."""
+        spec = DELTA_SPEC.get(table_name)
+        if spec is None:
+            return data
+        field = spec["field"]
+        delta_field = field + "_delta"
+        groups: Dict[Any, List[str]] = {}
+        for record_id, record in data.items():
+            group = record.get(spec["group"])
+            groups.setdefault(group if _is_hashable(group) else repr(group), []).append(record_id)
+
+        memo = cls._delta_memo.get(table_name, {})
+        next_memo: Dict[str, Tuple[Any, Any, Any, Any]] = {}
+        stored = dict(data)
+        for record_ids in groups.values():
+            record_ids.sort(key=lambda rid: (_order_value(data[rid].get(spec["order"])), _id_order(rid)))
+            for pos, record_id in enumerate(record_ids):
+                if pos % spec["keyframe_interval"] == 0:
+                    continue
+                base_id = record_ids[pos - 1]
+                base_text = data[base_id].get(field)
+                text = data[record_id].get(field)
+                if not isinstance(base_text, str) or not isinstance(text, str):
+                    continue
+                cached = memo.get(record_id)
+                if cached is not None and cached[0] == base_id and cached[1] == base_text and cached[2] == text:
+                    delta = cached[3]
+                else:
+                    delta = _text_delta(base_text, text)
+                    if len(json.dumps(delta["ops"], ensure_ascii=False)) >= len(text):
+                        delta = None
+                next_memo[record_id] = (base_id, base_text, text, delta)
+                if delta is not None:
+                    stored[record_id] = _swap_field(data[record_id], field, delta_field, {"base": base_id, **delta})
+        cls._delta_memo[table_name] = next_memo
+        return stored
+
+    @classmethod
+    def _write_record_file(cls, table_name: str, data: Dict[str, Any], snapshot: Tuple[int, int]) -> RecordFile:
+        """Write a table's record file and offset index for the given snapshot signature and open it.
+
+        The offset index is replaced last and names the snapshot it describes,
+        so a crash in between leaves an index that is simply rebuilt.
+        """
+        with cls._lock:
+            opened = cls._record_files.pop(table_name, None)
+            if opened is not None:
+                opened[1].close()
+            records_path = cls._get_records_path(table_name)
+            offsets_path = cls._get_offsets_path(table_name)
+            tmp_records = records_path.with_name(records_path.name + ".tmp")
+            tmp_offsets = offsets_path.with_name(offsets_path.name + ".tmp")
+            offsets = RecordFile.write(tmp_records, data)
+            with open(tmp_offsets, 'wb') as f:
+                f.write(_TABLE_CODECS[resolve_table_codec("fast")][0]({"snapshot": list(snapshot), "offsets": offsets}))
+            os.replace(tmp_records, records_path)
+            os.replace(tmp_offsets, offsets_path)
+            record_file = RecordFile(records_path, offsets)
+            cls._record_files[table_name] = (snapshot, record_file)
+            return record_file
+
+    @classmethod
+    def _record_file(cls, table_name: str) -> Optional[RecordFile]:
+        """Get the record file to serve point reads on a lazy table from, or None to read the table.
+
+        Not used while the table has a pending mutation log, is part of the
+        open transaction, or is already parsed in the cache.
+        """
+        if table_name not in cls.LAZY_TABLES:
+            return None
+        tx = cls._current_transaction()
+        if tx is not None and table_name in tx["tables"]:
+            return None
+        with cls._lock:
+            signature = cls._table_signature(table_name)
+            if signature is None or signature[0] is None or signature[1] is not None:
+                return None
+            cached = cls._cache.get(table_name)
+            if cached is not None and cached[0] == signature:
+                return None
+            snapshot = signature[0]
+            opened = cls._record_files.get(table_name)
+            if opened is not None and opened[0] == snapshot:
+                return opened[1]
+
+            try:
+                with open(cls._get_offsets_path(table_name), 'rb') as f:
+                    index = _json_loads(f.read())
+            except (FileNotFoundError, ValueError):
+                index = None
+            records_path = cls._get_records_path(table_name)
+            if index is not None and tuple(index.get("snapshot") or ()) == snapshot and records_path.exists():
+                if opened is not None:
+                    opened[1].close()
+                record_file = RecordFile(records_path, index["offsets"])
+                cls._record_files[table_name] = (snapshot, record_file)
+                return record_file
+
+            # Missing or stale: parse the snapshot once and write a fresh pair.
+            return cls._write_record_file(table_name, cls._read_snapshot(table_name), snapshot)
+
+    @classmethod
+    def _read_lazy_record(cls, table_name: str, record_file: RecordFile, record_id: str) -> Optional[Dict[str, Any]]:
+        """Decode one record from a record file, rebuilding a delta-encoded field from its chain."""
+        record = record_file.get(record_id)
+        spec = DELTA_SPEC.get(table_name)
+        if record is None or spec is None or spec["field"] + "_delta" not in record:
+            return record
+        field = spec["field"]
+        delta_field = field + "_delta"
+
+        chain = []
+        link_id, link = record_id, record
+        while True:
+            cached = cls._delta_cache.get((table_name, link_id))
+            if cached is not None and cached[0] is record_file:
+                cls._delta_cache.move_to_end((table_name, link_id))
+                text = cached[1]
+                break
+            if delta_field not in link:
+                text = link.get(field)
+                break
+            chain.append((link_id, link[delta_field]))
+            link_id = link[delta_field]["base"]
+            link = record_file.get(link_id)
+            if link is None:
+                raise ValueError(f"Delta base {link_id} missing from {table_name}")
+
+        for link_id, delta in reversed(chain):
+            text = _apply_text_delta(text, delta)
+            cls._delta_cache[(table_name, link_id)] = (record_file, text)
+        while len(cls._delta_cache) > cls.DELTA_CACHE_SIZE:
+            cls._delta_cache.popitem(last=False)
+        return _swap_field(record, delta_field, field, text)
+
+    @classmethod
+    def _append_log(cls, table_name: str, data: Dict[str, Any], entries: List[Dict[str, Any]]) -> None:
+        """Append mutation entries to a table's log and refresh the cache entry."""
+        log_path = cls._get_log_path(table_name)
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with cls._lock:
+            try:
+                new_log = not log_path.exists() or log_path.stat().st_size == 0
+                if new_log:
+                    codec_name = cls.LOG_CODEC
+                else:
+                    with open(log_path, 'r', encoding='utf-8') as f:
+                        codec_name = json.loads(f.readline()).get("codec", "json")
+                encode = _LOG_CODECS[codec_name][0]
+
+                lines = []
+                if new_log:
+                    lines.append(json.dumps({"format": LOG_FORMAT_VERSION, "codec": codec_name}))
+                else:
+                    # Start on a fresh line if a previous append was torn.
+                    with open(log_path, 'rb') as f:
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b"\n":
+                            lines.append("")
+                lines.extend(encode(entry) for entry in entries)
+                with open(log_path, 'a', encoding='utf-8') as f:
+                    f.write("\n".join(lines) + "\n")
+            except Exception:
+                cls._cache.pop(table_name, None)
+                raise
+            entry_count = cls._log_entries.get(table_name, 0) + len(entries)
+            cls._log_entries[table_name] = entry_count
+            signature = cls._table_signature(table_name)
+            cls._follow_own_write(table_name, signature)
+            cls._cache[table_name] = (signature, data)
+
+            if entry_count >= cls.LOG_COMPACT_THRESHOLD and table_name not in cls._compacting:
+                cls._compacting.add(table_name)
+                threading.Thread(
+                    target=cls._background_compact, args=(table_name,), daemon=True
+                ).start()
+
+    @classmethod
+    def _background_compact(cls, table_name: str) -> None:
+        """Compaction thread body."""
+        try:
+            cls.compact(table_name)
+        finally:
+            with cls._lock:
+                cls._compacting.discard(table_name)
+
+    @classmethod
+    def compact(cls, table_name: str) -> None:
+        """Fold a table's mutation log into its JSON snapshot."""
+        with cls._lock:
+            if not cls._get_log_path(table_name).exists():
+                return
+            cls._write_table(table_name, cls._load_cached_table(table_name))
+
+    @classmethod
+    @contextmanager
+    def transaction(cls) -> Iterator[None]:
+        """Group several mutations into one unit of work.
+
+        Creates, updates and deletes are applied to per-table working copies
+        and are visible to reads on the same thread. On normal exit every
+        dirty table is flushed exactly once (one log append for tables in
+        LOG_TABLES, one rewrite otherwise); if the block raises, the working
+        copies are discarded and nothing reaches disk. Nested calls join the
+        outermost transaction.
+        """
+        if cls.BACKEND is not None:
+            try:
+                with cls.BACKEND.transaction():
+                    yield
+            except BaseException:
+                # Derived indexes already saw the rolled-back mutations.
+                with cls._lock:
+                    cls._derived.clear()
+                raise
+            return
+
+        if cls._current_transaction() is not None:
+            yield
+            return
+
+        tx: Dict[str, Any] = {"tables": {}, "bases": {}, "dirty": set(), "rewrite": set(), "ops": {},
+                              "indexes": {}, "derived": {}, "events": []}
+        cls._tx_state.tx = tx
+        try:
+            yield
+        finally:
+            cls._tx_state.tx = None
+
+        dirty: Set[str] = tx["dirty"]
+        for table_name in sorted(dirty):
+            data = tx["tables"][table_name]
+            if table_name in cls.LOG_TABLES and table_name not in tx["rewrite"]:
+                cls._append_log(table_name, data, tx["ops"][table_name])
+            else:
+                cls._write_table(table_name, data)
+            # The working copy is now the cached table, so its indexes carry over.
+            if table_name in tx["indexes"]:
+                with cls._lock:
+                    cls._indexes[table_name] = tx["indexes"][table_name]
+        if dirty:
+            cls._commit_derived(tx)
+
+    @classmethod
+    @contextmanager
+    def preserved_tables(cls) -> Iterator[None]:
+        """Put every table back as it was before the block, whatever the block wrote.
+
+        The dataset files are copied aside and copied back afterwards (see
+        copy_dataset), so the ID sequences are restored too. With a backend
+        the tables are reloaded and saved back, and its sequences reseeded.
+        """
+        if cls.BACKEND is not None:
+            backend = cls.BACKEND
+            tables = {table_name: backend.load_table(table_name) for table_name in backend.table_names()}
+            try:
+                yield
+            finally:
+                for table_name in backend.table_names():
+                    backend.save_table(table_name, tables.get(table_name, {}))
+                backend.reset_sequences()
+                cls.invalidate()
+            return
+
+        data_dir = cls.DATA_DIR
+        with tempfile.TemporaryDirectory() as saved:
+            cls.copy_dataset(data_dir, saved)
+            try:
+                yield
+            finally:
+                cls.copy_dataset(saved, data_dir)
+
+    @classmethod
+    def reset_process_state(cls) -> None:
+        """Drop everything this process holds about DATA_DIR, as if it had just started.
+
+        Besides the caches invalidate() drops, this closes the open record
+        files and forgets the log entry counts and ID sequences, so all of
+        them are rebuilt from the files. Call it after the files changed
+        under the process (a restore) or in a freshly forked worker.
+        """
+        with cls._lock:
+            cls.invalidate()
+            for _, record_file in cls._record_files.values():
+                record_file.close()
+            cls._record_files.clear()
+            cls._delta_memo.clear()
+            cls._delta_cache.clear()
+            cls._blob_cache.clear()
+            cls._tables_digest = None
+            cls._log_entries.clear()
+            cls._sequences = {}
+            cls._sequences_path = None
+            cls._sequences_signature = None
+            cls._sequence_checked = {}
+
+    @classmethod
+    def invalidate(cls, table_name: Optional[str] = None) -> None:
+        """Drop one table (or every table) from the in-process cache."""
+        with cls._lock:
+            if table_name is None:
+                cls._cache.clear()
+                cls._indexes.clear()
+                cls._derived.clear()
+            else:
+                cls._cache.pop(table_name, None)
+                cls._indexes.pop(table_name, None)
+                cls._drop_derived(cls._derived, table_name)
+
+    @classmethod
+    def _indexed_fields(cls, table_name: str) -> Dict[str, str]:
+        """Get {field: kind} for the indexes declared on a table."""
+        spec, parsed = cls._parsed_spec
+        if spec is not INDEX_SPEC:
+            parsed = _parse_index_spec(INDEX_SPEC)
+            cls._parsed_spec = (INDEX_SPEC, parsed)
+        return parsed.get(table_name, {})
+
+    @classmethod
+    def _index_holder(cls, table_name: str, data: Dict[str, Any], build: bool = True) -> Optional[Dict[str, Any]]:
+        """Get the index holder for a working table, (re)building it if stale."""
+        tx = cls._current_transaction()
+        store = tx["indexes"] if tx is not None else cls._indexes
+        holder = store.get(table_name)
+        if holder is not None and holder["data"] is data:
+            return holder
+        if not build:
+            return None
+        holder = {
+            "data": data,
+            "positions": {record_id: pos for pos, record_id in enumerate(data)},
+            "next_position": len(data),
+            "indexes": {},
+        }
+        store[table_name] = holder
+        return holder
+
+    @classmethod
+    def _get_index(cls, table_name: str, data: Dict[str, Any], field: str) -> Optional[Any]:
+        """Get the HashIndex or SortedIndex on table_name.field for a working table, or None if undeclared."""
+        fields = cls._indexed_fields(table_name)
+        if field not in fields:
+            return None
+        with cls._lock:
+            holder = cls._index_holder(table_name, data)
+            index = holder["indexes"].get(field)
+            if index is None:
+                if fields[field] == "range":
+                    index = SortedIndex(field)
+                else:
+                    index = HashIndex(field, unique=fields[field] == "unique")
+                index.build(data)
+                holder["indexes"][field] = index
+            return index
+
+    @classmethod
+    def _index_lookup(cls, table_name: str, data: Dict[str, Any], field: str, value: Any) -> Optional[List[str]]:
+        """Get candidate record ids for field == value in table order, or None if no hash index applies."""
+        if not _is_hashable(value) or cls._indexed_fields(table_name).get(field) not in ("unique", "non_unique"):
+            return None
+        index = cls._get_index(table_name, data, field)
+        if index is None:
+            return None
+        record_ids = index.lookup(value)
+        if len(record_ids) > 1:
+            positions = cls._index_holder(table_name, data)["positions"]
+            record_ids.sort(key=positions.__getitem__)
+        return record_ids
+
+    @classmethod
+    def _check_unique(cls, table_name: str, data: Dict[str, Any], record_id: str, record: Dict[str, Any]) -> None:
+        """Raise if record would duplicate a value held under a unique index."""
+        for field, kind in cls._indexed_fields(table_name).items():
+            value = record.get(field)
+            if kind != "unique" or value is None or not _is_hashable(value):
+                continue
+            others = [rid for rid in cls._get_index(table_name, data, field).lookup(value) if rid != record_id]
+            if others:
+                raise ValueError(
+                    f"Duplicate value {value!r} for unique field {field} in {table_name} (record {others[0]})")
+
+    @classmethod
+    def _index_add(cls, table_name: str, data: Dict[str, Any], record_id: str, record: Dict[str, Any]) -> None:
+        """Add a newly created record to the table's built indexes."""
+        with cls._lock:
+            holder = cls._index_holder(table_name, data, build=False)
+            if holder is None:
+                return
+            holder["positions"][record_id] = holder["next_position"]
+            holder["next_position"] += 1
+            for index in holder["indexes"].values():
+                index.add(record_id, record)
+
+    @classmethod
+    def _index_remove(cls, table_name: str, data: Dict[str, Any], record_id: str, record: Dict[str, Any],
+                      deleted: bool = True) -> None:
+        """Remove a record from the table's built indexes."""
+        with cls._lock:
+            holder = cls._index_holder(table_name, data, build=False)
+            if holder is None:
+                return
+            if deleted:
+                holder["positions"].pop(record_id, None)
+            for index in holder["indexes"].values():
+                index.remove(record_id, record)
+
+    @classmethod
+    def _index_reinsert(cls, table_name: str, data: Dict[str, Any], record_id: str, record: Dict[str, Any]) -> None:
+        """Re-add an updated record to the table's built indexes, keeping its position."""
+        with cls._lock:
+            holder = cls._index_holder(table_name, data, build=False)
+            if holder is None:
+                return
+            for index in holder["indexes"].values():
+                index.add(record_id, record)
+
+    @classmethod
+    def get_derived(cls, index_type: type) -> Any:
+        """Get the up-to-date instance of a DerivedIndex subclass, building it if needed.
+
+        Inside a transaction that has touched one of the index's source tables
+        the instance reflects the transaction's uncommitted changes.
+        """
+        with cls._lock:
+            tx = cls._current_transaction()
+            private = tx is not None and any(t in tx["tables"] for t in index_type.tables)
+            store = tx["derived"] if private else cls._derived
+            holder = store.get(index_type)
+            if cls.BACKEND is not None:
+                if holder is None:
+                    sources = {t: cls.BACKEND.load_table(t) for t in index_type.tables}
+                    holder = {"index": index_type(), "sources": sources}
+                    holder["index"].build(sources)
+                    store[index_type] = holder
+                return holder["index"]
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+            sources = {t: cls._load_table(t) if private else cls._load_cached_table(t)
+                       for t in index_type.tables}
+            if holder is None or any(holder["sources"][t] is not sources[t] for t in sources):
+                holder = {"index": index_type(), "sources": sources}
+                holder["index"].build(sources)
+                store[index_type] = holder
+            return holder["index"]
+
+    @classmethod
+    def _has_derived(cls, table_name: str) -> bool:
+        """Check whether any shared derived index reads table_name."""
+        return any(table_name in index_type.tables for index_type in cls._derived)
+
+    @staticmethod
+    def _drop_derived(store: Dict[type, Dict[str, Any]], table_name: str) -> None:
+        """Forget the derived indexes in store that read table_name."""
+        for index_type in [t for t in store if table_name in t.tables]:
+            del store[index_type]
+
+    @classmethod
+    def _notify_derived(cls, table_name: str, data: Dict[str, Any], record_id: str,
+                        old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        """Pass a record change on the working table data to the derived indexes built from it."""
+        with cls._lock:
+            tx = cls._current_transaction()
+            if tx is not None:
+                tx["events"].append((table_name, record_id, old, new))
+            store = tx["derived"] if tx is not None else cls._derived
+            for index_type, holder in list(store.items()):
+                if table_name not in index_type.tables:
+                    continue
+                sources = holder["sources"]
+                if cls.BACKEND is not None:
+                    # The holder owns its copies of backend tables; keep them in step.
+                    if new is None:
+                        sources[table_name].pop(record_id, None)
+                    else:
+                        sources[table_name][record_id] = dict(new)
+                elif sources[table_name] is not data:
+                    continue
+                holder["index"].apply(table_name, record_id, old, new, sources)
+
+    @classmethod
+    def _commit_derived(cls, tx: Dict[str, Any]) -> None:
+        """Bring the shared derived indexes up to date with a committed transaction.
+
+        Indexes the transaction built privately replace the shared ones; the
+        others replay the transaction's record changes, unless a source table
+        was rewritten or they were not built from the tables it started from.
+        """
+        with cls._lock:
+            cls._derived.update(tx["derived"])
+            for index_type, holder in list(cls._derived.items()):
+                if index_type in tx["derived"]:
+                    continue
+                touched = tx["dirty"].intersection(index_type.tables)
+                if not touched:
+                    continue
+                if touched & tx["rewrite"] or any(
+                        holder["sources"][t] is not tx["bases"].get(t) for t in touched):
+                    del cls._derived[index_type]
+                    continue
+                for t in touched:
+                    holder["sources"][t] = tx["tables"][t]
+                for table_name, record_id, old, new in tx["events"]:
+                    if table_name in index_type.tables:
+                        holder["index"].apply(table_name, record_id, old, new, holder["sources"])
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, Any]:
+        """Get hit/miss counters and the currently cached tables."""
+        with cls._lock:
+            return {
+                "hits": cls._cache_hits,
+                "misses": cls._cache_misses,
+                "tables": sorted(cls._cache.keys()),
+            }
+
+    @classmethod
+    def reset_cache_stats(cls) -> None:
+        """Reset the cache hit/miss counters."""
+        with cls._lock:
+            cls._cache_hits = 0
+            cls._cache_misses = 0
+
+    @classmethod
+    def _load_sequences(cls) -> Dict[str, int]:
+        """Get the in-memory sequences, re-reading the sidecar when it (or DATA_DIR) changed."""
+        path = cls._get_sequences_path()
+        signature = cls._sequences_file_signature(path)
+        if cls._sequences_path != path or cls._sequences_signature != signature:
+            sequences: Dict[str, int] = {}
+            if signature is not None:
+                with open(path, 'r', encoding='utf-8') as f:
+                    sequences = json.load(f)
+            cls._sequences = sequences
+            cls._sequences_path = path
+            cls._sequences_signature = signature
+            cls._sequence_checked = {}
+        return cls._sequences
+
+    @classmethod
+    def _save_sequences(cls) -> None:
+        """Persist the sequences sidecar."""
+        path = cls._get_sequences_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cls._sequences, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+        cls._sequences_signature = cls._sequences_file_signature(path)
+
+    @staticmethod
+    def _sequences_file_signature(path: Path) -> Optional[Tuple[int, int, int]]:
+        """Get the (inode, mtime_ns, size) of the sidecar; every save replaces the inode."""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    @classmethod
+    @contextmanager
+    def _sequences_file_lock(cls) -> Iterator[None]:
+        """Hold an exclusive lock on the sidecar across processes (where fcntl exists)."""
+        if fcntl is None:
+            yield
+            return
+        lock_path = cls._get_sequences_path().with_name(".id_sequences.lock")
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(lock_path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @classmethod
+    def _check_sequence(cls, table_name: str, sequences: Dict[str, int]) -> None:
+        """Raise a table's sequence to its largest numeric key if its files changed since the last check."""
+        signature = cls._table_signature(table_name)
+        if table_name in sequences and cls._sequence_checked.get(table_name, False) == signature:
+            return
+        numeric_ids = [_numeric_id(key) for key in cls._load_cached_table(table_name)]
+        largest = max((n for n in numeric_ids if n is not None), default=0)
+        sequences[table_name] = max(sequences.get(table_name, 0), largest)
+        cls._sequence_checked[table_name] = signature
+
+    @classmethod
+    def _follow_own_write(cls, table_name: str, signature: Any) -> None:
+        """Keep a checked sequence valid across a write this process made from an up-to-date table."""
+        cached = cls._cache.get(table_name)
+        checked = cls._sequence_checked.get(table_name, False)
+        if cached is not None and checked == cached[0]:
+            cls._sequence_checked[table_name] = signature
+
+    @classmethod
+    def _drop_sequence(cls, table_name: str) -> None:
+        """Forget a table's sequence so it is reseeded from the table's keys."""
+        sequences = cls._load_sequences()
+        cls._sequence_checked.pop(table_name, None)
+        if table_name in sequences:
+            del sequences[table_name]
+            cls._save_sequences()
+
+    @classmethod
+    def _observe_id(cls, table_name: str, record_id: str) -> None:
+        """Advance a seeded sequence past an explicitly chosen record ID."""
+        numeric = _numeric_id(record_id)
+        if numeric is None:
+            return
+        with cls._lock:
+            sequences = cls._load_sequences()
+            if table_name not in sequences or numeric <= sequences[table_name]:
+                return
+            with cls._sequences_file_lock():
+                sequences = cls._load_sequences()
+                if table_name in sequences and numeric > sequences[table_name]:
+                    sequences[table_name] = numeric
+                    cls._save_sequences()
+
+    @classmethod
+    def reserve_ids(cls, table_name: str, count: int) -> List[str]:
+        """Allocate count consecutive IDs for a table.
+
+        IDs come from the table's persisted sequence. The table's keys are
+        only read when its files changed since the sequence was last
+        checked (by another process or an external restore); the sequence
+        is then raised to the largest key. Allocated IDs are not reused,
+        even if no record is created with them. The sidecar is re-read
+        and rewritten under a file lock, so processes sharing DATA_DIR do
+        not hand out the same ID.
+        """
+        if cls.BACKEND is not None:
+            return cls.BACKEND.reserve_ids(table_name, count)
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        with cls._lock, cls._sequences_file_lock():
+            sequences = cls._load_sequences()
+            cls._check_sequence(table_name, sequences)
+            start = sequences[table_name] + 1
+            sequences[table_name] += count
+            cls._save_sequences()
+        return [str(i) for i in range(start, start + count)]
+
+    @classmethod
+    def reset_sequences(cls, table_name: Optional[str] = None) -> None:
+        """Drop one (or every) ID sequence so it is reseeded on next allocation."""
+        if cls.BACKEND is not None:
+            cls.BACKEND.reset_sequences(table_name)
+            return
+        with cls._lock:
+            if table_name is None:
+                cls._load_sequences().clear()
+                cls._save_sequences()
+            else:
+                cls._drop_sequence(table_name)
 
     @classmethod
     def get_next_id(cls, table_name: str) -> str:
         """Get the next available ID for a table."""
-        data = cls.load_data(table_name)
-        if not data:
-            return "1"
+        return cls.reserve_ids(table_name, 1)[0]
 
-        # Get numeric IDs and find the max
-        numeric_ids = []
-        for key in data.keys():
-            try:
-                numeric_ids.append(int(key))
-            except ValueError:
-                # If key is not numeric, extract numbers from it
-                import re
-                numbers = re.findall(r'\d+', key)
-                if numbers:
-                    numeric_ids.append(int(numbers[-1]))
+    @classmethod
+    def query(cls, table_name: str, where: Optional[Dict[str, Any]] = None,
+              order_by: Optional[Any] = None, fields: Optional[List[str]] = None,
+              limit: Optional[int] = None, cursor: Optional[str] = None,
+              offset: int = 0) -> Dict[str, Any]:
+        """Query a table with comparisons, ordering, projection and keyset pagination.
+
+        where maps fields to a value (equality) or to {operator: operand}
+        (see QUERY_OPERATORS). order_by is a field or list of fields, with a
+        leading "-" for descending; ties are broken by record ID so the order
+        is total. fields projects each record onto the listed fields.
+        Returns {"records": [...], "next_cursor": str or None}; pass
+        next_cursor back as cursor to get the following page.
+
+        Ordering comparisons (lt/lte/gt/gte) on fields with a "range" index
+        compare timestamps chronologically and are answered from the sorted
+        index instead of a scan.
+        """
+        if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int) or limit < 1):
+            raise ValueError(f"limit must be a positive integer, got {limit!r}")
+        if isinstance(offset, bool) or not isinstance(offset, int) or offset < 0:
+            raise ValueError(f"offset must be a non-negative integer, got {offset!r}")
+        range_fields = {f for f, kind in cls._indexed_fields(table_name).items() if kind == "range"}
+        conditions = []
+        for field, op, operand in _compile_where(where):
+            if field in range_fields and op in ("lt", "lte", "gt", "gte"):
+                bound = to_epoch(operand)
+                if bound is None:
+                    raise ValueError(f"'{op}' on {field} needs an ISO timestamp, got {operand!r}")
+                conditions.append((field, op, bound, True))
+            else:
+                conditions.append((field, op, operand, False))
+        if isinstance(order_by, str):
+            order_by = [order_by]
+        order = [(f[1:], True) if f.startswith("-") else (f, False) for f in (order_by or [])]
+
+        rows = cls._query_candidates(table_name, conditions)
+        rows = [
+            (record_id, record) for record_id, record in rows
+            if all(
+                QUERY_OPERATORS[op](to_epoch(record.get(field)) if chrono else record.get(field), operand)
+                for field, op, operand, chrono in conditions
+            )
+        ]
+
+        rows.sort(key=lambda row: _id_order(row[0]))
+        for field, desc in reversed(order):
+            rows.sort(key=lambda row: _order_value(row[1].get(field)), reverse=desc)
+
+        if cursor:
+            values, cursor_id = _decode_cursor(cursor, order)
+            cursor_key = [_order_value(v) for v in values]
+            rows = [row for row in rows if cls._after_cursor(row, order, cursor_key, cursor_id)]
+        if offset:
+            rows = rows[offset:]
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            if rows:
+                last_id, last = rows[-1]
+                next_cursor = _encode_cursor(order, [last.get(field) for field, _ in order], last_id)
+
+        if fields is not None and not set(fields) & set(BLOB_FIELDS.get(table_name, ())):
+            # The projection leaves out the blob texts, so don't read them
+            records = [{f: _copy_value(record[f]) for f in fields if f in record} for _, record in rows]
+            return {"records": records, "next_cursor": next_cursor}
+        records = [cls.resolve_blobs(table_name, record) for _, record in rows]
+        if fields is not None:
+            records = [{f: record[f] for f in fields if f in record} for record in records]
+        return {"records": records, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _after_cursor(row: Tuple[str, Dict[str, Any]], order: List[Tuple[str, bool]],
+                      cursor_key: List[Tuple[int, Any]], cursor_id: str) -> bool:
+        """Whether a row sorts strictly after the cursor position."""
+        record_id, record = row
+        for (field, desc), bound in zip(order, cursor_key):
+            value = _order_value(record.get(field))
+            if value != bound:
+                return (value > bound) != desc
+        return _id_order(record_id) > _id_order(cursor_id)
+
+    @classmethod
+    def _query_candidates(cls, table_name: str, conditions: List[Tuple[str, str, Any, bool]]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Get the (id, record) rows a query has to check, narrowed by an index when possible."""
+        if cls.BACKEND is not None:
+            for field, op, operand, _ in conditions:
+                if op == "eq" and not isinstance(operand, (list, dict)):
+                    return cls.BACKEND.match_field(table_name, field, operand)
+            return list(cls.BACKEND.load_table(table_name).items())
+
+        data = cls._load_table(table_name)
+        for field, op, operand, _ in conditions:
+            operands = [operand] if op == "eq" else list(operand) if op == "in" else None
+            if operands is None or not all(_is_hashable(o) for o in operands):
+                continue
+            record_ids: Dict[str, None] = {}
+            for value in operands:
+                candidates = cls._index_lookup(table_name, data, field, value)
+                if candidates is None:
+                    break
+                record_ids.update(dict.fromkeys(candidates))
+            else:
+                return [(record_id, data[record_id]) for record_id in record_ids]
 
-        if numeric_ids:
-            return str(max(numeric_ids) + 1)
-        return "1"
+        # Otherwise use the sorted index of the first time-window field.
+        windows: Dict[str, Dict[str, Any]] = {}
+        for field, op, bound, chrono in conditions:
+            if not chrono:
+                continue
+            window = windows.setdefault(field, {"low": None, "low_inclusive": True, "high": None, "high_inclusive": True})
+            if op in ("gt", "gte"):
+                if window["low"] is None or bound > window["low"] or (bound == window["low"] and op == "gt"):
+                    window["low"], window["low_inclusive"] = bound, op == "gte"
+            else:
+                if window["high"] is None or bound < window["high"] or (bound == window["high"] and op == "lt"):
+                    window["high"], window["high_inclusive"] = bound, op == "lte"
+        for field, window in windows.items():
+            index = cls._get_index(table_name, data, field)
+            return [(record_id, data[record_id]) for record_id in index.range(**window)]
+        return list(data.items())
 
     @classmethod
     def find_by_field(cls, table_name: str, field: str, value: Any) -> Optional[Dict[str, Any]]:
         """Find a record by a specific field value."""
-        data = cls.load_data(table_name)
+        if cls.BACKEND is not None:
+            matches = cls.BACKEND.match_field(table_name, field, value, limit=1)
+            return cls.resolve_blobs(table_name, matches[0][1]) if matches else None
+        data = cls._load_table(table_name)
+        candidates = cls._index_lookup(table_name, data, field, value)
+        if candidates is not None:
+            return cls.resolve_blobs(table_name, data[candidates[0]]) if candidates else None
         for record_id, record in data.items():
             if record.get(field) == value:
-                return record
+                return cls.resolve_blobs(table_name, record)
         return None
 
     @classmethod
     def find_all_by_field(cls, table_name: str, field: str, value: Any) -> List[Dict[str, Any]]:
         """Find all records matching a specific field value."""
-        data = cls.load_data(table_name)
+        if cls.BACKEND is not None:
+            return [cls.resolve_blobs(table_name, record)
+                    for _, record in cls.BACKEND.match_field(table_name, field, value)]
+        data = cls._load_table(table_name)
+        candidates = cls._index_lookup(table_name, data, field, value)
+        if candidates is not None:
+            return [cls.resolve_blobs(table_name, data[record_id]) for record_id in candidates]
         results = []
         for record_id, record in data.items():
             if record.get(field) == value:
-                results.append(record)
+                results.append(cls.resolve_blobs(table_name, record))
         return results
 
     @classmethod
     def filter_records(cls, table_name: str, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Filter records by multiple field values."""
-        data = cls.load_data(table_name)
+        if cls.BACKEND is not None:
+            return [cls.resolve_blobs(table_name, record)
+                    for record in cls.BACKEND.filter_records(table_name, filters)]
+        data = cls._load_table(table_name)
         results = []
 
-        for record_id, record in data.items():
+        # Narrow the scan to one indexed field, preferring unique indexes.
+        records = data.items()
+        indexed = cls._indexed_fields(table_name)
+        for field in sorted((f for f in filters if f in indexed), key=lambda f: indexed[f] != "unique"):
+            candidates = cls._index_lookup(table_name, data, field, filters[field])
+            if candidates is not None:
+                records = [(record_id, data[record_id]) for record_id in candidates]
+                break
+
+        for record_id, record in records:
             match = True
             for field, value in filters.items():
                 if field not in record or record[field] != value:
                     match = False
                     break
             if match:
-                results.append(record)
+                results.append(cls.resolve_blobs(table_name, record))
 
         return results
 
     @classmethod
     def create_record(cls, table_name: str, record_id: str, record_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new record."""
-        data = cls.load_data(table_name)
+        if cls.BACKEND is not None:
+            stored = cls._store_blobs(table_name, record_data)
+            cls.BACKEND.create_record(table_name, record_id, stored)
+            cls._notify_derived(table_name, None, record_id, None, stored)
+            return record_data
+        with cls._lock:
+            data = cls._load_table(table_name)
 
-        # Check if ID already exists
-        if record_id in data:
-            raise ValueError(
-                f"Record with ID {record_id} already exists in {table_name}")
+            # Check if ID already exists
+            if record_id in data:
+                raise ValueError(
+                    f"Record with ID {record_id} already exists in {table_name}")
 
-        data[record_id] = record_data
-        cls.save_data(table_name, data)
-        return record_data
+            cls._check_unique(table_name, data, record_id, record_data)
+            cls._observe_id(table_name, record_id)
+            data[record_id] = cls._store_blobs(table_name, record_data)
+            cls._index_add(table_name, data, record_id, data[record_id])
+            cls._notify_derived(table_name, data, record_id, None, data[record_id])
+            cls._commit_mutation(table_name, data, "put", record_id, data[record_id])
+            return record_data
 
     @classmethod
     def update_record(cls, table_name: str, record_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         """Update an existing record."""
-        data = cls.load_data(table_name)
+        if cls.BACKEND is not None:
+            needs_old = cls._has_derived(table_name) or table_name in BLOB_FIELDS
+            old = cls.BACKEND.get_record(table_name, record_id) if needs_old else None
+            updates = cls._store_blobs(table_name, updates)
+            inline = cls._inline_blob_fields(table_name, old, updates)
+            if inline:
+                # Replace the row so the superseded inline text is dropped.
+                record = {k: v for k, v in {**old, **updates}.items() if k not in inline}
+                cls.BACKEND.replace_record(table_name, record_id, record)
+            else:
+                record = cls.BACKEND.update_record(table_name, record_id, updates)
+            cls._notify_derived(table_name, None, record_id, old, record)
+            return cls.resolve_blobs(table_name, record)
+        with cls._lock:
+            data = cls._load_table(table_name)
 
-        if record_id not in data:
-            raise ValueError(
-                f"Record with ID {record_id} not found in {table_name}")
+            if record_id not in data:
+                raise ValueError(
+                    f"Record with ID {record_id} not found in {table_name}")
 
-        # Merge updates into existing record
-        data[record_id].update(updates)
-        cls.save_data(table_name, data)
-        return data[record_id]
+            # Merge updates into existing record
+            record = data[record_id]
+            updates = cls._store_blobs(table_name, updates)
+            cls._check_unique(table_name, data, record_id, {**record, **updates})
+            old = dict(record)
+            inline = cls._inline_blob_fields(table_name, record, updates)
+            cls._index_remove(table_name, data, record_id, record, deleted=False)
+            record.update(updates)
+            for field in inline:
+                del record[field]
+            cls._index_reinsert(table_name, data, record_id, record)
+            cls._notify_derived(table_name, data, record_id, old, record)
+            if inline:
+                # A patch cannot remove keys, so log the whole record.
+                cls._commit_mutation(table_name, data, "put", record_id, dict(record))
+            else:
+                cls._commit_mutation(table_name, data, "patch", record_id, dict(updates))
+            return cls.resolve_blobs(table_name, record)
 
     @classmethod
     def delete_record(cls, table_name: str, record_id: str) -> bool:
         """Delete a record."""
-        data = cls.load_data(table_name)
+        if cls.BACKEND is not None:
+            old = cls.BACKEND.get_record(table_name, record_id) if cls._has_derived(table_name) else None
+            cls.BACKEND.delete_record(table_name, record_id)
+            cls._notify_derived(table_name, None, record_id, old, None)
+            return True
+        with cls._lock:
+            data = cls._load_table(table_name)
+
+            if record_id not in data:
+                raise ValueError(
+                    f"Record with ID {record_id} not found in {table_name}")
+
+            cls._index_remove(table_name, data, record_id, data[record_id])
+            old = data.pop(record_id)
+            cls._notify_derived(table_name, data, record_id, old, None)
+            cls._commit_mutation(table_name, data, "del", record_id)
+            return True
+
+    @classmethod
+    def put_blob(cls, text: str) -> str:
+        """Store text in the content-addressed blob store and return its sha256 hex digest."""
+        body = text.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        blob_path = cls._get_blob_path(digest)
+        with cls._lock:
+            if blob_path.exists():
+                # Refresh the mtime so a pending gc_blobs treats it as new.
+                os.utime(blob_path)
+            else:
+                blob_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = blob_path.with_name(digest + ".tmp")
+                with open(tmp_path, 'wb') as f:
+                    f.write(body)
+                os.replace(tmp_path, blob_path)
+            cls._blob_cache[digest] = text
+            cls._blob_cache.move_to_end(digest)
+            while len(cls._blob_cache) > cls.BLOB_CACHE_SIZE:
+                cls._blob_cache.popitem(last=False)
+        return digest
+
+    @classmethod
+    def get_blob(cls, digest: str) -> Optional[str]:
+        """Get the text stored under a blob digest, or None if there is no such blob."""
+        with cls._lock:
+            text = cls._blob_cache.get(digest)
+            if text is not None:
+                cls._blob_cache.move_to_end(digest)
+                return text
+            try:
+                with open(cls._get_blob_path(digest), 'rb') as f:
+                    text = f.read().decode("utf-8")
+            except FileNotFoundError:
+                return None
+            cls._blob_cache[digest] = text
+            while len(cls._blob_cache) > cls.BLOB_CACHE_SIZE:
+                cls._blob_cache.popitem(last=False)
+            return text
+
+    @classmethod
+    def _store_blobs(cls, table_name: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Deep-copy fields with every BLOB_FIELDS text moved to the blob store and replaced by its hash."""
+        stored = _copy_value(fields)
+        for field in BLOB_FIELDS.get(table_name, ()):
+            value = stored.get(field)
+            if field not in stored or not (value is None or isinstance(value, str)):
+                continue
+            digest = cls.put_blob(value) if value is not None else None
+            stored = _swap_field(stored, field, field + "_hash", digest)
+        return stored
+
+    @classmethod
+    def _restore_blob_fields(cls, table_name: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Deep-copy a stored record with every BLOB_FIELDS hash swapped back for its text (undoes _store_blobs)."""
+        restored = _copy_value(record)
+        for field in BLOB_FIELDS.get(table_name, ()):
+            digest = restored.get(field + "_hash")
+            if field + "_hash" not in restored or not (digest is None or isinstance(digest, str)):
+                continue
+            text = cls.get_blob(digest) if digest is not None else None
+            restored = _swap_field(restored, field + "_hash", field, text)
+        return restored
+
+    @staticmethod
+    def _inline_blob_fields(table_name: str, record: Optional[Dict[str, Any]],
+                            stored: Dict[str, Any]) -> List[str]:
+        """Get the BLOB_FIELDS that record still holds inline and stored now replaces by hash."""
+        if record is None:
+            return []
+        return [field for field in BLOB_FIELDS.get(table_name, ())
+                if field in record and field not in stored and field + "_hash" in stored]
+
+    @classmethod
+    def resolve_blobs(cls, table_name: str, record: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Deep-copy a record with the text of its BLOB_FIELDS filled in from the blob store.
+
+        Each text goes just before its hash field, where the inline field was.
+        The copy shares no lists or dicts with the record, so callers may
+        change it freely.
+        """
+        if record is None:
+            return None
+        fields = BLOB_FIELDS.get(table_name, ())
+        if not any(isinstance(record.get(field + "_hash"), str) for field in fields):
+            return _copy_value(record)
+        resolved: Dict[str, Any] = {}
+        for key, value in record.items():
+            if key.endswith("_hash") and key[:-5] in fields and isinstance(value, str):
+                resolved[key[:-5]] = cls.get_blob(value)
+            resolved.setdefault(key, _copy_value(value))
+        return resolved
 
-        if record_id not in data:
-            raise ValueError(
-                f"Record with ID {record_id} not found in {table_name}")
+    @classmethod
+    def blob_refcount(cls, digest: str) -> int:
+        """Get the number of records referencing a blob."""
+        return cls.get_derived(BlobRefCounts).counts.get(digest, 0)
+
+    @classmethod
+    def gc_blobs(cls, grace: Optional[float] = None) -> List[str]:
+        """Delete blobs no record references and return their digests.
+
+        Blobs modified within grace seconds (BLOB_GC_GRACE by default) are
+        kept, since a transaction may be about to reference them.
+        """
+        grace = cls.BLOB_GC_GRACE if grace is None else grace
+        cutoff = time.time() - grace
+        removed = []
+        with cls._lock:
+            counts = cls.get_derived(BlobRefCounts).counts
+            for blob_path in sorted((cls.DATA_DIR / "blobs").glob("*/*")):
+                digest = blob_path.name
+                if digest.endswith(".tmp") or digest in counts or blob_path.stat().st_mtime > cutoff:
+                    continue
+                blob_path.unlink()
+                cls._blob_cache.pop(digest, None)
+                removed.append(digest)
+        return removed
+
+    @classmethod
+    def _existing_ids(cls, table_name: str, record_ids: List[str]) -> List[str]:
+        """Get the subset of record_ids present in a table."""
+        if cls.BACKEND is not None:
+            return [rid for rid in record_ids if cls.BACKEND.get_record(table_name, rid) is not None]
+        data = cls._load_table(table_name)
+        return [rid for rid in record_ids if rid in data]
+
+    @classmethod
+    def create_records(cls, table_name: str, records: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create several records (ID -> record) with one load and one save.
+
+        All IDs are checked for collisions before anything is written; the
+        batch is applied atomically and the created records are returned in
+        input order.
+        """
+        with cls.transaction():
+            collisions = cls._existing_ids(table_name, list(records))
+            if collisions:
+                raise ValueError(
+                    f"Records with IDs {', '.join(collisions)} already exist in {table_name}")
+            return [cls.create_record(table_name, rid, record) for rid, record in records.items()]
+
+    @classmethod
+    def update_records(cls, table_name: str, updates: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply several updates (ID -> fields) with one load and one save.
+
+        Fails before writing anything if any ID is missing; returns the
+        updated records in input order.
+        """
+        with cls.transaction():
+            found = set(cls._existing_ids(table_name, list(updates)))
+            missing = [rid for rid in updates if rid not in found]
+            if missing:
+                raise ValueError(
+                    f"Records with IDs {', '.join(missing)} not found in {table_name}")
+            return [cls.update_record(table_name, rid, fields) for rid, fields in updates.items()]
+
+    @classmethod
+    def upsert_many(cls, table_name: str, records: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create missing records and merge fields into existing ones, in one batch.
+
+        Returns one {"id", "status", "record"} entry per input record, with
+        status "created" or "updated".
+        """
+        with cls.transaction():
+            existing = set(cls._existing_ids(table_name, list(records)))
+            results = []
+            for rid, record in records.items():
+                if rid in existing:
+                    results.append({"id": rid, "status": "updated",
+                                    "record": cls.update_record(table_name, rid, record)})
+                else:
+                    results.append({"id": rid, "status": "created",
+                                    "record": cls.create_record(table_name, rid, record)})
+            return results
+
+    @classmethod
+    def delete_many(cls, table_name: str, record_ids: List[str], missing_ok: bool = False) -> List[bool]:
+        """Delete several records with one load and one save.
 
-        del data[record_id]
-        cls.save_data(table_name, data)
-        return True
+        Unless missing_ok is set, fails before deleting anything if an ID is
+        missing. Returns, per input ID, whether a record was deleted.
+        """
+        with cls.transaction():
+            found = set(cls._existing_ids(table_name, record_ids))
+            missing = [rid for rid in record_ids if rid not in found]
+            if missing and not missing_ok:
+                raise ValueError(
+                    f"Records with IDs {', '.join(missing)} not found in {table_name}")
+            results = []
+            for rid in record_ids:
+                if rid in found:
+                    cls.delete_record(table_name, rid)
+                    found.discard(rid)
+                    results.append(True)
+                else:
+                    results.append(False)
+            return results
 
     @classmethod
     def get_record(cls, table_name: str, record_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific record by ID."""
-        data = cls.load_data(table_name)
-        return data.get(record_id)
+        if cls.BACKEND is not None:
+            return cls.resolve_blobs(table_name, cls.BACKEND.get_record(table_name, record_id))
+        with cls._lock:
+            record_file = cls._record_file(table_name)
+            if record_file is not None:
+                return cls._read_lazy_record(table_name, record_file, record_id)
+        data = cls._load_table(table_name)
+        return cls.resolve_blobs(table_name, data.get(record_id))
 
     @classmethod
     def get_all_records(cls, table_name: str) -> Dict[str, Any]:
-        """Get all records from a table."""
-        return cls.load_data(table_name)
+        """Get all records from a table, with BLOB_FIELDS text filled in."""
+        data = cls.load_data(table_name)
+        if table_name not in BLOB_FIELDS:
+            return data
+        return {record_id: cls.resolve_blobs(table_name, record) for record_id, record in data.items()}
 
     @staticmethod
     def get_timestamp() -> str:
@@ -158,8 +2550,66 @@ class DataManager:
     @classmethod
     def find_record_id_by_field(cls, table_name: str, field: str, value: Any) -> Optional[str]:
         """Find a record ID by a specific field value."""
-        data = cls.load_data(table_name)
+        if cls.BACKEND is not None:
+            matches = cls.BACKEND.match_field(table_name, field, value, limit=1)
+            return matches[0][0] if matches else None
+        data = cls._load_table(table_name)
+        candidates = cls._index_lookup(table_name, data, field, value)
+        if candidates is not None:
+            return candidates[0] if candidates else None
         for record_id, record in data.items():
             if record.get(field) == value:
                 return record_id
         return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point for moving data between storage layouts and encodings."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Wiki Confluence data storage utilities.")
+    parser.add_argument("--data-dir", default=str(DataManager.DATA_DIR),
+                        help="Directory holding the <table>.json files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sqlite_import = commands.add_parser("sqlite-import", help="Load the JSON tables into a SQLite database.")
+    sqlite_import.add_argument("db_path")
+    sqlite_export = commands.add_parser("sqlite-export", help="Write a SQLite database back out as JSON tables.")
+    sqlite_export.add_argument("db_path")
+    export = commands.add_parser("export", help="Write the tables to another directory, pretty-printed by default.")
+    export.add_argument("target_dir")
+    export.add_argument("--codec", default="pretty")
+    set_codec = commands.add_parser("set-codec", help="Choose the dataset's codec and rewrite its tables with it.")
+    set_codec.add_argument("codec")
+    gc_blobs = commands.add_parser("gc-blobs", help="Delete blobs no record references.")
+    gc_blobs.add_argument("--grace", type=float, default=None,
+                          help="Keep blobs modified within this many seconds (default: BLOB_GC_GRACE).")
+    args = parser.parse_args(argv)
+
+    if args.command == "gc-blobs":
+        DataManager.DATA_DIR = Path(args.data_dir)
+        removed = DataManager.gc_blobs(args.grace)
+        print(f"{args.command}: removed {len(removed)} blobs")
+        return
+    if args.command in ("export", "set-codec"):
+        DataManager.DATA_DIR = Path(args.data_dir)
+        if args.command == "export":
+            tables = DataManager.export_tables(args.target_dir, args.codec)
+        else:
+            tables = DataManager.set_codec(args.codec)
+        print(f"{args.command}: {len(tables)} tables ({', '.join(tables)})")
+        return
+
+    backend = SQLiteBackend(args.db_path)
+    try:
+        if args.command == "sqlite-import":
+            tables = backend.import_json_dir(args.data_dir)
+        else:
+            # Blob text comes from the blob store next to the exported tables.
+            DataManager.DATA_DIR = Path(args.data_dir)
+            tables = backend.export_json_dir(args.data_dir)
+    finally:
+        backend.close()
+    print(f"{args.command}: {len(tables)} tables ({', '.join(tables)})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import importlib.util
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "tool")]
+
+# The modules in tool/ import Tool from "base"; outside tau_bench that class
+# lives in tool.py (the root base.py is the tau_bench environment).
+_spec = importlib.util.spec_from_file_location("base", ROOT / "tool.py")
+_base = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_base)
+sys.modules["base"] = _base
+
+from data_manager import DataManager  # noqa: E402
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point DataManager at a scratch copy of data/ with cold caches."""
+    target = tmp_path / "data"
+    shutil.copytree(ROOT / "data", target, ignore=shutil.ignore_patterns("*.py", "__pycache__"))
+    monkeypatch.setattr(DataManager, "DATA_DIR", target)
+    DataManager.invalidate()
+    yield target
+    DataManager.invalidate()
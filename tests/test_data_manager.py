@@ -0,0 +1,62 @@
+from data_manager import DataManager
+
+
+def test_nested_values_of_returned_records_do_not_reach_the_cache(data_dir):
+    record = {"title": "Nested", "space_id": "1", "labels": ["a"], "meta": {"tags": ["x"]}}
+    DataManager.create_record("pages", "9001", record)
+    record["labels"].append("from-caller")
+
+    page = DataManager.get_record("pages", "9001")
+    assert page["labels"] == ["a"]
+    page["labels"].append("b")
+    page["meta"]["tags"].append("y")
+    DataManager.find_by_field("pages", "title", "Nested")["labels"].append("c")
+    DataManager.filter_records("pages", {"title": "Nested"})[0]["meta"]["tags"].append("z")
+    DataManager.load_data("pages")["9001"]["labels"].append("d")
+
+    page = DataManager.get_record("pages", "9001")
+    assert page["labels"] == ["a"]
+    assert page["meta"] == {"tags": ["x"]}
+
+
+def test_next_id_follows_tables_changed_outside_the_process(data_dir):
+    path = data_dir / "audit_logs.json"
+    original = path.read_bytes()
+    first = DataManager.get_next_id("audit_logs")
+    DataManager.create_record("audit_logs", first, {"action_type": "create_page"})
+
+    # Another process writes a record with a higher ID.
+    path.write_text(path.read_text().rstrip()[:-1].rstrip() + ',\n  "500": {"action_type": "x"}\n}')
+    assert DataManager.get_next_id("audit_logs") == "501"
+
+    # The whole directory is restored from a backup, sidecar included.
+    path.write_bytes(original)
+    (data_dir / ".id_sequences").unlink()
+    assert DataManager.get_next_id("audit_logs") == first
+
+
+def test_export_writes_blob_text_inline(data_dir, tmp_path):
+    DataManager.create_record("pages", "9001", {"title": "Exported", "content": "<p>body</p>", "space_id": "1"})
+    assert "content_hash" in DataManager.load_data("pages")["9001"]
+
+    DataManager.export_tables(tmp_path / "export")
+
+    # The copy reads back without the blob store.
+    DataManager.DATA_DIR = tmp_path / "export"
+    DataManager.invalidate()
+    page = DataManager.load_data("pages")["9001"]
+    assert page["content"] == "<p>body</p>"
+    assert "content_hash" not in page
+    assert DataManager.get_record("pages", "9001")["content"] == "<p>body</p>"
+
+
+def test_preserved_tables_puts_tables_and_sequences_back(data_dir):
+    users = DataManager.load_data("users")
+    next_id = DataManager.get_next_id("users")
+
+    with DataManager.preserved_tables():
+        DataManager.create_record("users", DataManager.get_next_id("users"), {"name": "Replayed"})
+        DataManager.delete_record("users", next(iter(users)))
+
+    assert DataManager.load_data("users") == users
+    assert DataManager.get_next_id("users") == str(int(next_id) + 1)
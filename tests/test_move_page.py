@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from data_manager import DataManager
+from move_page import MovePage
+
+
+@pytest.fixture
+def tree(data_dir):
+    """A root page with a child and a grandchild in space 1."""
+    for page_id, parent_id in (("9101", None), ("9102", "9101"), ("9103", "9102")):
+        DataManager.create_record("pages", page_id, {"page_id": page_id, "space_id": "1",
+                                                     "parent_page_id": parent_id, "title": f"Page {page_id}"})
+    return "9101", "9102", "9103"
+
+
+def test_page_cannot_move_under_its_descendant(tree):
+    root, _, grandchild = tree
+    result = json.loads(MovePage.invoke({"page_id": root, "new_parent_page_id": grandchild}))
+    assert result == {"error": "Cannot move a page under itself or one of its descendants"}
+    assert DataManager.get_record("pages", root)["parent_page_id"] is None
+
+
+def test_page_moved_to_another_space_without_a_parent_goes_to_its_root(tree):
+    root, child, grandchild = tree
+    result = json.loads(MovePage.invoke({"page_id": child, "new_space_id": "2"}))
+    assert result["parent_page_id"] is None
+    assert result["space_id"] == "2"
+    assert result["moved_descendants"] == 1
+    assert DataManager.get_record("pages", grandchild)["space_id"] == "2"
+    assert DataManager.get_record("pages", root)["space_id"] == "1"
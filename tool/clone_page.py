@@ -1,7 +1,7 @@
-
 from base import Tool
 from typing import Any, Dict
 from data_manager import DataManager
+from wiki_indexes import PageHierarchyIndex
 import json
 
 class ClonePage(Tool):
@@ -9,20 +9,93 @@ class ClonePage(Tool):
     def invoke(payload: Dict[str, Any], **kwargs) -> Any:
         source_page_id = payload.get("source_page_id")
         target_space_id = payload.get("target_space_id")
+        target_parent_page_id = payload.get("target_parent_page_id")
+        include_children = bool(payload.get("include_children", False))
+        copy_latest_versions = bool(payload.get("copy_latest_versions", False))
+        created_by = payload.get("created_by_user_id")
         new_title = payload.get("new_title")
         try:
             if not source_page_id:
                 return json.dumps({"error": "'source_page_id' is required"})
-            src = DataManager.get_record("pages", str(source_page_id))
+            source_page_id = str(source_page_id)
+            src = DataManager.get_record("pages", source_page_id)
             if not src:
                 return json.dumps({"error": "Source page not found"})
-            nid = DataManager.get_next_id("pages")
+
+            if target_parent_page_id is not None:
+                target_parent_page_id = str(target_parent_page_id)
+                parent = DataManager.get_record("pages", target_parent_page_id)
+                if not parent:
+                    return json.dumps({"error": "Target parent page not found"})
+                if target_space_id is None:
+                    target_space_id = parent.get("space_id")
+                elif str(target_space_id) != parent.get("space_id"):
+                    return json.dumps({"error": "Target parent page is in a different space"})
+            space_value = str(target_space_id) if target_space_id is not None else src.get("space_id")
+            if target_parent_page_id is None and space_value == src.get("space_id"):
+                # A copy within the same space lands next to the original.
+                target_parent_page_id = src.get("parent_page_id")
+
+            # Walk the subtree once; pre-order puts every parent before its children.
+            source_ids = [source_page_id]
+            if include_children:
+                hierarchy = DataManager.get_derived(PageHierarchyIndex)
+                source_ids.extend(page_id for page_id, _ in hierarchy.descendants(source_page_id))
+            id_map = dict(zip(source_ids, DataManager.reserve_ids("pages", len(source_ids))))
+
+            now = DataManager.get_timestamp()
             title_base = src.get("title") or "Untitled"
-            title_value = new_title if new_title is not None else f"{title_base} (clone)"
-            space_value = target_space_id if target_space_id is not None else src.get("space_id")
-            new_page = {"title": title_value, "content": src.get("content"), "space_id": space_value, "created_at": DataManager.get_timestamp()}
-            DataManager.create_record("pages", nid, new_page)
-            return json.dumps({"page_id": nid, **new_page})
+            new_pages: Dict[str, Dict[str, Any]] = {}
+            latest_versions: Dict[str, Dict[str, Any]] = {}
+            for old_id in source_ids:
+                page = src if old_id == source_page_id else DataManager.get_record("pages", old_id)
+                if page is None:
+                    continue
+                clone = {key: value for key, value in page.items() if key not in ("content", "content_hash")}
+                clone.update({
+                    "page_id": id_map[old_id],
+                    "space_id": space_value,
+                    "parent_page_id": id_map.get(page.get("parent_page_id")),
+                    "created_at": now,
+                    "updated_at": now,
+                })
+                if created_by is not None:
+                    clone["created_by_user_id"] = created_by
+                    clone["updated_by_user_id"] = created_by
+                # Share the source body through its blob hash rather than copying it.
+                if page.get("content_hash") is not None:
+                    clone["content_hash"] = page["content_hash"]
+                elif "content" in page:
+                    clone["content"] = page.get("content")
+                if copy_latest_versions:
+                    versions = DataManager.find_all_by_field("page_versions", "page_id", old_id)
+                    if versions:
+                        latest_versions[old_id] = max(versions, key=lambda v: v.get("version_number") or 0)
+                        clone["current_version"] = 1
+                new_pages[id_map[old_id]] = clone
+
+            root = new_pages[id_map[source_page_id]]
+            root["parent_page_id"] = target_parent_page_id
+            root["title"] = new_title if new_title is not None else f"{title_base} (clone)"
+
+            new_versions: Dict[str, Dict[str, Any]] = {}
+            version_ids = DataManager.reserve_ids("page_versions", len(latest_versions)) if latest_versions else []
+            for version_id, (old_id, version) in zip(version_ids, latest_versions.items()):
+                new_versions[version_id] = {
+                    **version,
+                    "version_id": version_id,
+                    "page_id": id_map[old_id],
+                    "version_number": 1,
+                    "editor_user_id": created_by if created_by is not None else version.get("editor_user_id"),
+                    "edited_at": now,
+                }
+
+            with DataManager.transaction():
+                DataManager.create_records("pages", new_pages)
+                if new_versions:
+                    DataManager.create_records("page_versions", new_versions)
+            return json.dumps({**DataManager.resolve_blobs("pages", root), "cloned_pages": len(new_pages), "cloned_versions": len(new_versions),
+                               "page_id_map": {old_id: id_map[old_id] for old_id in source_ids if id_map[old_id] in new_pages}})
         except Exception as e:
             return json.dumps({"error": str(e)})
 
@@ -32,7 +105,6 @@ class ClonePage(Tool):
             "tool_name": "clone_page",
             "category": "Page Management",
             "description": "Duplicates a page or an entire page tree.",
-            "arguments": "table_name=\'pages\', action=\'clone\', payload={source_page_id: str, target_space_id: str, target_parent_page_id: str, include_children: bool,created_by_user_id:str, new_title:str}",
+            "arguments": "table_name=\'pages\', action=\'clone\', payload={source_page_id: str, target_space_id: str, target_parent_page_id: str, include_children: bool, copy_latest_versions: bool, created_by_user_id:str, new_title:str}",
             "flag": "Setter"
         }
-
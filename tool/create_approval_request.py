@@ -16,30 +16,31 @@ class CreateApprovalRequest(Tool):
             due_at = payload.get("due_at")
             metadata = payload.get("metadata")
 
-            rid = DataManager.get_next_id("approval_requests")
-            req = {
-                "target_entity_type": target_entity_type,
-                "target_entity_id": target_entity_id,
-                "requested_by_user_id": requested_by_user_id,
-                "reason": reason,
-                "due_at": due_at,
-                "metadata": metadata,
-                "status": "pending",
-                "created_at": DataManager.get_timestamp(),
-            }
-            DataManager.create_record("approval_requests", rid, req)
+            with DataManager.transaction():
+                rid = DataManager.get_next_id("approval_requests")
+                req = {
+                    "target_entity_type": target_entity_type,
+                    "target_entity_id": target_entity_id,
+                    "requested_by_user_id": requested_by_user_id,
+                    "reason": reason,
+                    "due_at": due_at,
+                    "metadata": metadata,
+                    "status": "pending",
+                    "created_at": DataManager.get_timestamp(),
+                }
+                DataManager.create_record("approval_requests", rid, req)
 
-            # create steps if provided as top-level 'steps'
-            steps = payload.get("steps", [])
-            created_steps = []
-            for s in steps:
-                sid = DataManager.get_next_id("approval_steps")
-                s.setdefault("approval_request_id", rid)
-                s.setdefault("status", "pending")
-                DataManager.create_record("approval_steps", sid, s)
-                created_steps.append({"step_id": sid, **s})
+                # create steps if provided as top-level 'steps'
+                steps = payload.get("steps", [])
+                created_steps = []
+                for s in steps:
+                    sid = DataManager.get_next_id("approval_steps")
+                    s.setdefault("approval_request_id", rid)
+                    s.setdefault("status", "pending")
+                    DataManager.create_record("approval_steps", sid, s)
+                    created_steps.append({"step_id": sid, **s})
 
-            return json.dumps({"request_id": rid, **req, "steps": created_steps})
+                return json.dumps({"request_id": rid, **req, "steps": created_steps})
         except Exception as e:
             return json.dumps({"error": str(e)})
 
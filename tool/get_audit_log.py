@@ -2,20 +2,48 @@
 from base import Tool
 from typing import Any, Dict
 from data_manager import DataManager
+import datetime
 import json
 
 class GetAuditLog(Tool):
     @staticmethod
     def invoke(payload: Dict[str, Any], **kwargs) -> Any:
         # Support filtering by actor_user_id, action_type, start_date, end_date
-        filters = {}
+        where = {}
         for key in ("actor_user_id", "action_type"):
             if key in payload:
-                filters[key] = payload[key]
+                where[key] = payload[key]
 
         try:
-            logs = DataManager.filter_records("audit_logs", filters) if filters else DataManager.get_all_records("audit_logs")
-            return json.dumps(logs)
+            occurred_at = {}
+            if payload.get("start_date"):
+                occurred_at["gte"] = payload["start_date"]
+            end_date = payload.get("end_date")
+            if end_date:
+                if len(end_date) == 10:
+                    # date-only end bound covers the whole day
+                    occurred_at["lt"] = (datetime.date.fromisoformat(end_date) + datetime.timedelta(days=1)).isoformat()
+                else:
+                    occurred_at["lte"] = end_date
+            if occurred_at:
+                where["occurred_at"] = occurred_at
+
+            if "page_size" not in payload and "cursor" not in payload:
+                # Unpaged calls keep the original response shape.
+                if not where:
+                    return json.dumps(DataManager.get_all_records("audit_logs"))
+                return json.dumps(DataManager.query("audit_logs", where=where)["records"])
+            page_size = payload.get("page_size", DataManager.DEFAULT_PAGE_SIZE)
+            if isinstance(page_size, bool) or not isinstance(page_size, int) or page_size < 1:
+                return json.dumps({"error": "'page_size' must be a positive integer"})
+            result = DataManager.query(
+                "audit_logs",
+                where=where,
+                order_by="occurred_at",
+                limit=page_size,
+                cursor=payload.get("cursor"),
+            )
+            return json.dumps({"audit_logs": result["records"], "next_cursor": result["next_cursor"]})
         except Exception as e:
             return json.dumps({"error": str(e)})
 
@@ -25,7 +53,7 @@ class GetAuditLog(Tool):
             "tool_name": "get_audit_log",
             "category": "Audit Management",
             "description": "Retrieves audit logs based on filters.",
-            "arguments": "table_name=\'audit_logs\', action=\'get\', payload={actor_user_id: str, action_type: audit_action_type, start_date: datetime, end_date: datetime}",
+            "arguments": "table_name=\'audit_logs\', action=\'get\', payload={actor_user_id: str, action_type: audit_action_type, start_date: datetime, end_date: datetime, page_size?: int, cursor?: str}",
             "flag": "Getter"
         }
 
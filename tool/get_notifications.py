@@ -16,8 +16,26 @@ class GetNotifications(Tool):
         try:
             # Merge user_id into filters
             filters["user_id"] = user_id
-            notifications = DataManager.filter_records("notifications", filters)
-            return json.dumps(notifications)
+            for key in ("status", "event_type"):
+                if key in payload:
+                    filters[key] = payload[key]
+            if not any(key in payload for key in ("page", "page_size", "cursor")):
+                # Unpaged calls keep the original response: a list of every match.
+                return json.dumps(DataManager.filter_records("notifications", filters))
+            page_size = payload.get("page_size", DataManager.DEFAULT_PAGE_SIZE)
+            if isinstance(page_size, bool) or not isinstance(page_size, int) or page_size < 1:
+                return json.dumps({"error": "'page_size' must be a positive integer"})
+            page = payload.get("page", 1)
+            if isinstance(page, bool) or not isinstance(page, int) or page < 1:
+                return json.dumps({"error": "'page' must be a positive integer"})
+            result = DataManager.query(
+                "notifications",
+                where=filters,
+                limit=page_size,
+                cursor=payload.get("cursor"),
+                offset=0 if payload.get("cursor") else (page - 1) * page_size,
+            )
+            return json.dumps({"notifications": result["records"], "next_cursor": result["next_cursor"]})
         except Exception as e:
             return json.dumps({"error": str(e)})
 
@@ -27,7 +45,7 @@ class GetNotifications(Tool):
             "tool_name": "get_notifications",
             "category": "Notification Management",
             "description": "Retrieves notifications for a specific user with filters.",
-            "arguments": "table_name=\'notifications\', action=\'get\', payload={user_id: str, status?: notification_status, event_type?: str, page?: int, page_size?: int}",
+            "arguments": "table_name=\'notifications\', action=\'get\', payload={user_id: str, status?: notification_status, event_type?: str, page?: int, page_size?: int, cursor?: str}",
             "flag": "Getter"
         }
 
@@ -10,15 +10,25 @@ class ManageGroupMemberships(Tool):
         action = kwargs.get("action")
         try:
             if action == "add":
-                # flat payload: user_id, group_id
-                user_id = payload.get("user_id")
+                # flat payload: user_id, group_id; user_ids (list) adds several users at once
                 group_id = payload.get("group_id")
+                user_ids = payload.get("user_ids")
+                if user_ids:
+                    mids = DataManager.reserve_ids("user_groups", len(user_ids))
+                    memberships = {mid: {"user_id": uid, "group_id": group_id} for mid, uid in zip(mids, user_ids)}
+                    DataManager.create_records("user_groups", memberships)
+                    return json.dumps([{"membership_id": mid, **m} for mid, m in memberships.items()])
+                user_id = payload.get("user_id")
                 membership = {"user_id": user_id, "group_id": group_id}
                 membership_id = DataManager.get_next_id("user_groups")
                 DataManager.create_record("user_groups", membership_id, membership)
                 return json.dumps({"membership_id": membership_id, **membership})
 
             if action == "remove":
+                membership_ids = payload.get("membership_ids")
+                if membership_ids:
+                    DataManager.delete_many("user_groups", [str(mid) for mid in membership_ids])
+                    return json.dumps({"deleted": True, "membership_ids": membership_ids})
                 membership_id = payload.get("membership_id")
                 if not membership_id:
                     return json.dumps({"error": "'membership_id' is required for remove"})
@@ -35,7 +45,7 @@ class ManageGroupMemberships(Tool):
             "tool_name": "manage_group_memberships",
             "category": "Group Management",
             "description": "Adds or removes users from a group.",
-            "arguments": "table_name=\'user_groups\', action=\'add/remove\', payload={user_id: str, group_id: str}",
+            "arguments": "table_name=\'user_groups\', action=\'add/remove\', payload={user_id: str, group_id: str, user_ids?: list, membership_id?: str, membership_ids?: list}",
             "flag": "Setter"
         }
 
@@ -13,15 +13,19 @@ class ManageLabels(Tool):
                 # flat payload: page_id, label_names (list)
                 page_id = payload.get("page_id")
                 labels = payload.get("label_names", [])
-                created = []
-                for name in labels:
-                    rec = {"page_id": page_id, "label": name}
-                    lid = DataManager.get_next_id("page_labels")
-                    DataManager.create_record("page_labels", lid, rec)
-                    created.append({"label_id": lid, **rec})
-                return json.dumps(created)
+                if not labels:
+                    return json.dumps([])
+                lids = DataManager.reserve_ids("page_labels", len(labels))
+                records = {lid: {"page_id": page_id, "label": name} for lid, name in zip(lids, labels)}
+                DataManager.create_records("page_labels", records)
+                return json.dumps([{"label_id": lid, **rec} for lid, rec in records.items()])
 
             if action == "remove":
+                # flat payload: label_id, or label_ids (list) to remove several at once
+                label_ids = payload.get("label_ids")
+                if label_ids:
+                    DataManager.delete_many("page_labels", [str(lid) for lid in label_ids])
+                    return json.dumps({"deleted": True, "label_ids": label_ids})
                 label_id = payload.get("label_id")
                 if not label_id:
                     return json.dumps({"error": "'label_id' is required for remove"})
@@ -38,7 +42,7 @@ class ManageLabels(Tool):
             "tool_name": "manage_labels",
             "category": "Content Management",
             "description": "Adds or removes labels from a page.",
-            "arguments": "table_name=\'page_labels\', action=\'add/remove\', payload={page_id: str, label_names: list}",
+            "arguments": "table_name=\'page_labels\', action=\'add/remove\', payload={page_id: str, label_names: list, label_id?: str, label_ids?: list}",
             "flag": "Setter"
         }
 
@@ -16,6 +16,23 @@ class ManagePermissions(Tool):
                 user_id = payload.get("user_id")
                 group_id = payload.get("group_id")
                 permission_type = payload.get("permission_type")
+                user_ids = payload.get("user_ids")
+                if user_ids:
+                    # grant the same permission to several users with one write
+                    pids = DataManager.reserve_ids("permissions", len(user_ids))
+                    perms = {
+                        pid: {
+                            "space_id": space_id,
+                            "page_id": page_id,
+                            "user_id": uid,
+                            "group_id": group_id,
+                            "permission_type": permission_type,
+                            "granted_at": DataManager.get_timestamp(),
+                        }
+                        for pid, uid in zip(pids, user_ids)
+                    }
+                    DataManager.create_records("permissions", perms)
+                    return json.dumps([{"permission_id": pid, **p} for pid, p in perms.items()])
                 perm = {
                     "space_id": space_id,
                     "page_id": page_id,
@@ -32,15 +49,42 @@ class ManagePermissions(Tool):
                 permission_id = payload.get("permission_id")
                 # mark as revoked or delete
                 reason = payload.get("reason")
+                permission_ids = payload.get("permission_ids")
+                if permission_ids:
+                    revoked = {"revoked": True, "revoked_reason": reason, "revoked_at": DataManager.get_timestamp()}
+                    updated = DataManager.update_records("permissions", {str(pid): dict(revoked) for pid in permission_ids})
+                    return json.dumps(updated)
                 if permission_id:
                     updated = DataManager.update_record("permissions", permission_id, {"revoked": True, "revoked_reason": reason, "revoked_at": DataManager.get_timestamp()})
                     return json.dumps(updated)
                 return json.dumps({"error": "permission_id required for revoke"})
 
             if action == "get":
-                filters = payload.get("filters", {})
-                perms = DataManager.filter_records("permissions", filters)
-                return json.dumps(perms)
+                where = dict(payload.get("filters", {}))
+                for key in ("space_id", "page_id", "user_id", "group_id", "permission_type"):
+                    if key in payload:
+                        where[key] = payload[key]
+                # Inactive and revoked grants are listed unless include_inactive is false.
+                if payload.get("include_inactive") is False:
+                    where.setdefault("is_active", {"ne": False})
+                    where.setdefault("revoked", {"ne": True})
+                if not any(key in payload for key in ("page", "page_size", "cursor")):
+                    # Unpaged calls keep the original response: a list of every match.
+                    return json.dumps(DataManager.query("permissions", where=where)["records"])
+                page_size = payload.get("page_size", DataManager.DEFAULT_PAGE_SIZE)
+                if isinstance(page_size, bool) or not isinstance(page_size, int) or page_size < 1:
+                    return json.dumps({"error": "'page_size' must be a positive integer"})
+                page = payload.get("page", 1)
+                if isinstance(page, bool) or not isinstance(page, int) or page < 1:
+                    return json.dumps({"error": "'page' must be a positive integer"})
+                result = DataManager.query(
+                    "permissions",
+                    where=where,
+                    limit=page_size,
+                    cursor=payload.get("cursor"),
+                    offset=0 if payload.get("cursor") else (page - 1) * page_size,
+                )
+                return json.dumps({"permissions": result["records"], "next_cursor": result["next_cursor"]})
 
             return json.dumps({"error": "Unsupported or missing action. Use grant/revoke/get."})
         except Exception as e:
@@ -52,7 +96,7 @@ class ManagePermissions(Tool):
             "tool_name": "manage_permissions",
             "category": "Permission Management",
             "description": "	Grants, revokes (tracks who/when), or retrieves permissions.",
-            "arguments": "table_name=\'permissions\', action=\'grant/revoke/get\', payload={space_id?: str, page_id?: str, user_id?: str, group_id?: str, permission_type?: permission_type, revoked_by_user_id?: str, include_inactive?: bool, page?: int, page_size?: int}",
+            "arguments": "table_name=\'permissions\', action=\'grant/revoke/get\', payload={space_id?: str, page_id?: str, user_id?: str, user_ids?: list, group_id?: str, permission_type?: permission_type, permission_id?: str, permission_ids?: list, revoked_by_user_id?: str, include_inactive?: bool, page?: int, page_size?: int, cursor?: str}",
             "flag": "Setter"
         }
 
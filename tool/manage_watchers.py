@@ -10,11 +10,26 @@ class ManageWatchers(Tool):
         action = kwargs.get("action")
         try:
             if action == "add":
-                # flat payload: user_id, group_id, space_id, page_id
+                # flat payload: user_id, group_id, space_id, page_id; user_ids (list) adds several users at once
                 user_id = payload.get("user_id")
                 group_id = payload.get("group_id")
                 space_id = payload.get("space_id")
                 page_id = payload.get("page_id")
+                user_ids = payload.get("user_ids")
+                if user_ids:
+                    wids = DataManager.reserve_ids("watchers", len(user_ids))
+                    watchers = {
+                        wid: {
+                            "user_id": uid,
+                            "group_id": group_id,
+                            "space_id": space_id,
+                            "page_id": page_id,
+                            "created_at": DataManager.get_timestamp(),
+                        }
+                        for wid, uid in zip(wids, user_ids)
+                    }
+                    DataManager.create_records("watchers", watchers)
+                    return json.dumps([{"watcher_id": wid, **w} for wid, w in watchers.items()])
                 watcher = {
                     "user_id": user_id,
                     "group_id": group_id,
@@ -27,6 +42,10 @@ class ManageWatchers(Tool):
                 return json.dumps({"watcher_id": wid, **watcher})
 
             if action == "remove":
+                watcher_ids = payload.get("watcher_ids")
+                if watcher_ids:
+                    DataManager.delete_many("watchers", [str(wid) for wid in watcher_ids])
+                    return json.dumps({"deleted": True, "watcher_ids": watcher_ids})
                 watcher_id = payload.get("watcher_id")
                 if not watcher_id:
                     return json.dumps({"error": "'watcher_id' is required for remove"})
@@ -43,7 +62,7 @@ class ManageWatchers(Tool):
             "tool_name": "manage_watchers",
             "category": "Watcher Management",
             "description": "Adds or removes users/groups as watchers for a page or space.",
-            "arguments": "table_name=\'watchers\', action='add/remove', payload={user_id: str, group_id: str, space_id: str, page_id: str}",
+            "arguments": "table_name=\'watchers\', action='add/remove', payload={user_id: str, group_id: str, space_id: str, page_id: str, user_ids?: list, watcher_id?: str, watcher_ids?: list}",
             "flag": "Setter"
         }
 
@@ -1,20 +1,58 @@
-
 from base import Tool
 from typing import Any, Dict
 from data_manager import DataManager
+from wiki_indexes import PageHierarchyIndex
 import json
 
 class MovePage(Tool):
     @staticmethod
     def invoke(payload: Dict[str, Any], **kwargs) -> Any:
         page_id = payload.get("page_id")
-        target_parent = payload.get("target_parent_page_id")
         try:
             page = DataManager.get_record("pages", str(page_id))
             if not page:
                 return json.dumps({"error": "Page not found"})
-            updated = DataManager.update_record("pages", str(page_id), {"parent_page_id": target_parent, "updated_at": DataManager.get_timestamp()})
-            return json.dumps(updated)
+            page_id = str(page_id)
+
+            new_space = payload.get("new_space_id")
+            if new_space is not None:
+                new_space = str(new_space)
+            # new_parent_page_id (or the older target_parent_page_id) may be null to move to the space root.
+            if "new_parent_page_id" in payload:
+                new_parent = payload.get("new_parent_page_id")
+            elif "target_parent_page_id" in payload:
+                new_parent = payload.get("target_parent_page_id")
+            elif new_space is not None and new_space != page.get("space_id"):
+                # Moving to another space without naming a parent puts the page at its root.
+                new_parent = None
+            else:
+                new_parent = page.get("parent_page_id")
+
+            hierarchy = DataManager.get_derived(PageHierarchyIndex)
+            if new_parent is not None:
+                new_parent = str(new_parent)
+                parent = DataManager.get_record("pages", new_parent)
+                if not parent:
+                    return json.dumps({"error": "Target parent page not found"})
+                if new_parent == page_id or hierarchy.is_ancestor(page_id, new_parent):
+                    return json.dumps({"error": "Cannot move a page under itself or one of its descendants"})
+                if new_space is None:
+                    new_space = parent.get("space_id")
+                elif parent.get("space_id") != new_space:
+                    return json.dumps({"error": "Target parent page is in a different space"})
+            if new_space is None:
+                new_space = page.get("space_id")
+            if new_space != page.get("space_id") and not DataManager.get_record("spaces", str(new_space)):
+                return json.dumps({"error": "Target space not found"})
+
+            now = DataManager.get_timestamp()
+            updates = {page_id: {"parent_page_id": new_parent, "space_id": new_space, "updated_at": now}}
+            if new_space != page.get("space_id"):
+                # The whole subtree follows the page into the new space.
+                for descendant_id, _ in hierarchy.descendants(page_id):
+                    updates[descendant_id] = {"space_id": new_space, "updated_at": now}
+            updated = DataManager.update_records("pages", updates)
+            return json.dumps({**updated[0], "moved_descendants": len(updated) - 1})
         except Exception as e:
             return json.dumps({"error": str(e)})
 
@@ -27,4 +65,3 @@ class MovePage(Tool):
             "arguments": "table_name=\'pages\', action=\'move\', payload={page_id: str, new_space_id?: str, new_parent_page_id?: str, moved_by_user_id: str}",
             "flag": "Setter"
         }
-
@@ -1,23 +1,28 @@
-
 from base import Tool
-from typing import Any, Dict
+from typing import Any, Dict, List
 from data_manager import DataManager
+from wiki_indexes import GroupMembershipMatrix
 import json
 
 class SendNotification(Tool):
     @staticmethod
     def invoke(payload: Dict[str, Any], **kwargs) -> Any:
         # flat payload: recipient_user_id, event_type, message, related_entity_type (opt), related_entity_id (opt), channel (opt), sender_user_id (opt), metadata (opt)
+        # fan-out: page_id or space_id instead of recipient_user_id notifies everyone watching it
         try:
-            recipient_user_id = payload.get("recipient_user_id")
             event_type = payload.get("event_type")
             message = payload.get("message")
-            related_entity_type = payload.get("related_entity_type")
-            related_entity_id = payload.get("related_entity_id")
             channel = payload.get("channel")
             sender_user_id = payload.get("sender_user_id")
             metadata = payload.get("metadata")
 
+            if payload.get("recipient_user_id") is None and (payload.get("page_id") or payload.get("space_id")):
+                return SendNotification._fan_out(payload, event_type, message, channel, sender_user_id, metadata)
+
+            recipient_user_id = payload.get("recipient_user_id")
+            related_entity_type = payload.get("related_entity_type")
+            related_entity_id = payload.get("related_entity_id")
+
             nid = DataManager.get_next_id("notifications")
             notification = {
                 "recipient_user_id": recipient_user_id,
@@ -35,13 +40,68 @@ class SendNotification(Tool):
         except Exception as e:
             return json.dumps({"error": str(e)})
 
+    @staticmethod
+    def _fan_out(payload: Dict[str, Any], event_type: Any, message: Any, channel: Any,
+                 sender_user_id: Any, metadata: Any) -> str:
+        page_id = payload.get("page_id")
+        space_id = payload.get("space_id")
+        if page_id:
+            page_id = str(page_id)
+            page = DataManager.get_record("pages", page_id)
+            if not page:
+                return json.dumps({"error": "Page not found"})
+            space_id = page.get("space_id")
+            # Watchers of the page itself, then space-wide watchers of its space.
+            watchers = DataManager.find_all_by_field("watchers", "page_id", page_id)
+            related_entity_type, related_entity_id = "pages", page_id
+        else:
+            space_id = str(space_id)
+            if not DataManager.get_record("spaces", space_id):
+                return json.dumps({"error": "Space not found"})
+            watchers = []
+            related_entity_type, related_entity_id = "spaces", space_id
+        if space_id is not None:
+            watchers += [w for w in DataManager.find_all_by_field("watchers", "space_id", space_id)
+                         if w.get("page_id") is None]
+
+        # Expand group watchers and dedupe, keeping first-seen order.
+        groups = DataManager.get_derived(GroupMembershipMatrix)
+        recipients: Dict[Any, None] = {}
+        for watcher in watchers:
+            if watcher.get("user_id") is not None:
+                recipients[watcher["user_id"]] = None
+            if watcher.get("group_id") is not None:
+                recipients.update(dict.fromkeys(groups.members(watcher["group_id"])))
+        if payload.get("exclude_sender", True):
+            recipients.pop(sender_user_id, None)
+        if not recipients:
+            return json.dumps({"notifications": [], "count": 0})
+
+        now = DataManager.get_timestamp()
+        notification_ids = DataManager.reserve_ids("notifications", len(recipients))
+        notifications: Dict[str, Dict[str, Any]] = {}
+        for nid, recipient_user_id in zip(notification_ids, recipients):
+            notifications[nid] = {
+                "recipient_user_id": recipient_user_id,
+                "event_type": event_type,
+                "message": message,
+                "related_entity_type": related_entity_type,
+                "related_entity_id": related_entity_id,
+                "channel": channel,
+                "sender_user_id": sender_user_id,
+                "metadata": metadata,
+                "created_at": now,
+            }
+        DataManager.create_records("notifications", notifications)
+        created: List[Dict[str, Any]] = [{"notification_id": nid, **n} for nid, n in notifications.items()]
+        return json.dumps({"notifications": created, "count": len(created)})
+
     @staticmethod
     def get_info() -> dict[str, Any]:
         return {
             "tool_name": "send_notification",
             "category": "Notification Management",
-            "description": "Sends a system or email notification to a user",
-            "arguments": "table_name=\'notifications\', action=\'create\', payload={recipient_user_id: str, event_type: str, message: str, related_entity_type?: str, related_entity_id?: str, channel?: notification_channel, sender_user_id?: str, metadata?: json}",
+            "description": "Sends a system or email notification to a user, or to everyone watching a page or space",
+            "arguments": "table_name=\'notifications\', action=\'create\', payload={recipient_user_id: str, event_type: str, message: str, related_entity_type?: str, related_entity_id?: str, channel?: notification_channel, sender_user_id?: str, metadata?: json, page_id?: str, space_id?: str, exclude_sender?: bool}",
             "flag": "Setter"
         }
-
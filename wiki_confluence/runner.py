@@ -0,0 +1,309 @@
+"""
+Parallel evaluation runner for the wiki_confluence environment.
+
+Evaluates many (task_split, interface_num, task_index) jobs over a process
+pool. The parent process imports the tools, loads the base dataset and
+builds one environment per split before forking, so every worker shares
+those pages copy-on-write instead of loading its own copy. The tools write
+DataManager's on-disk tables, so the parent also copies the dataset aside
+once; each worker runs on its own copy of it in a scratch directory, put
+back to the pristine tables before every job. Each finished
+job is appended to a JSONL file as soon as it completes; rerunning with the
+same output file skips jobs that already succeeded and reruns the rest,
+replacing their old lines so each job keeps a single result.
+
+    python -m tau_bench.envs.wiki_confluence.runner --interfaces 1 2 3 4 5 \\
+        --processes 8 --output results.jsonl
+"""
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from tau_bench.envs.base import Env, get_pristine_data
+from tau_bench.envs.wiki_confluence.data import load_data
+from tau_bench.envs.wiki_confluence.env import MockEnterpriseWikiDomainEnv
+from tau_bench.types import RESPOND_ACTION_NAME
+
+Job = Tuple[str, int, int]
+
+# Set in the parent before forking; workers inherit them instead of unpickling.
+_AGENT_FACTORY: Optional[Callable[[], Any]] = None
+_ENV_KWARGS: Dict[str, Any] = {}
+_ENVS: Dict[Tuple[str, int], Env] = {}
+_AGENT: Any = None
+# DataManager classes the tools use -> pristine copy of their dataset, made by the parent.
+_PRISTINE_TABLES: Dict[Any, str] = {}
+# DataManager classes -> this process's own dataset directory, made by _init_worker.
+_WORKER_TABLES: Dict[Any, str] = {}
+
+
+class ReplayAgent(object):
+    """Steps through each task's ground-truth actions and scores the result.
+
+    Needs no model: a sweep with it checks that every task's actions run
+    through the tools and get a reward. Replies to the user are skipped,
+    so the user simulator is never called. The reward's data check
+    compares env.data, which the DataManager-backed tools do not write, so
+    it does not show whether their changes match the tasks.
+    """
+
+    def solve(self, env: Env, task_index: Optional[int] = None) -> Dict[str, Any]:
+        if task_index is None:
+            task_index = env.task_index
+        env.task_index = task_index
+        env.task = env.tasks[task_index]
+        env.data = env.load_fresh_data()
+        env.actions = []
+        for action in env.task.actions:
+            if action.name != RESPOND_ACTION_NAME and action.name not in env.terminate_tools:
+                env.step(action)
+        result = env.calculate_reward()
+        return {"reward": result.reward, "info": result.info, "total_cost": 0.0}
+
+
+def _to_jsonable(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return _to_jsonable(value.model_dump())
+    if hasattr(value, "dict") and callable(value.dict) and not isinstance(value, dict):
+        return _to_jsonable(value.dict())
+    if isinstance(value, dict):
+        return {str(key): _to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_to_jsonable(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return repr(value)
+
+
+def _result_field(result: Any, name: str) -> Any:
+    return result.get(name) if isinstance(result, dict) else getattr(result, name, None)
+
+
+def split_for(interface_num: int) -> str:
+    return f"test_interface_{interface_num}"
+
+
+def get_env(task_split: str, interface_num: int) -> Env:
+    """Get this process's environment for a split, building it once."""
+    env = _ENVS.get((task_split, interface_num))
+    if env is None:
+        env = MockEnterpriseWikiDomainEnv(
+            task_split=task_split, interface_num=interface_num, task_index=0, **_ENV_KWARGS
+        )
+        _ENVS[(task_split, interface_num)] = env
+    return env
+
+
+def interface_jobs(interfaces: Iterable[int], task_indices: Optional[List[int]] = None) -> List[Job]:
+    """Get the jobs covering the given task indices (default: all) of each interface's split."""
+    jobs: List[Job] = []
+    for interface_num in interfaces:
+        task_split = split_for(interface_num)
+        count = len(get_env(task_split, interface_num).tasks)
+        indices = range(count) if task_indices is None else [i for i in task_indices if 0 <= i < count]
+        jobs.extend((task_split, interface_num, index) for index in indices)
+    return jobs
+
+
+def _read_results(output_path: str) -> List[Dict[str, Any]]:
+    records: List[Dict[str, Any]] = []
+    if not os.path.exists(output_path):
+        return records
+    with open(output_path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by an interrupted run.
+                continue
+            if isinstance(record, dict):
+                records.append(record)
+    return records
+
+
+def _job_of(record: Dict[str, Any]) -> Job:
+    return (record["task_split"], record["interface_num"], record["task_index"])
+
+
+def completed_jobs(output_path: str) -> Set[Job]:
+    """Get the jobs recorded without an error in an existing results file."""
+    return {_job_of(record) for record in _read_results(output_path) if "error" not in record}
+
+
+def _rewrite_results(output_path: str, rerun: Set[Job]) -> None:
+    """Rewrite a results file with one line per job, leaving out the jobs about to be rerun.
+
+    A job recorded more than once keeps its last successful line, or its
+    last line if none succeeded. Torn lines are dropped, so the file ends
+    with a newline before new results are appended.
+    """
+    if not os.path.exists(output_path):
+        return
+    kept: Dict[Job, Dict[str, Any]] = {}
+    for record in _read_results(output_path):
+        job = _job_of(record)
+        if job in rerun:
+            continue
+        previous = kept.get(job)
+        if previous is None or "error" in previous or "error" not in record:
+            kept[job] = record
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        for record in kept.values():
+            f.write(json.dumps(record) + "\n")
+    os.replace(tmp_path, output_path)
+
+
+def _snapshot_tables(env: Env, root: str) -> Dict[Any, str]:
+    """Copy the dataset of every DataManager the tools use to a directory under root."""
+    pristine: Dict[Any, str] = {}
+    for number, store in enumerate(env.table_stores()):
+        path = os.path.join(root, f"pristine_{number}")
+        store.copy_dataset(store.DATA_DIR, path)
+        pristine[store] = path
+    return pristine
+
+
+def _init_worker() -> None:
+    """Move this process onto its own copy of the tables, dropping the state it inherited."""
+    _WORKER_TABLES.clear()
+    for store, pristine in _PRISTINE_TABLES.items():
+        path = f"{pristine}_worker_{os.getpid()}"
+        store.copy_dataset(pristine, path)
+        store.DATA_DIR = Path(path)
+        store.reset_process_state()
+        _WORKER_TABLES[store] = path
+
+
+def _run_job(job: Job) -> Dict[str, Any]:
+    global _AGENT
+    task_split, interface_num, task_index = job
+    record: Dict[str, Any] = {"task_split": task_split, "interface_num": interface_num, "task_index": task_index}
+    start = time.time()
+    try:
+        # Start from the pristine tables, whatever the previous job wrote.
+        for store, path in _WORKER_TABLES.items():
+            store.copy_dataset(_PRISTINE_TABLES[store], path)
+        if _AGENT is None:
+            _AGENT = _AGENT_FACTORY()
+        result = _AGENT.solve(get_env(task_split, interface_num), task_index=task_index)
+        record["reward"] = _result_field(result, "reward")
+        record["info"] = _to_jsonable(_result_field(result, "info"))
+        record["total_cost"] = _result_field(result, "total_cost")
+    except Exception as e:
+        record["reward"] = 0.0
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["elapsed"] = round(time.time() - start, 3)
+    record["pid"] = os.getpid()
+    return record
+
+
+def run(
+    jobs: List[Job],
+    output_path: str,
+    agent_factory: Callable[[], Any] = ReplayAgent,
+    processes: Optional[int] = None,
+    resume: bool = True,
+    env_kwargs: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Evaluate jobs over a forked process pool, appending one JSON line per finished job.
+
+    With resume, jobs already recorded without an error in output_path are
+    skipped and the lines of the jobs being rerun are removed first.
+    Returns a summary of this run.
+    """
+    global _AGENT_FACTORY, _ENV_KWARGS, _AGENT, _PRISTINE_TABLES
+    _AGENT_FACTORY = agent_factory
+    _AGENT = None
+    _ENV_KWARGS = dict(env_kwargs or {})
+
+    done = completed_jobs(output_path) if resume else set()
+    pending = [job for job in jobs if job not in done]
+    if resume:
+        _rewrite_results(output_path, set(pending))
+    elif os.path.exists(output_path):
+        open(output_path, "w").close()
+
+    # Everything loaded here is shared with the workers copy-on-write.
+    get_pristine_data(load_data)
+    for task_split, interface_num in sorted({(job[0], job[1]) for job in pending}):
+        get_env(task_split, interface_num)
+
+    processes = processes or os.cpu_count() or 1
+    summary = {"jobs": len(jobs), "skipped": len(jobs) - len(pending), "completed": 0, "errors": 0, "reward": 0.0}
+    start = time.time()
+    scratch = tempfile.mkdtemp(prefix="wiki_confluence_runner_")
+    data_dirs: Dict[Any, Any] = {}
+    try:
+        env = next(iter(_ENVS.values()), None)
+        _PRISTINE_TABLES = _snapshot_tables(env, scratch) if env is not None else {}
+        data_dirs = {store: store.DATA_DIR for store in _PRISTINE_TABLES}
+        with open(output_path, "a") as out:
+            if processes == 1:
+                _init_worker()
+                results: Iterable[Dict[str, Any]] = map(_run_job, pending)
+                pool = None
+            else:
+                pool = multiprocessing.get_context("fork").Pool(processes, initializer=_init_worker)
+                results = pool.imap_unordered(_run_job, pending, chunksize=1)
+            try:
+                for record in results:
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+                    summary["completed"] += 1
+                    summary["errors"] += "error" in record
+                    summary["reward"] += record.get("reward") or 0.0
+            finally:
+                if pool is not None:
+                    pool.terminate()
+                    pool.join()
+    finally:
+        for store, data_dir in data_dirs.items():
+            store.DATA_DIR = data_dir
+            store.reset_process_state()
+        _PRISTINE_TABLES = {}
+        _WORKER_TABLES.clear()
+        shutil.rmtree(scratch, ignore_errors=True)
+    summary["elapsed"] = round(time.time() - start, 3)
+    return summary
+
+
+def _load_factory(spec: str) -> Callable[[], Any]:
+    if spec == "replay":
+        return ReplayAgent
+    module_name, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Evaluate wiki_confluence tasks over a process pool")
+    parser.add_argument("--interfaces", type=int, nargs="+", default=[1, 2, 3, 4, 5])
+    parser.add_argument("--task-indices", type=int, nargs="+", default=None)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--output", required=True, help="JSONL file to stream results to")
+    parser.add_argument("--no-resume", action="store_true", help="Start over instead of skipping finished jobs")
+    parser.add_argument("--agent", default="replay", help="'replay' or module:callable returning an agent with solve(env, task_index)")
+    parser.add_argument("--user-strategy", default="llm")
+    parser.add_argument("--user-model", default="gpt-4o")
+    parser.add_argument("--user-provider", default=None)
+    args = parser.parse_args()
+
+    global _ENV_KWARGS
+    _ENV_KWARGS = {"user_strategy": args.user_strategy, "user_model": args.user_model,
+                   "user_provider": args.user_provider}
+    jobs = interface_jobs(args.interfaces, args.task_indices)
+    summary = run(jobs, args.output, agent_factory=_load_factory(args.agent), processes=args.processes,
+                  resume=not args.no_resume, env_kwargs=_ENV_KWARGS)
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
 from .create_approval_request import CreateApprovalRequest
 from .decide_approval_step import DecideApprovalStep
+from .get_accessible_pages import GetAccessiblePages
 from .get_config_history import GetConfigHistory
+from .get_effective_permission import GetEffectivePermission
 from .get_group import GetGroup
+from .get_matching_pages import GetMatchingPages
 from .get_notifications import GetNotifications
 from .get_page import GetPage
+from .get_page_ancestors import GetPageAncestors
+from .get_page_children import GetPageChildren
+from .get_page_descendants import GetPageDescendants
 from .get_space import GetSpace
 from .get_user import GetUser
 from .get_watchers import GetWatchers
@@ -24,10 +30,16 @@ from .send_notification import SendNotification
 ALL_TOOLS_INTERFACE_1 = [
     CreateApprovalRequest,
     DecideApprovalStep,
+    GetAccessiblePages,
     GetConfigHistory,
+    GetEffectivePermission,
     GetGroup,
+    GetMatchingPages,
     GetNotifications,
     GetPage,
+    GetPageAncestors,
+    GetPageChildren,
+    GetPageDescendants,
     GetSpace,
     GetUser,
     GetWatchers,
@@ -43,5 +55,5 @@ ALL_TOOLS_INTERFACE_1 = [
     ManageWatchers,
     RecordAuditLog,
     RecordConfigChange,
-    SendNotification
+    SendNotification,
 ]
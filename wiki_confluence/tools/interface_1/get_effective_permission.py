@@ -0,0 +1,77 @@
+from tau_bench.envs.tool import Tool
+from typing import Any, Dict
+from data_manager import DataManager
+from wiki_indexes import PERMISSION_LEVELS, PermissionResolver
+import json
+
+class GetEffectivePermission(Tool):
+    @staticmethod
+    def invoke(payload: Dict[str, Any], **kwargs) -> Any:
+        """
+        Resolves a user's effective level on a page or space from roles, groups, grants and page inheritance
+        """
+        try:
+            user_id = payload.get("user_id")
+            if not user_id:
+                return json.dumps({"error": "user_id is required"})
+            page_id = payload.get("page_id")
+            space_id = payload.get("space_id")
+            if not page_id and not space_id:
+                return json.dumps({"error": "page_id or space_id is required"})
+            permission_type = payload.get("permission_type", "view")
+            if permission_type not in PERMISSION_LEVELS:
+                return json.dumps({"error": "permission_type must be one of: view, edit, admin"})
+            user_id = str(user_id)
+            if DataManager.get_record("users", user_id) is None:
+                return json.dumps({"error": "User not found"})
+            if page_id:
+                page_id = str(page_id)
+                if DataManager.get_record("pages", page_id) is None:
+                    return json.dumps({"error": "Page not found"})
+            if space_id:
+                space_id = str(space_id)
+                if DataManager.get_record("spaces", space_id) is None:
+                    return json.dumps({"error": "Space not found"})
+
+            resolver = DataManager.get_derived(PermissionResolver)
+            level = resolver.level(user_id, page_id=page_id, space_id=space_id)
+            return json.dumps({
+                "user_id": user_id,
+                "page_id": page_id,
+                "space_id": space_id,
+                "permission_type": permission_type,
+                "effective_level": level,
+                "allowed": resolver.check(user_id, permission_type, page_id=page_id, space_id=space_id),
+            })
+
+        except Exception as e:
+            return json.dumps({"error": f"Operation failed: {str(e)}"})
+
+    @staticmethod
+    def get_info() -> dict[str, Any]:
+        return {
+            "function": {
+                "name": "get_effective_permission",
+                "description": "Checks whether a user holds a permission on a page or space, taking global and space roles, group grants and permissions inherited from parent pages into account",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "payload": {
+                            "type": "object",
+                            "description": "Parameters for the operation",
+                            "properties": {
+                                "user_id": {"type": "string", "description": "ID of the user"},
+                                "page_id": {"type": "string", "description": "ID of the page (page_id or space_id is required)"},
+                                "space_id": {"type": "string", "description": "ID of the space (page_id or space_id is required)"},
+                                "permission_type": {"type": "string", "description": "Level to check: view, edit or admin (default view)"}
+                            },
+                            "required": ["user_id"]
+                        }
+                    },
+                    "required": ["payload"]
+                }
+            },
+            "tool_name": "get_effective_permission",
+            "category": "Permission Management",
+            "flag": "Getter"
+        }
@@ -0,0 +1,64 @@
+from tau_bench.envs.tool import Tool
+from typing import Any, Dict
+from data_manager import DataManager
+from wiki_indexes import PageSearchIndex
+import json
+
+class GetMatchingPages(Tool):
+    @staticmethod
+    def invoke(payload: Dict[str, Any], **kwargs) -> Any:
+        """
+        Full-text search over page titles and latest version content, ranked by BM25
+        """
+        try:
+            query = payload.get("query")
+            if not query or not isinstance(query, str):
+                return json.dumps({"error": "query is required"})
+            space_id = payload.get("space_id")
+            include_trashed = bool(payload.get("include_trashed", False))
+            limit = payload.get("limit", 10)
+            if limit is not None and (not isinstance(limit, int) or limit < 1):
+                return json.dumps({"error": "limit must be a positive integer"})
+
+            index = DataManager.get_derived(PageSearchIndex)
+            hits = index.search(query, space_id=space_id, limit=limit, include_trashed=include_trashed)
+
+            results = []
+            for hit in hits:
+                page = DataManager.get_record("pages", hit["page_id"])
+                if page is None:
+                    continue
+                results.append({**page, "score": hit["score"]})
+            return json.dumps({"results": results, "count": len(results)})
+
+        except Exception as e:
+            return json.dumps({"error": f"Operation failed: {str(e)}"})
+
+    @staticmethod
+    def get_info() -> dict[str, Any]:
+        return {
+            "function": {
+                "name": "get_matching_pages",
+                "description": "Searches page titles and the content of each page's latest version, returning pages ranked by relevance",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "payload": {
+                            "type": "object",
+                            "description": "Parameters for the operation",
+                            "properties": {
+                                "query": {"type": "string", "description": "Words to search for"},
+                                "space_id": {"type": "string", "description": "Only return pages in this space"},
+                                "limit": {"type": "integer", "description": "Maximum number of pages to return (default 10)"},
+                                "include_trashed": {"type": "boolean", "description": "Include trashed pages (default false)"}
+                            },
+                            "required": ["query"]
+                        }
+                    },
+                    "required": ["payload"]
+                }
+            },
+            "tool_name": "get_matching_pages",
+            "category": "Page Management",
+            "flag": "Getter"
+        }
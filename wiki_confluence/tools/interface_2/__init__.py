@@ -1,7 +1,13 @@
+from .fetch_accessible_pages import FetchAccessiblePages
 from .fetch_config_history import FetchConfigHistory
+from .fetch_effective_permission import FetchEffectivePermission
 from .fetch_group import FetchGroup
+from .fetch_matching_pages import FetchMatchingPages
 from .fetch_notifications import FetchNotifications
 from .fetch_page import FetchPage
+from .fetch_page_ancestors import FetchPageAncestors
+from .fetch_page_children import FetchPageChildren
+from .fetch_page_descendants import FetchPageDescendants
 from .fetch_space import FetchSpace
 from .fetch_user import FetchUser
 from .fetch_watchers import FetchWatchers
@@ -22,10 +28,16 @@ from .set_users import SetUsers
 from .set_watchers import SetWatchers
 
 ALL_TOOLS_INTERFACE_2 = [
+    FetchAccessiblePages,
     FetchConfigHistory,
+    FetchEffectivePermission,
     FetchGroup,
+    FetchMatchingPages,
     FetchNotifications,
     FetchPage,
+    FetchPageAncestors,
+    FetchPageChildren,
+    FetchPageDescendants,
     FetchSpace,
     FetchUser,
     FetchWatchers,
@@ -43,5 +55,5 @@ ALL_TOOLS_INTERFACE_2 = [
     SetSpaceFeatures,
     SetSpaces,
     SetUsers,
-    SetWatchers
+    SetWatchers,
 ]
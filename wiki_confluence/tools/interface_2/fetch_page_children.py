@@ -0,0 +1,53 @@
+from tau_bench.envs.tool import Tool
+from typing import Any, Dict
+from data_manager import DataManager
+from wiki_indexes import PageHierarchyIndex
+import json
+
+class FetchPageChildren(Tool):
+    @staticmethod
+    def invoke(payload: Dict[str, Any], **kwargs) -> Any:
+        """
+        Lists the direct child pages of a page
+        """
+        try:
+            page_id = payload.get("page_id")
+            if not page_id:
+                return json.dumps({"error": "page_id is required"})
+            page_id = str(page_id)
+            if DataManager.get_record("pages", page_id) is None:
+                return json.dumps({"error": "Page not found"})
+
+            hierarchy = DataManager.get_derived(PageHierarchyIndex)
+            children = [DataManager.get_record("pages", child_id) for child_id in hierarchy.children(page_id)]
+            children = [child for child in children if child is not None]
+            return json.dumps({"page_id": page_id, "children": children, "count": len(children)})
+
+        except Exception as e:
+            return json.dumps({"error": f"Operation failed: {str(e)}"})
+
+    @staticmethod
+    def get_info() -> dict[str, Any]:
+        return {
+            "function": {
+                "name": "fetch_page_children",
+                "description": "Lists the direct child pages of a page",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "payload": {
+                            "type": "object",
+                            "description": "Parameters for the operation",
+                            "properties": {
+                                "page_id": {"type": "string", "description": "ID of the page"}
+                            },
+                            "required": ["page_id"]
+                        }
+                    },
+                    "required": ["payload"]
+                }
+            },
+            "tool_name": "fetch_page_children",
+            "category": "Page Management",
+            "flag": "Getter"
+        }
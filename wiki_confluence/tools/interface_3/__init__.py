@@ -1,7 +1,13 @@
+from .read_accessible_pages import ReadAccessiblePages
 from .read_config_history import ReadConfigHistory
+from .read_effective_permission import ReadEffectivePermission
 from .read_group import ReadGroup
+from .read_matching_pages import ReadMatchingPages
 from .read_notifications import ReadNotifications
 from .read_page import ReadPage
+from .read_page_ancestors import ReadPageAncestors
+from .read_page_children import ReadPageChildren
+from .read_page_descendants import ReadPageDescendants
 from .read_space import ReadSpace
 from .read_user import ReadUser
 from .read_watchers import ReadWatchers
@@ -22,10 +28,16 @@ from .update_users import UpdateUsers
 from .update_watchers import UpdateWatchers
 
 ALL_TOOLS_INTERFACE_3 = [
+    ReadAccessiblePages,
     ReadConfigHistory,
+    ReadEffectivePermission,
     ReadGroup,
+    ReadMatchingPages,
     ReadNotifications,
     ReadPage,
+    ReadPageAncestors,
+    ReadPageChildren,
+    ReadPageDescendants,
     ReadSpace,
     ReadUser,
     ReadWatchers,
@@ -43,5 +55,5 @@ ALL_TOOLS_INTERFACE_3 = [
     UpdateSpaceFeatures,
     UpdateSpaces,
     UpdateUsers,
-    UpdateWatchers
+    UpdateWatchers,
 ]
@@ -0,0 +1,53 @@
+from tau_bench.envs.tool import Tool
+from typing import Any, Dict
+from data_manager import DataManager
+from wiki_indexes import PageHierarchyIndex
+import json
+
+class ReadPageAncestors(Tool):
+    @staticmethod
+    def invoke(payload: Dict[str, Any], **kwargs) -> Any:
+        """
+        Lists the ancestors of a page from the space root down to its parent (breadcrumb)
+        """
+        try:
+            page_id = payload.get("page_id")
+            if not page_id:
+                return json.dumps({"error": "page_id is required"})
+            page_id = str(page_id)
+            if DataManager.get_record("pages", page_id) is None:
+                return json.dumps({"error": "Page not found"})
+
+            hierarchy = DataManager.get_derived(PageHierarchyIndex)
+            ancestors = [DataManager.get_record("pages", ancestor_id) for ancestor_id in reversed(hierarchy.ancestors(page_id))]
+            ancestors = [ancestor for ancestor in ancestors if ancestor is not None]
+            return json.dumps({"page_id": page_id, "ancestors": ancestors, "count": len(ancestors)})
+
+        except Exception as e:
+            return json.dumps({"error": f"Operation failed: {str(e)}"})
+
+    @staticmethod
+    def get_info() -> dict[str, Any]:
+        return {
+            "function": {
+                "name": "read_page_ancestors",
+                "description": "Lists the ancestors of a page from the space root down to its parent (breadcrumb)",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "payload": {
+                            "type": "object",
+                            "description": "Parameters for the operation",
+                            "properties": {
+                                "page_id": {"type": "string", "description": "ID of the page"}
+                            },
+                            "required": ["page_id"]
+                        }
+                    },
+                    "required": ["payload"]
+                }
+            },
+            "tool_name": "read_page_ancestors",
+            "category": "Page Management",
+            "flag": "Getter"
+        }
@@ -13,10 +13,16 @@ from .commit_space_features import CommitSpaceFeatures
 from .commit_spaces import CommitSpaces
 from .commit_users import CommitUsers
 from .commit_watchers import CommitWatchers
+from .lookup_accessible_pages import LookupAccessiblePages
 from .lookup_config_history import LookupConfigHistory
+from .lookup_effective_permission import LookupEffectivePermission
 from .lookup_group import LookupGroup
+from .lookup_matching_pages import LookupMatchingPages
 from .lookup_notifications import LookupNotifications
 from .lookup_page import LookupPage
+from .lookup_page_ancestors import LookupPageAncestors
+from .lookup_page_children import LookupPageChildren
+from .lookup_page_descendants import LookupPageDescendants
 from .lookup_space import LookupSpace
 from .lookup_user import LookupUser
 from .lookup_watchers import LookupWatchers
@@ -37,11 +43,17 @@ ALL_TOOLS_INTERFACE_4 = [
     CommitSpaces,
     CommitUsers,
     CommitWatchers,
+    LookupAccessiblePages,
     LookupConfigHistory,
+    LookupEffectivePermission,
     LookupGroup,
+    LookupMatchingPages,
     LookupNotifications,
     LookupPage,
+    LookupPageAncestors,
+    LookupPageChildren,
+    LookupPageDescendants,
     LookupSpace,
     LookupUser,
-    LookupWatchers
+    LookupWatchers,
 ]
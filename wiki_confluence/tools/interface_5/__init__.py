@@ -1,7 +1,13 @@
+from .inspect_accessible_pages import InspectAccessiblePages
 from .inspect_config_history import InspectConfigHistory
+from .inspect_effective_permission import InspectEffectivePermission
 from .inspect_group import InspectGroup
+from .inspect_matching_pages import InspectMatchingPages
 from .inspect_notifications import InspectNotifications
 from .inspect_page import InspectPage
+from .inspect_page_ancestors import InspectPageAncestors
+from .inspect_page_children import InspectPageChildren
+from .inspect_page_descendants import InspectPageDescendants
 from .inspect_space import InspectSpace
 from .inspect_user import InspectUser
 from .inspect_watchers import InspectWatchers
@@ -22,10 +28,16 @@ from .mutate_users import MutateUsers
 from .mutate_watchers import MutateWatchers
 
 ALL_TOOLS_INTERFACE_5 = [
+    InspectAccessiblePages,
     InspectConfigHistory,
+    InspectEffectivePermission,
     InspectGroup,
+    InspectMatchingPages,
     InspectNotifications,
     InspectPage,
+    InspectPageAncestors,
+    InspectPageChildren,
+    InspectPageDescendants,
     InspectSpace,
     InspectUser,
     InspectWatchers,
@@ -43,5 +55,5 @@ ALL_TOOLS_INTERFACE_5 = [
     MutateSpaceFeatures,
     MutateSpaces,
     MutateUsers,
-    MutateWatchers
+    MutateWatchers,
 ]
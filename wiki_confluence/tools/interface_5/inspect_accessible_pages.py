@@ -0,0 +1,72 @@
+from tau_bench.envs.tool import Tool
+from typing import Any, Dict
+from data_manager import DataManager
+from wiki_indexes import PERMISSION_LEVELS, PermissionResolver
+import json
+
+PAGE_SUMMARY_FIELDS = ["page_id", "space_id", "parent_page_id", "title", "state", "current_version", "updated_at"]
+
+class InspectAccessiblePages(Tool):
+    @staticmethod
+    def invoke(payload: Dict[str, Any], **kwargs) -> Any:
+        """
+        Lists summaries of the pages a user holds a permission on, from roles, groups, grants and page inheritance
+        """
+        try:
+            user_id = payload.get("user_id")
+            if not user_id:
+                return json.dumps({"error": "user_id is required"})
+            permission_type = payload.get("permission_type", "view")
+            if permission_type not in PERMISSION_LEVELS:
+                return json.dumps({"error": "permission_type must be one of: view, edit, admin"})
+            user_id = str(user_id)
+            if DataManager.get_record("users", user_id) is None:
+                return json.dumps({"error": "User not found"})
+            space_id = payload.get("space_id")
+            if space_id is not None:
+                space_id = str(space_id)
+
+            limit = payload.get("limit", DataManager.DEFAULT_PAGE_SIZE)
+            if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+                return json.dumps({"error": "limit must be a positive integer"})
+
+            resolver = DataManager.get_derived(PermissionResolver)
+            page_ids = resolver.accessible_pages(user_id, permission_type=permission_type, space_id=space_id)
+            result = DataManager.query("pages", where={"page_id": {"in": page_ids}}, fields=PAGE_SUMMARY_FIELDS,
+                                       limit=limit, cursor=payload.get("cursor"))
+            return json.dumps({"user_id": user_id, "permission_type": permission_type,
+                               "pages": result["records"], "count": len(result["records"]),
+                               "next_cursor": result["next_cursor"]})
+
+        except Exception as e:
+            return json.dumps({"error": f"Operation failed: {str(e)}"})
+
+    @staticmethod
+    def get_info() -> dict[str, Any]:
+        return {
+            "function": {
+                "name": "inspect_accessible_pages",
+                "description": "Lists the pages a user can view (or edit, or administer), taking global and space roles, group grants and permissions inherited from parent pages into account. Returns page summaries without content, a page of results at a time; pass next_cursor back as cursor for more",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "payload": {
+                            "type": "object",
+                            "description": "Parameters for the operation",
+                            "properties": {
+                                "user_id": {"type": "string", "description": "ID of the user"},
+                                "permission_type": {"type": "string", "description": "Level required: view, edit or admin (default view)"},
+                                "space_id": {"type": "string", "description": "Only return pages in this space"},
+                                "limit": {"type": "integer", "description": "Maximum number of pages to return (default 100)"},
+                                "cursor": {"type": "string", "description": "next_cursor from a previous call, to get the following pages"}
+                            },
+                            "required": ["user_id"]
+                        }
+                    },
+                    "required": ["payload"]
+                }
+            },
+            "tool_name": "inspect_accessible_pages",
+            "category": "Permission Management",
+            "flag": "Getter"
+        }
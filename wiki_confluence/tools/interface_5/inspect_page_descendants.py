@@ -0,0 +1,60 @@
+from tau_bench.envs.tool import Tool
+from typing import Any, Dict
+from data_manager import DataManager
+from wiki_indexes import PageHierarchyIndex
+import json
+
+class InspectPageDescendants(Tool):
+    @staticmethod
+    def invoke(payload: Dict[str, Any], **kwargs) -> Any:
+        """
+        Lists every page below a page in depth-first order, with each page's depth relative to it
+        """
+        try:
+            page_id = payload.get("page_id")
+            if not page_id:
+                return json.dumps({"error": "page_id is required"})
+            page_id = str(page_id)
+            if DataManager.get_record("pages", page_id) is None:
+                return json.dumps({"error": "Page not found"})
+
+            hierarchy = DataManager.get_derived(PageHierarchyIndex)
+            max_depth = payload.get("max_depth")
+            if max_depth is not None and (not isinstance(max_depth, int) or max_depth < 1):
+                return json.dumps({"error": "max_depth must be a positive integer"})
+            descendants = []
+            for descendant_id, depth in hierarchy.descendants(page_id, max_depth=max_depth):
+                record = DataManager.get_record("pages", descendant_id)
+                if record is not None:
+                    descendants.append({**record, "depth": depth})
+            return json.dumps({"page_id": page_id, "descendants": descendants, "count": len(descendants)})
+
+        except Exception as e:
+            return json.dumps({"error": f"Operation failed: {str(e)}"})
+
+    @staticmethod
+    def get_info() -> dict[str, Any]:
+        return {
+            "function": {
+                "name": "inspect_page_descendants",
+                "description": "Lists every page below a page in depth-first order, with each page's depth relative to it",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "payload": {
+                            "type": "object",
+                            "description": "Parameters for the operation",
+                            "properties": {
+                                "page_id": {"type": "string", "description": "ID of the page"},
+                                "max_depth": {"type": "integer", "description": "Only return pages at most this many levels below the page"}
+                            },
+                            "required": ["page_id"]
+                        }
+                    },
+                    "required": ["payload"]
+                }
+            },
+            "tool_name": "inspect_page_descendants",
+            "category": "Page Management",
+            "flag": "Getter"
+        }
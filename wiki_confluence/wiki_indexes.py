@@ -0,0 +1,681 @@
+"""
+Derived indexes over the Wiki Confluence tables.
+
+Each class here is a ``DerivedIndex``: get the current instance with
+``DataManager.get_derived(<class>)`` and DataManager keeps it up to date as
+records are created, updated and deleted.
+"""
+
+import math
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from data_manager import DataManager, DerivedIndex, _id_order, to_epoch
+
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: Any) -> List[str]:
+    """Split text into lowercase word tokens."""
+    if not isinstance(text, str):
+        return []
+    return _TOKEN_RE.findall(text.lower())
+
+
+class PageSearchIndex(DerivedIndex):
+    """Inverted index over page titles and the content of each page's latest
+    version, ranked with Okapi BM25.
+
+    A page's document is its title (each title token counted TITLE_WEIGHT
+    times) plus the content_snapshot of its highest-numbered version, or the
+    page's own content (inline or from the blob store) when it has no
+    versions yet.
+    """
+
+    tables = ("pages", "page_versions")
+
+    K1 = 1.2
+    B = 0.75
+    TITLE_WEIGHT = 2
+
+    def __init__(self) -> None:
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_terms: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.total_length = 0
+        self.page_spaces: Dict[str, Any] = {}
+        self.trashed: Set[str] = set()
+        self.page_versions: Dict[str, Set[str]] = {}
+
+    def build(self, tables: Dict[str, Dict[str, Any]]) -> None:
+        for version_id, version in tables["page_versions"].items():
+            self.page_versions.setdefault(version.get("page_id"), set()).add(version_id)
+        for page_id in tables["pages"]:
+            self._index_page(page_id, tables)
+
+    def apply(self, table_name: str, record_id: str, old: Optional[Dict[str, Any]],
+              new: Optional[Dict[str, Any]], tables: Dict[str, Dict[str, Any]]) -> None:
+        if table_name == "pages":
+            self._index_page(record_id, tables)
+            return
+        affected = set()
+        for version in (old, new):
+            if version is not None:
+                affected.add(version.get("page_id"))
+        for page_id in affected:
+            versions = self.page_versions.get(page_id, set())
+            versions.discard(record_id)
+            if new is not None and new.get("page_id") == page_id:
+                versions.add(record_id)
+            if versions:
+                self.page_versions[page_id] = versions
+            else:
+                self.page_versions.pop(page_id, None)
+            self._index_page(page_id, tables)
+
+    def _latest_content(self, page_id: str, tables: Dict[str, Dict[str, Any]]) -> Any:
+        """Get the content_snapshot of a page's latest version, or None."""
+        page_versions = tables["page_versions"]
+        latest = None
+        for version_id in self.page_versions.get(page_id, ()):
+            version = page_versions.get(version_id)
+            if version is None:
+                continue
+            number = version.get("version_number")
+            key = (number if isinstance(number, (int, float)) else -1, _id_order(version_id))
+            if latest is None or key > latest[0]:
+                latest = (key, version)
+        return latest[1].get("content_snapshot") if latest is not None else None
+
+    def _index_page(self, page_id: str, tables: Dict[str, Dict[str, Any]]) -> None:
+        """(Re)index one page from the current tables, or drop it if it is gone."""
+        self._remove_page(page_id)
+        page = tables["pages"].get(page_id)
+        if page is None:
+            return
+
+        terms: Dict[str, int] = {}
+        for token in tokenize(page.get("title")):
+            terms[token] = terms.get(token, 0) + self.TITLE_WEIGHT
+        content = self._latest_content(page_id, tables)
+        if content is None:
+            content = page.get("content")
+        if content is None and isinstance(page.get("content_hash"), str):
+            content = DataManager.get_blob(page["content_hash"])
+        for token in tokenize(content):
+            terms[token] = terms.get(token, 0) + 1
+
+        for term, count in terms.items():
+            self.postings.setdefault(term, {})[page_id] = count
+        self.doc_terms[page_id] = terms
+        length = sum(terms.values())
+        self.doc_lengths[page_id] = length
+        self.total_length += length
+        self.page_spaces[page_id] = page.get("space_id")
+        if page.get("is_trashed"):
+            self.trashed.add(page_id)
+
+    def _remove_page(self, page_id: str) -> None:
+        terms = self.doc_terms.pop(page_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self.postings[term]
+            del posting[page_id]
+            if not posting:
+                del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(page_id)
+        self.page_spaces.pop(page_id, None)
+        self.trashed.discard(page_id)
+
+    def search(self, query: str, space_id: Optional[str] = None, limit: Optional[int] = 10,
+               include_trashed: bool = False) -> List[Dict[str, Any]]:
+        """Rank pages against query; returns [{"page_id", "score"}] best first.
+
+        Only pages in space_id are considered when it is given; trashed
+        pages are skipped unless include_trashed is set.
+        """
+        doc_count = len(self.doc_lengths)
+        if not doc_count:
+            return []
+        average_length = self.total_length / doc_count or 1
+
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for page_id, tf in posting.items():
+                if space_id is not None and self.page_spaces.get(page_id) != space_id:
+                    continue
+                if not include_trashed and page_id in self.trashed:
+                    continue
+                norm = self.K1 * (1 - self.B + self.B * self.doc_lengths[page_id] / average_length)
+                scores[page_id] = scores.get(page_id, 0.0) + idf * tf * (self.K1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], _id_order(item[0])))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [{"page_id": page_id, "score": round(score, 6)} for page_id, score in ranked]
+
+
+class PageHierarchyIndex(DerivedIndex):
+    """Page tree built from parent_page_id: parent pointers, ordered child
+    lists and, on demand, an Euler tour for O(1) subtree membership tests.
+
+    Pages whose parent does not exist are treated as roots of their own
+    subtrees; parent chains that loop are cut where they revisit a page.
+    """
+
+    tables = ("pages",)
+
+    def __init__(self) -> None:
+        self.parents: Dict[str, Optional[str]] = {}
+        self.children_of: Dict[Optional[str], Dict[str, None]] = {}
+        self._tour: Optional[Dict[str, List[int]]] = None
+
+    def build(self, tables: Dict[str, Dict[str, Any]]) -> None:
+        for page_id, page in tables["pages"].items():
+            self._link(page_id, page.get("parent_page_id"))
+
+    def apply(self, table_name: str, record_id: str, old: Optional[Dict[str, Any]],
+              new: Optional[Dict[str, Any]], tables: Dict[str, Dict[str, Any]]) -> None:
+        if old is not None and new is not None and old.get("parent_page_id") == new.get("parent_page_id"):
+            return
+        if old is not None:
+            self._unlink(record_id)
+        if new is not None:
+            self._link(record_id, new.get("parent_page_id"))
+
+    def _link(self, page_id: str, parent_id: Optional[str]) -> None:
+        self.parents[page_id] = parent_id
+        self.children_of.setdefault(parent_id, {})[page_id] = None
+        self._tour = None
+
+    def _unlink(self, page_id: str) -> None:
+        parent_id = self.parents.pop(page_id, None)
+        siblings = self.children_of.get(parent_id)
+        if siblings is not None:
+            siblings.pop(page_id, None)
+            if not siblings:
+                del self.children_of[parent_id]
+        self._tour = None
+
+    def children(self, page_id: str) -> List[str]:
+        """Get the ids of a page's direct children."""
+        return list(self.children_of.get(page_id, ()))
+
+    def ancestors(self, page_id: str) -> List[str]:
+        """Get the ids of a page's ancestors, nearest first; O(depth)."""
+        chain: List[str] = []
+        seen = {page_id}
+        parent_id = self.parents.get(page_id)
+        while parent_id is not None and parent_id not in seen:
+            chain.append(parent_id)
+            seen.add(parent_id)
+            parent_id = self.parents.get(parent_id)
+        return chain
+
+    def descendants(self, page_id: str, max_depth: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Get (id, depth) for every page below page_id in depth-first pre-order; O(subtree)."""
+        result: List[Tuple[str, int]] = []
+        seen = {page_id}
+        stack = [(child, 1) for child in reversed(self.children(page_id))]
+        while stack:
+            child, depth = stack.pop()
+            if child in seen:
+                continue
+            seen.add(child)
+            result.append((child, depth))
+            if max_depth is None or depth < max_depth:
+                stack.extend((grandchild, depth + 1) for grandchild in reversed(self.children(child)))
+        return result
+
+    def is_ancestor(self, ancestor_id: str, page_id: str) -> bool:
+        """Check whether ancestor_id lies on page_id's parent chain; O(depth)."""
+        return ancestor_id in self.ancestors(page_id)
+
+    def in_subtree(self, page_id: str, root_id: str) -> bool:
+        """Check whether page_id is root_id or below it, using the Euler tour (built after each change)."""
+        if self._tour is None:
+            self._tour = self._euler_tour()
+        inner = self._tour.get(page_id)
+        outer = self._tour.get(root_id)
+        if inner is None or outer is None:
+            return False
+        return outer[0] <= inner[0] and inner[1] <= outer[1]
+
+    def _euler_tour(self) -> Dict[str, List[int]]:
+        """Number pages by [entry, exit] times of a depth-first walk from every root."""
+        tour: Dict[str, List[int]] = {}
+        clock = 0
+        roots = [page_id for page_id, parent_id in self.parents.items()
+                 if parent_id is None or parent_id not in self.parents]
+        # Pages only reachable through a parent cycle get walked from themselves.
+        pending = roots + list(self.parents)
+        for root in pending:
+            if root in tour:
+                continue
+            stack: List[Tuple[str, bool]] = [(root, False)]
+            while stack:
+                page_id, done = stack.pop()
+                if done:
+                    tour[page_id][1] = clock
+                    continue
+                if page_id in tour:
+                    continue
+                tour[page_id] = [clock, clock]
+                clock += 1
+                stack.append((page_id, True))
+                stack.extend((child, False) for child in reversed(self.children(page_id)))
+        return tour
+
+
+class GroupMembershipMatrix(DerivedIndex):
+    """Group membership as bitsets over dense user indexes.
+
+    Every user and group seen in user_groups gets a small integer index.
+    Each group is kept as an int whose bit i is set when user i belongs to
+    it, and each user as the same kind of int over group indexes.
+    Membership tests then take one shift, and unions, intersections and
+    sizes take plain int operations over all members at once. Duplicate
+    link records are counted, so a user stays a member until their last
+    link is removed.
+    """
+
+    tables = ("user_groups",)
+
+    def __init__(self) -> None:
+        self.user_index: Dict[Any, int] = {}
+        self.user_ids: List[Any] = []
+        self.group_index: Dict[Any, int] = {}
+        self.group_ids: List[Any] = []
+        self.group_bits: Dict[Any, int] = {}
+        self.user_bits: Dict[Any, int] = {}
+        self.links: Dict[str, Tuple[Any, Any]] = {}
+        self.link_counts: Dict[Tuple[Any, Any], int] = {}
+
+    def build(self, tables: Dict[str, Dict[str, Any]]) -> None:
+        for record_id, record in tables["user_groups"].items():
+            self._add(record_id, record)
+
+    def apply(self, table_name: str, record_id: str, old: Optional[Dict[str, Any]],
+              new: Optional[Dict[str, Any]], tables: Dict[str, Dict[str, Any]]) -> None:
+        self._remove(record_id)
+        if new is not None:
+            self._add(record_id, new)
+
+    @staticmethod
+    def _slot(index: Dict[Any, int], ids: List[Any], key: Any) -> int:
+        slot = index.get(key)
+        if slot is None:
+            slot = index[key] = len(ids)
+            ids.append(key)
+        return slot
+
+    def _add(self, record_id: str, record: Dict[str, Any]) -> None:
+        user_id, group_id = record.get("user_id"), record.get("group_id")
+        if user_id is None or group_id is None:
+            return
+        self.links[record_id] = (user_id, group_id)
+        count = self.link_counts.get((user_id, group_id), 0)
+        self.link_counts[(user_id, group_id)] = count + 1
+        if count:
+            return
+        user_slot = self._slot(self.user_index, self.user_ids, user_id)
+        group_slot = self._slot(self.group_index, self.group_ids, group_id)
+        self.group_bits[group_id] = self.group_bits.get(group_id, 0) | (1 << user_slot)
+        self.user_bits[user_id] = self.user_bits.get(user_id, 0) | (1 << group_slot)
+
+    def _remove(self, record_id: str) -> None:
+        link = self.links.pop(record_id, None)
+        if link is None:
+            return
+        count = self.link_counts[link] - 1
+        if count:
+            self.link_counts[link] = count
+            return
+        del self.link_counts[link]
+        user_id, group_id = link
+        self.group_bits[group_id] &= ~(1 << self.user_index[user_id])
+        if not self.group_bits[group_id]:
+            del self.group_bits[group_id]
+        self.user_bits[user_id] &= ~(1 << self.group_index[group_id])
+        if not self.user_bits[user_id]:
+            del self.user_bits[user_id]
+
+    @staticmethod
+    def _decode(bits: int, ids: List[Any]) -> List[Any]:
+        result = []
+        while bits:
+            low = bits & -bits
+            result.append(ids[low.bit_length() - 1])
+            bits ^= low
+        return result
+
+    def is_member(self, user_id: Any, group_id: Any) -> bool:
+        """Check whether a user belongs to a group."""
+        slot = self.user_index.get(user_id)
+        return slot is not None and (self.group_bits.get(group_id, 0) >> slot) & 1 == 1
+
+    def members(self, group_id: Any) -> List[Any]:
+        """Get the ids of a group's members."""
+        return self._decode(self.group_bits.get(group_id, 0), self.user_ids)
+
+    def groups_of(self, user_id: Any) -> List[Any]:
+        """Get the ids of the groups a user belongs to."""
+        return self._decode(self.user_bits.get(user_id, 0), self.group_ids)
+
+    def union_bits(self, group_ids: Iterable[Any]) -> int:
+        """Get the member bitset of users in any of the groups."""
+        bits = 0
+        for group_id in group_ids:
+            bits |= self.group_bits.get(group_id, 0)
+        return bits
+
+    def intersection_bits(self, group_ids: Iterable[Any]) -> int:
+        """Get the member bitset of users in every one of the groups (none for no groups)."""
+        bits = None
+        for group_id in group_ids:
+            bits = self.group_bits.get(group_id, 0) if bits is None else bits & self.group_bits.get(group_id, 0)
+            if not bits:
+                return 0
+        return bits or 0
+
+    def union(self, group_ids: Iterable[Any]) -> List[Any]:
+        """Get the ids of users in any of the groups."""
+        return self._decode(self.union_bits(group_ids), self.user_ids)
+
+    def intersection(self, group_ids: Iterable[Any]) -> List[Any]:
+        """Get the ids of users in every one of the groups."""
+        return self._decode(self.intersection_bits(group_ids), self.user_ids)
+
+    def in_any(self, user_id: Any, group_ids: Iterable[Any]) -> bool:
+        """Check whether a user belongs to at least one of the groups."""
+        group_index = self.group_index
+        slots = 0
+        for group_id in group_ids:
+            if group_id in group_index:
+                slots |= 1 << group_index[group_id]
+        return bool(self.user_bits.get(user_id, 0) & slots)
+
+    def size(self, group_id: Any) -> int:
+        """Get the number of members of a group."""
+        return bin(self.group_bits.get(group_id, 0)).count("1")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get group-size statistics: group and member counts and min, max and mean group size."""
+        sizes = [bin(bits).count("1") for bits in self.group_bits.values()]
+        return {
+            "groups": len(sizes),
+            "users": len(self.user_bits),
+            "memberships": len(self.link_counts),
+            "min_size": min(sizes, default=0),
+            "max_size": max(sizes, default=0),
+            "mean_size": sum(sizes) / len(sizes) if sizes else 0.0,
+        }
+
+
+# Permission levels, each implying the ones below it.
+PERMISSION_LEVELS = {"view": 1, "edit": 2, "admin": 3}
+
+
+class PermissionResolver(DerivedIndex):
+    """Effective view/edit/admin rights of every user on spaces and pages.
+
+    A user's level on a page is the highest of:
+      * their global role (GLOBAL_ROLE_LEVELS),
+      * their space membership role in the page's space (MEMBERSHIP_ROLE_LEVELS),
+      * active permissions granted on the page's space, and
+      * active permissions granted on the page or any of its ancestors,
+    where permissions apply to their user or to every member of their group.
+    A permission counts while is_active is not false, revoked_at is unset
+    and expires_at (if any) is in the future.
+
+    Each user's rights are computed on first use and cached; a change to
+    permissions, group or space memberships, global roles or the page tree
+    drops only the cached maps of the users it can affect.
+    """
+
+    tables = ("permissions", "user_groups", "space_memberships", "users", "pages")
+
+    GLOBAL_ROLE_LEVELS = {"global_admin": "admin"}
+    # Keyed on the space_memberships.role enum (SPACE_MEMBER_ROLES in
+    # gemini.py); any other role grants no level in the space.
+    MEMBERSHIP_ROLE_LEVELS = {
+        "space_admin": "admin",
+        "space_member": "edit",
+        "content_contributor": "edit",
+        "guest": "view",
+    }
+
+    def __init__(self) -> None:
+        # permission_id -> (space_id, page_id, user_id, group_id, level, expires_at epoch or None)
+        self.grants: Dict[str, Tuple[Any, Any, Any, Any, int, Optional[int]]] = {}
+        self.grants_by_user: Dict[Any, Set[str]] = {}
+        self.grants_by_group: Dict[Any, Set[str]] = {}
+        self.grants_by_page: Dict[Any, Set[str]] = {}
+        self.groups = GroupMembershipMatrix()
+        self.memberships: Dict[str, Tuple[Any, Any, Any]] = {}
+        self.memberships_of_user: Dict[Any, Set[str]] = {}
+        self.global_roles: Dict[Any, Any] = {}
+        self.tree = PageHierarchyIndex()
+        self.page_spaces: Dict[str, Any] = {}
+        self.space_pages: Dict[Any, Dict[str, None]] = {}
+        self._maps: Dict[Any, Dict[str, Any]] = {}
+
+    def build(self, tables: Dict[str, Dict[str, Any]]) -> None:
+        self.tree.build({"pages": tables["pages"]})
+        for page_id, page in tables["pages"].items():
+            self._add_page(page_id, page)
+        for record_id, record in tables["permissions"].items():
+            self._add_grant(record_id, record)
+        self.groups.build({"user_groups": tables["user_groups"]})
+        for record_id, record in tables["space_memberships"].items():
+            self._add_membership(record_id, record)
+        for user_id, user in tables["users"].items():
+            self.global_roles[user.get("user_id", user_id)] = user.get("global_role")
+
+    def apply(self, table_name: str, record_id: str, old: Optional[Dict[str, Any]],
+              new: Optional[Dict[str, Any]], tables: Dict[str, Dict[str, Any]]) -> None:
+        if table_name == "permissions":
+            affected = set()
+            for entry in (self.grants.get(record_id), self._grant_entry(new)):
+                if entry is not None:
+                    affected |= self._grantees(entry)
+            self._remove_grant(record_id)
+            if new is not None:
+                self._add_grant(record_id, new)
+        elif table_name == "user_groups":
+            affected = {record.get("user_id") for record in (old, new) if record is not None}
+            self.groups.apply(table_name, record_id, old, new, {})
+        elif table_name == "space_memberships":
+            affected = {record.get("user_id") for record in (old, new) if record is not None}
+            self._remove_membership(record_id)
+            if new is not None:
+                self._add_membership(record_id, new)
+        elif table_name == "users":
+            affected = {record.get("user_id", record_id) for record in (old, new) if record is not None}
+            self.global_roles.pop(record_id, None)
+            if old is not None:
+                self.global_roles.pop(old.get("user_id", record_id), None)
+            if new is not None:
+                self.global_roles[new.get("user_id", record_id)] = new.get("global_role")
+        else:
+            self._remove_page(record_id)
+            if new is not None:
+                self._add_page(record_id, new)
+            if old is not None and new is not None and old.get("parent_page_id") == new.get("parent_page_id"):
+                return
+            # Page grants reach down the tree: users granted on the page's old
+            # or new ancestors (or the page itself) see their expansion change.
+            chain = {record_id, *self.tree.ancestors(record_id)}
+            self.tree.apply("pages", record_id, old, new, {})
+            chain.update(self.tree.ancestors(record_id))
+            affected = set()
+            for page_id in chain:
+                for permission_id in self.grants_by_page.get(page_id, ()):
+                    affected |= self._grantees(self.grants[permission_id])
+        for user_id in affected:
+            self._maps.pop(user_id, None)
+
+    def _grant_entry(self, record: Optional[Dict[str, Any]]) -> Optional[Tuple[Any, Any, Any, Any, int, Optional[int]]]:
+        """Turn a permissions record into a grant tuple, or None if it grants nothing."""
+        if record is None or record.get("is_active") is False or record.get("revoked_at"):
+            return None
+        level = PERMISSION_LEVELS.get(record.get("permission_type"))
+        if level is None:
+            return None
+        expires_at = record.get("expires_at")
+        expires = to_epoch(expires_at) if expires_at else None
+        if expires_at and expires is None:
+            return None
+        return (record.get("space_id"), record.get("page_id"), record.get("user_id"),
+                record.get("group_id"), level, expires)
+
+    def _grantees(self, entry: Tuple[Any, ...]) -> Set[Any]:
+        users = set()
+        if entry[2] is not None:
+            users.add(entry[2])
+        if entry[3] is not None:
+            users.update(self.groups.members(entry[3]))
+        return users
+
+    def _add_grant(self, record_id: str, record: Dict[str, Any]) -> None:
+        entry = self._grant_entry(record)
+        if entry is None:
+            return
+        self.grants[record_id] = entry
+        space_id, page_id, user_id, group_id = entry[:4]
+        if user_id is not None:
+            self.grants_by_user.setdefault(user_id, set()).add(record_id)
+        if group_id is not None:
+            self.grants_by_group.setdefault(group_id, set()).add(record_id)
+        if page_id is not None:
+            self.grants_by_page.setdefault(page_id, set()).add(record_id)
+
+    def _remove_grant(self, record_id: str) -> None:
+        entry = self.grants.pop(record_id, None)
+        if entry is None:
+            return
+        for index, key in ((self.grants_by_user, entry[2]), (self.grants_by_group, entry[3]),
+                           (self.grants_by_page, entry[1])):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(record_id)
+                if not ids:
+                    del index[key]
+
+    def _add_membership(self, record_id: str, record: Dict[str, Any]) -> None:
+        user_id = record.get("user_id")
+        self.memberships[record_id] = (user_id, record.get("space_id"), record.get("role"))
+        self.memberships_of_user.setdefault(user_id, set()).add(record_id)
+
+    def _remove_membership(self, record_id: str) -> None:
+        membership = self.memberships.pop(record_id, None)
+        if membership is None:
+            return
+        ids = self.memberships_of_user.get(membership[0])
+        if ids is not None:
+            ids.discard(record_id)
+            if not ids:
+                del self.memberships_of_user[membership[0]]
+
+    def _add_page(self, page_id: str, page: Dict[str, Any]) -> None:
+        space_id = page.get("space_id")
+        self.page_spaces[page_id] = space_id
+        self.space_pages.setdefault(space_id, {})[page_id] = None
+
+    def _remove_page(self, page_id: str) -> None:
+        if page_id not in self.page_spaces:
+            return
+        space_id = self.page_spaces.pop(page_id)
+        pages = self.space_pages.get(space_id)
+        if pages is not None:
+            pages.pop(page_id, None)
+            if not pages:
+                del self.space_pages[space_id]
+
+    def _user_map(self, user_id: Any) -> Dict[str, Any]:
+        """Get (computing if missing or past an expiry) a user's effective rights."""
+        now = int(time.time() * 1_000_000)
+        cached = self._maps.get(user_id)
+        if cached is not None and (cached["valid_until"] is None or now < cached["valid_until"]):
+            return cached
+
+        levels = PERMISSION_LEVELS
+        global_level = levels.get(self.GLOBAL_ROLE_LEVELS.get(self.global_roles.get(user_id)), 0)
+        spaces: Dict[Any, int] = {}
+        for membership_id in self.memberships_of_user.get(user_id, ()):
+            _, space_id, role = self.memberships[membership_id]
+            level = levels.get(self.MEMBERSHIP_ROLE_LEVELS.get(role), 0)
+            if level > spaces.get(space_id, 0):
+                spaces[space_id] = level
+
+        permission_ids = set(self.grants_by_user.get(user_id, ()))
+        for group_id in self.groups.groups_of(user_id):
+            permission_ids |= self.grants_by_group.get(group_id, set())
+        valid_until = None
+        page_grants: Dict[Any, int] = {}
+        for permission_id in permission_ids:
+            space_id, page_id, _, _, level, expires = self.grants[permission_id]
+            if expires is not None:
+                if expires <= now:
+                    continue
+                valid_until = expires if valid_until is None else min(valid_until, expires)
+            if page_id is not None:
+                if level > page_grants.get(page_id, 0):
+                    page_grants[page_id] = level
+            elif space_id is not None and level > spaces.get(space_id, 0):
+                spaces[space_id] = level
+
+        pages: Dict[str, int] = {}
+        for page_id, level in page_grants.items():
+            for covered in [page_id] + [child for child, _ in self.tree.descendants(page_id)]:
+                if level > pages.get(covered, 0):
+                    pages[covered] = level
+
+        user_map = {"global": global_level, "spaces": spaces, "pages": pages, "valid_until": valid_until}
+        self._maps[user_id] = user_map
+        return user_map
+
+    def level(self, user_id: Any, page_id: Optional[str] = None, space_id: Any = None) -> Optional[str]:
+        """Get a user's effective level ("view", "edit", "admin" or None) on a page, or on a space."""
+        user_map = self._user_map(user_id)
+        best = user_map["global"]
+        if page_id is not None:
+            best = max(best, user_map["pages"].get(page_id, 0))
+            space_id = self.page_spaces.get(page_id, space_id)
+        if space_id is not None:
+            best = max(best, user_map["spaces"].get(space_id, 0))
+        for name, value in PERMISSION_LEVELS.items():
+            if value == best:
+                return name
+        return None
+
+    def check(self, user_id: Any, permission_type: str, page_id: Optional[str] = None, space_id: Any = None) -> bool:
+        """Check whether a user holds permission_type (or a higher level) on a page or space."""
+        required = PERMISSION_LEVELS[permission_type]
+        level = self.level(user_id, page_id=page_id, space_id=space_id)
+        return level is not None and PERMISSION_LEVELS[level] >= required
+
+    def accessible_pages(self, user_id: Any, permission_type: str = "view", space_id: Any = None) -> List[str]:
+        """Get the ids of the pages a user holds permission_type (or higher) on, in ID order."""
+        required = PERMISSION_LEVELS[permission_type]
+        user_map = self._user_map(user_id)
+        if user_map["global"] >= required:
+            spaces = [space_id] if space_id is not None else list(self.space_pages)
+        else:
+            spaces = [space for space, level in user_map["spaces"].items()
+                      if level >= required and (space_id is None or space == space_id)]
+        result = set()
+        for space in spaces:
+            result.update(self.space_pages.get(space, ()))
+        for page_id, level in user_map["pages"].items():
+            if level >= required and page_id in self.page_spaces and (
+                    space_id is None or self.page_spaces[page_id] == space_id):
+                result.add(page_id)
+        return sorted(result, key=_id_order)